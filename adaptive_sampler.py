@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+적응형 반복 측정: 순위가 통계적으로 확정되면 표본 추출을 멈춥니다
+Adaptive repetition: stops sampling once rankings are statistically settled
+
+고정 5회 반복 대신 (테스트, 모델) 셀마다 필요한 만큼만 호출합니다. 셀은 다음 중 하나를 만족하면 멈춥니다:
+  - ci: 평균 지연 시간의 95% 부트스트랩 신뢰구간 폭이 평균의 target_ci 이하
+  - rank: 같은 테스트에서 지연 시간 순으로 인접한 모델들과의 우위 확률이 rank_confidence 이상으로 확정
+  - requests: 셀당 요청 수 예산(max_requests) 소진
+  - budget: 다음 호출의 예상 비용을 더하면 셀당 비용 예산(max_cost, self.models 가격 기준)을 초과
+분산이 작은 빠른 모델은 몇 번 만에 멈추고, 분산이 큰 모델은 예산 안에서 더 많이 측정됩니다.
+셀마다 한 번에 하나의 요청만 진행하며, 응답이 도착할 때마다 해당 셀의 중단 여부를 바로 판단합니다.
+cold 호출(연결 설정 포함)은 예산에는 포함되지만 통계에서는 제외됩니다.
+
+Instead of a fixed five runs, each (test, model) cell is invoked only as often as it needs. A cell stops
+when one of the following holds:
+  - ci: the 95% bootstrap CI of its mean latency is no wider than target_ci of the mean
+  - rank: its win probability against the latency-adjacent models of the same test is settled
+    (>= rank_confidence either way)
+  - requests: the per-cell request budget (max_requests) is used up
+  - budget: the expected cost of the next call would exceed the per-cell dollar budget (max_cost,
+    using the pricing in self.models)
+Tight, fast models stop after a few calls while noisy ones get more samples within the budget. Each
+cell has at most one request in flight and is re-evaluated as soon as its response arrives. Cold calls
+(which may include connection setup) count against the budget but are left out of the statistics.
+"""
+
+import argparse
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from bedrock_model_comparison import BedrockModelComparison, TEST_CASES
+from metrics_exporter import attach_exporter
+from ranking_stats import Bootstrap, latency_percentiles
+
+# 고정 반복 실행 횟수 (절감량 비교 기준) / Fixed repetition count (baseline for savings)
+FIXED_RUNS = 5
+
+
+class Cell:
+    """
+    (테스트, 모델) 셀의 표본과 예산 사용량
+    Samples and budget usage of one (test, model) cell
+    """
+
+    __slots__ = ('test_index', 'model_key', 'latencies', 'requests', 'failures', 'cold', 'cost',
+                 'input_tokens', 'output_tokens', 'stop_reason', 'ci')
+
+    def __init__(self, test_index: int, model_key: str):
+        self.test_index = test_index
+        self.model_key = model_key
+        self.latencies: List[float] = []
+        self.requests = 0
+        self.failures = 0
+        self.cold = 0
+        self.cost = 0.0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.stop_reason: Optional[str] = None
+        self.ci: Optional[List[float]] = None
+
+    @property
+    def mean(self) -> Optional[float]:
+        return float(np.mean(self.latencies)) if self.latencies else None
+
+
+class AdaptiveSampler:
+    """
+    적응형 반복 측정기
+    Adaptive repetition sampler
+
+    Args:
+        comparison: 호출에 사용할 BedrockModelComparison / BedrockModelComparison used for calls
+        tests: 테스트 케이스 목록 ({'name', 'prompt'}) / Test cases ({'name', 'prompt'})
+        target_ci: 신뢰구간 폭 / 평균 목표 (0.2 = ±10%) / Target CI width relative to the mean (0.2 = ±10%)
+        rank_confidence: 인접 모델과의 순위 확정 확률 / Probability that settles the order against neighbours
+        min_samples: 중단 판단 전 최소 warm 표본 수 / Minimum warm samples before any stop decision
+        max_requests: 셀당 최대 요청 수 / Maximum requests per cell
+        max_cost: 셀당 최대 비용 (USD, None이면 제한 없음) / Maximum cost per cell (USD, None = unlimited)
+        max_tokens: 최대 출력 토큰 수 / Maximum output tokens
+    """
+
+    def __init__(self, comparison: BedrockModelComparison, tests: List[Dict] = TEST_CASES,
+                 target_ci: float = 0.2, rank_confidence: float = 0.9, min_samples: int = 3,
+                 max_requests: int = 15, max_cost: Optional[float] = None, max_tokens: int = 4096):
+        self.comparison = comparison
+        self.tests = tests
+        self.target_ci = target_ci
+        self.rank_confidence = rank_confidence
+        self.min_samples = max(2, min_samples)
+        self.max_requests = max_requests
+        self.max_cost = max_cost
+        self.max_tokens = max_tokens
+        self.cells = {(i, key): Cell(i, key) for i in range(len(tests)) for key in comparison.models}
+        # 셀마다 호출 순서가 다르고 cold 호출이 빠지므로 셀 간 표본은 짝지어지지 않음 → 독립 재추출
+        # Samples of different cells are not paired (call order differs and cold calls are dropped), so each
+        # cell is resampled independently
+        self._bootstrap = Bootstrap(seed=0, paired=False)
+
+    def _next_cost(self, cell: Cell) -> float:
+        """
+        다음 호출의 예상 비용: 이전 성공 호출의 평균 토큰, 첫 호출은 프롬프트 길이와 max_tokens 기준 상한
+        Expected cost of the next call: mean tokens of earlier successes, or an upper bound from the
+        prompt length and max_tokens for the first call
+        """
+        model_info = self.comparison.models[cell.model_key]
+        done = cell.requests - cell.failures
+        if done:
+            input_tokens, output_tokens = cell.input_tokens / done, cell.output_tokens / done
+        else:
+            input_tokens, output_tokens = len(self.tests[cell.test_index]['prompt']) // 4, self.max_tokens
+        return (input_tokens * model_info['input_price'] + output_tokens * model_info['output_price']) / 1_000_000
+
+    def _rank_settled(self, cell: Cell) -> bool:
+        """
+        같은 테스트에서 지연 시간 순으로 인접한 모델들과의 우위 확률이 확정되었는지 판단합니다.
+        Returns True if the win probabilities against the latency-adjacent models are settled.
+        """
+        peers = [self.cells[(cell.test_index, key)] for key in self.comparison.models]
+        if any(len(p.latencies) < self.min_samples for p in peers if p.stop_reason not in ('requests', 'budget')):
+            return False
+        peers = [p for p in peers if len(p.latencies) >= self.min_samples]
+        if len(peers) < 2:
+            return False
+        peers.sort(key=lambda p: p.mean)
+        pos = peers.index(cell)
+        neighbours = [peers[j] for j in (pos - 1, pos + 1) if 0 <= j < len(peers)]
+        pairwise = self._bootstrap.pairwise_lower({p.model_key: p.latencies for p in [cell] + neighbours})
+        return all(max(pairwise[cell.model_key][n.model_key], 1 - pairwise[cell.model_key][n.model_key])
+                   >= self.rank_confidence for n in neighbours)
+
+    def _update(self, cell: Cell, result: Dict) -> bool:
+        """
+        호출 결과를 셀에 반영하고 계속 측정할지 반환합니다.
+        Records a call result on the cell and returns whether sampling should continue.
+        """
+        cell.requests += 1
+        if result.get('success'):
+            cell.cost += result['total_cost']
+            cell.input_tokens += result['input_tokens']
+            cell.output_tokens += result['output_tokens']
+            if result.get('warm', True):
+                cell.latencies.append(result['latency'])
+            else:
+                cell.cold += 1
+        else:
+            cell.failures += 1
+
+        if len(cell.latencies) >= self.min_samples:
+            cell.ci = self._bootstrap.mean_ci(cell.latencies, 3)
+            if (cell.ci[1] - cell.ci[0]) <= self.target_ci * cell.mean:
+                cell.stop_reason = 'ci'
+            elif self._rank_settled(cell):
+                cell.stop_reason = 'rank'
+        if cell.stop_reason is None and cell.requests >= self.max_requests:
+            cell.stop_reason = 'requests'
+        if cell.stop_reason is None and self.max_cost is not None and cell.cost + self._next_cost(cell) > self.max_cost:
+            cell.stop_reason = 'budget'
+        return cell.stop_reason is None
+
+    def run(self) -> Dict:
+        """
+        모든 셀이 멈출 때까지 측정하고 결과 Dict를 반환합니다.
+        Samples until every cell has stopped and returns the result Dict.
+        """
+        comparison = self.comparison
+        cells = list(self.cells.values())
+        if self.max_cost is not None:
+            for cell in cells:
+                if self._next_cost(cell) > self.max_cost:
+                    cell.stop_reason = 'budget'
+        workers = sum(comparison.model_concurrency.values())
+        print(f"Adaptive sampling: {len(self.tests)} tests x {len(comparison.models)} models "
+              f"(target CI {self.target_ci:.0%} of mean, rank confidence {self.rank_confidence:.0%}, "
+              f"max {self.max_requests} requests"
+              + (f", ${self.max_cost} per cell)" if self.max_cost is not None else ")"))
+
+        wall_start = time.time()
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            def submit(cell):
+                prompt = self.tests[cell.test_index]['prompt']
+                return executor.submit(comparison.invoke_model_limited, cell.model_key, prompt, self.max_tokens)
+
+            pending = {submit(cell): cell for cell in cells if cell.stop_reason is None}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    cell = pending.pop(future)
+                    if self._update(cell, future.result()):
+                        pending[submit(cell)] = cell
+                    else:
+                        name = comparison.models[cell.model_key]['name']
+                        mean = f"{cell.mean:.2f}s" if cell.latencies else "-"
+                        print(f"  {self.tests[cell.test_index]['name']} / {name}: {cell.stop_reason} "
+                              f"after {cell.requests} requests (mean {mean}, ${cell.cost:.4f})")
+        elapsed = time.time() - wall_start
+        return self.report(elapsed)
+
+    def report(self, elapsed: float) -> Dict:
+        """
+        셀별 통계와 테스트별 순위를 JSON용 Dict로 정리합니다.
+        Formats per-cell statistics and per-test rankings as a JSON-ready Dict.
+        """
+        comparison = self.comparison
+        tests = []
+        for i, test in enumerate(self.tests):
+            models = {}
+            for key in comparison.models:
+                cell = self.cells[(i, key)]
+                entry = {
+                    "model_name": comparison.models[key]['name'],
+                    "stop_reason": cell.stop_reason,
+                    "requests": cell.requests,
+                    "failures": cell.failures,
+                    "cold_excluded": cell.cold,
+                    "samples": len(cell.latencies),
+                    "cost_usd": round(cell.cost, 6)
+                }
+                if cell.latencies:
+                    entry["mean_latency_s"] = round(cell.mean, 3)
+                    entry["latency_s"] = [round(v, 3) for v in cell.latencies]
+                    entry["latency_percentiles"] = latency_percentiles(cell.latencies)
+                if cell.ci:
+                    entry["latency_ci95"] = cell.ci
+                    entry["ci_relative_width"] = round((cell.ci[1] - cell.ci[0]) / cell.mean, 3)
+                models[key] = entry
+
+            ranked = sorted((k for k in models if 'mean_latency_s' in models[k]),
+                            key=lambda k: models[k]['mean_latency_s'])
+            tests.append({
+                "test_name": test['name'],
+                "by_latency": ranked,
+                "p_faster_than_next": {
+                    a: self._bootstrap.pairwise_lower({a: self.cells[(i, a)].latencies,
+                                                       b: self.cells[(i, b)].latencies})[a][b]
+                    for a, b in zip(ranked, ranked[1:])
+                },
+                "models": models
+            })
+
+        total_requests = sum(c.requests for c in self.cells.values())
+        fixed_requests = FIXED_RUNS * len(self.cells)
+        return {
+            "meta": {
+                "title": "AWS Bedrock 경량 모델 적응형 반복 측정",
+                "date": datetime.now().strftime('%Y-%m-%d'),
+                "target_ci_relative_width": self.target_ci,
+                "rank_confidence": self.rank_confidence,
+                "min_samples": self.min_samples,
+                "max_requests_per_cell": self.max_requests,
+                "max_cost_per_cell_usd": self.max_cost,
+                "max_tokens": self.max_tokens,
+                "streaming": comparison.stream,
+                "api": "converse" if comparison.converse else "invoke_model",
+                "warmed_up": bool(comparison.warmup),
+                "elapsed_s": round(elapsed, 2)
+            },
+            "summary": {
+                "total_requests": total_requests,
+                "fixed_runs_requests": fixed_requests,
+                "requests_saved": fixed_requests - total_requests,
+                "total_cost_usd": round(sum(c.cost for c in self.cells.values()), 6),
+                "stop_reasons": {reason: sum(1 for c in self.cells.values() if c.stop_reason == reason)
+                                 for reason in ('ci', 'rank', 'requests', 'budget')}
+            },
+            "tests": tests
+        }
+
+
+def main():
+    """
+    적응형 측정 실행 함수: 모든 셀을 측정하고 JSON으로 저장합니다.
+    Adaptive sampling entry point: samples every cell and saves JSON.
+    """
+    parser = argparse.ArgumentParser(description='AWS Bedrock adaptive repetition sampler')
+    parser.add_argument('--target-ci', type=float, default=0.2,
+                        help='95%% 신뢰구간 폭 / 평균 목표 (0.2 = ±10%%) / Target CI width relative to the mean')
+    parser.add_argument('--rank-confidence', type=float, default=0.9,
+                        help='인접 모델과의 순위 확정 확률 / Probability that settles the order against neighbours')
+    parser.add_argument('--min-samples', type=int, default=3,
+                        help='중단 판단 전 최소 표본 수 / Minimum samples before stopping')
+    parser.add_argument('--max-requests', type=int, default=15,
+                        help='셀당 최대 요청 수 / Maximum requests per (test, model) cell')
+    parser.add_argument('--max-cost', type=float, default=None,
+                        help='셀당 최대 비용 (USD) / Maximum cost per (test, model) cell (USD)')
+    parser.add_argument('--max-tokens', type=int, default=4096,
+                        help='최대 출력 토큰 수 / Maximum output tokens')
+    parser.add_argument('--concurrency', type=int, default=5,
+                        help='전체 동시 호출 수 / Global in-flight request limit')
+    parser.add_argument('--per-model-concurrency', type=int, default=1,
+                        help='모델별 동시 호출 수 / Per-model in-flight limit')
+    parser.add_argument('--rpm', type=float, default=None,
+                        help='모델별 분당 요청 수 제한 / Per-model requests-per-minute limit')
+    parser.add_argument('--tpm', type=float, default=None,
+                        help='모델별 분당 토큰 수 제한 / Per-model tokens-per-minute limit')
+    parser.add_argument('--max-pool-connections', type=int, default=None,
+                        help='HTTP 연결 풀 크기 / HTTP connection pool size')
+    parser.add_argument('--connect-timeout', type=float, default=10,
+                        help='연결 타임아웃 (초) / Connect timeout (seconds)')
+    parser.add_argument('--read-timeout', type=float, default=300,
+                        help='응답 읽기 타임아웃 (초) / Read timeout (seconds)')
+    parser.add_argument('--warm-up', action='store_true',
+                        help='실행 전 모델별 짧은 요청으로 연결 예열 / Pre-open connections with tiny requests per model')
+    parser.add_argument('--stream', action='store_true',
+                        help='스트리밍 API로 호출 / Use the streaming API')
+    parser.add_argument('--converse', action='store_true',
+                        help='Converse API로 호출하여 서버 측 지연(metrics.latencyMs)과 오버헤드 분리 / Use the Converse API to separate server latency from overhead')
+    parser.add_argument('--endpoint-url', default=None,
+                        help='bedrock-runtime 엔드포인트 재정의 (예: http://localhost:8080) / Endpoint override')
+    parser.add_argument('--replay', metavar='PATH', default=None,
+                        help='기록된 아카이브로 오프라인 재생 / Replay a recorded archive offline')
+    parser.add_argument('--replay-latency-scale', type=float, default=1.0,
+                        help='재생 지연 시간 배율 (0 = 대기 없음) / Replay latency multiplier (0 = no wait)')
+    parser.add_argument('--output', default='adaptive_results.json',
+                        help='결과 JSON 파일명 / Output JSON filename')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='실시간 지표 OpenMetrics 엔드포인트 포트 (예: 9464) / Port for the live OpenMetrics endpoint')
+    parser.add_argument('--metrics-file', metavar='PATH', default=None,
+                        help='실시간 지표를 주기적으로 기록할 파일 / File the live metrics are flushed to periodically')
+    parser.add_argument('--metrics-interval', type=float, default=10,
+                        help='지표 파일 기록 주기 (초) / Metrics file flush interval (seconds)')
+    args = parser.parse_args()
+
+    comparison = BedrockModelComparison(
+        region='us-east-1',
+        max_concurrency=args.concurrency,
+        per_model_concurrency=args.per_model_concurrency,
+        stream=args.stream,
+        converse=args.converse,
+        replay_path=args.replay,
+        replay_latency_scale=args.replay_latency_scale,
+        endpoint_url=args.endpoint_url,
+        requests_per_min=args.rpm,
+        tokens_per_min=args.tpm,
+        max_pool_connections=args.max_pool_connections,
+        connect_timeout=args.connect_timeout,
+        read_timeout=args.read_timeout
+    )
+    # 실시간 지표 (요청 시) / Live metrics (if requested)
+    exporter = attach_exporter(comparison, args.metrics_port, args.metrics_file, args.metrics_interval)
+    if args.warm_up:
+        comparison.warm_up()
+
+    sampler = AdaptiveSampler(comparison, target_ci=args.target_ci, rank_confidence=args.rank_confidence,
+                              min_samples=args.min_samples, max_requests=args.max_requests,
+                              max_cost=args.max_cost, max_tokens=args.max_tokens)
+    output = sampler.run()
+
+    summary = output['summary']
+    print(f"\n{summary['total_requests']} requests (fixed {FIXED_RUNS} runs: {summary['fixed_runs_requests']}), "
+          f"${summary['total_cost_usd']:.4f}, stop reasons {summary['stop_reasons']}")
+    for test in output['tests']:
+        print(f"  {test['test_name']:32}: {' < '.join(test['by_latency'])}")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2, ensure_ascii=False)
+    print(f"\nAdaptive results saved: {args.output}")
+    if exporter:
+        exporter.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,201 +1,522 @@
 #!/usr/bin/env python3
-"""Aggregate results from 5 test runs and compute averages."""
+"""Aggregate results from repeated test runs and compute averages.
+
+실행 결과 파일(comparison_results_run*.json)을 자동으로 찾아 한 번의 순회로 (실행, 테스트, 모델) 단위
+부분 집계(개수, 합, 제곱합, 최소/최대, 표본 저장소)를 갱신하고 상태 파일에 저장합니다. 다음 실행 시에는
+새로 추가된 실행 파일만 처리합니다.
+
+Discovers run files by pattern, updates partial aggregates (count, sum, sum of squares, min/max,
+reservoir sample) per (run, test, model) in a single pass, and persists them to a state file so
+that later invocations only process newly added runs.
+"""
+import argparse
+import glob
+import hashlib
 import json
-import statistics
-
-NUM_RUNS = 5
-MODEL_KEYS = ['haiku-4.5', 'qwen-3.2', 'nova-2-lite', 'llama-3.2-11b', 'ministral-8b']
-TEST_NAMES = ['Complex Reasoning', 'Advanced Code Generation', 'Multi-dimensional Analysis',
-              'Technical Translation', 'Technical Translation EN-KO']
-
-# 테스트명 → 품질평가 결과 파일 접두사 매핑
-# Test name → quality result file prefix mapping
-QUALITY_FILE_PREFIXES = {
-    'Complex Reasoning': 'complex_reasoning',
-    'Advanced Code Generation': 'advanced_code_generation',
-    'Multi-dimensional Analysis': 'multi_dimensional_analysis',
-    'Technical Translation': 'technical_translation',
-    'Technical Translation EN-KO': 'technical_translation_en_ko',
-}
-
-def load_runs():
-    runs = []
-    for i in range(1, NUM_RUNS + 1):
-        with open(f'comparison_results_run{i}.json') as f:
-            runs.append(json.load(f))
-    return runs
-
-def load_quality_runs():
-    """모든 테스트의 품질평가 결과를 로드합니다.
-    Returns: {test_name: [run1_data, run2_data, ...]}"""
-    quality_runs = {}
-    for test_name, prefix in QUALITY_FILE_PREFIXES.items():
-        runs = []
-        for i in range(1, NUM_RUNS + 1):
-            with open(f'{prefix}_results_run{i}.json') as f:
-                runs.append(json.load(f))
-        quality_runs[test_name] = runs
-    return quality_runs
-
-def aggregate_quality_for_test(quality_runs_for_test):
-    """단일 테스트의 품질평가 결과를 모델별로 집계합니다."""
-    quality_agg = {}
-    for mk in MODEL_KEYS:
-        accuracies = []
-        specificities = []
-        structures = []
-        practicalities = []
-        comments = []
-        for qr in quality_runs_for_test:
-            if mk in qr['models'] and 'quality_evaluation' in qr['models'][mk]:
-                qe = qr['models'][mk]['quality_evaluation']
-                if 'accuracy' not in qe:
-                    continue
-                accuracies.append(qe['accuracy'])
-                specificities.append(qe['specificity'])
-                structures.append(qe['structure'])
-                practicalities.append(qe['practicality'])
-                comments.append(qe.get('comment', ''))
-        if accuracies:
-            quality_agg[mk] = {
-                'avg_accuracy': round(statistics.mean(accuracies), 1),
-                'avg_specificity': round(statistics.mean(specificities), 1),
-                'avg_structure': round(statistics.mean(structures), 1),
-                'avg_practicality': round(statistics.mean(practicalities), 1),
-                'avg_total': round(statistics.mean([
-                    statistics.mean([a, s, st, p])
-                    for a, s, st, p in zip(accuracies, specificities, structures, practicalities)
-                ]), 1),
-                'scores_per_run': [
-                    {'accuracy': a, 'specificity': s, 'structure': st, 'practicality': p,
-                     'avg': round((a + s + st + p) / 4, 1)}
-                    for a, s, st, p in zip(accuracies, specificities, structures, practicalities)
-                ],
-                'comments': comments,
-            }
-    return quality_agg
+import math
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from ranking_stats import latency_percentiles, ranking_statistics
+
+RUN_FILE_PATTERN = 'comparison_results_run*.json'
+STATE_FILE = 'aggregate_state.json'
+STATE_VERSION = 5
+# 이 개수 이상의 새 실행 파일은 프로세스 풀로 병렬 로드 / Load this many new runs or more in a process pool
+PARALLEL_LOAD_MIN_RUNS = 8
+# 누적기별 표본 저장소 크기 / Per-accumulator reservoir sample size
+RESERVOIR_SIZE = 1024
+MAX_TOKENS_LIMIT = 4096
+
+QUALITY_CRITERIA = ('accuracy', 'specificity', 'structure', 'practicality')
+
+class Accumulator:
+    """개수·합·제곱합·최소·최대와 고정 크기 표본 저장소를 유지하는 누적기.
+    Running count/sum/sum-of-squares/min/max with a fixed-size reservoir sample."""
+
+    __slots__ = ('count', 'total', 'sumsq', 'minimum', 'maximum', 'sample')
+
+    def __init__(self, count=0, total=0.0, sumsq=0.0, minimum=None, maximum=None, sample=None):
+        self.count = count
+        self.total = total
+        self.sumsq = sumsq
+        self.minimum = minimum
+        self.maximum = maximum
+        self.sample = sample if sample is not None else []
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.sumsq += value * value
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+        if len(self.sample) < RESERVOIR_SIZE:
+            self.sample.append(value)
+        else:
+            # 결정적 저장소 샘플링: 같은 순번은 모든 누적기에서 같은 슬롯으로 교체되어 실행 간 짝이 유지됨
+            # Deterministic reservoir sampling: a given position maps to the same slot in every
+            # accumulator, so samples stay paired by run across models
+            slot = int(hashlib.sha256(str(self.count).encode()).hexdigest(), 16) % self.count
+            if slot < RESERVOIR_SIZE:
+                self.sample[slot] = value
+
+    @property
+    def mean(self):
+        return self.total / self.count
+
+    @property
+    def stdev(self):
+        if self.count < 2:
+            return 0
+        var = (self.sumsq - self.count * self.mean * self.mean) / (self.count - 1)
+        return math.sqrt(max(var, 0.0))
+
+    def to_dict(self):
+        return {'count': self.count, 'sum': self.total, 'sumsq': self.sumsq,
+                'min': self.minimum, 'max': self.maximum, 'sample': self.sample}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['count'], d['sum'], d['sumsq'], d['min'], d['max'], d['sample'])
 
-def aggregate():
-    runs = load_runs()
-    all_quality_runs = load_quality_runs()
+def quality_prefix(test_name):
+    """테스트명 → 품질평가 결과 파일 접두사 (bedrock_model_comparison.py와 동일 규칙)."""
+    return test_name.lower().replace(' ', '_').replace('-', '_')
+
+def discover_runs(pattern=RUN_FILE_PATTERN):
+    """패턴에 맞는 실행 파일을 실행 번호 순으로 반환합니다."""
+    def run_number(path):
+        match = re.search(r'run(\d+)', os.path.basename(path))
+        return (int(match.group(1)) if match else math.inf, path)
+    return sorted(glob.glob(pattern), key=run_number)
+
+def load_run(path):
+    """실행 파일 하나와 대응하는 품질평가 파일들을 읽어 집계에 필요한 값만 추출합니다.
+    프로세스 풀에서 호출되므로 작은 튜플 목록만 반환합니다."""
+    with open(path) as f:
+        run = json.load(f)
+    match = re.search(r'(_run\d+)\.json$', path)
+    suffix = match.group(1) if match else ''
+
+    rows = []
+    failures = []
+    quality = []
+    region_rows = []
+    # 실행의 리전 (멀티 리전 실행은 테스트별 regions 항목 사용) / Run region (multi-region runs carry per-test regions)
+    run_regions = run['meta'].get('regions') or [run['meta'].get('region', 'us-east-1')]
+    for t in run['tests']:
+        test_name = t['test_name']
+        for region, results in (t.get('regions') or {run_regions[0]: t['results']}).items():
+            for mk, r in results.items():
+                region_rows.append((mk, region, r.get('latency_s'), r.get('output_tokens'), r.get('warm', True),
+                                    r.get('server_latency_s'), r.get('overhead_s')))
+        for mk, r in t['results'].items():
+            # 실패한 호출은 지표 없이 재시도 횟수만 집계 / Failed calls only contribute retry counts
+            if 'latency_s' not in r:
+                failures.append((test_name, mk, r.get('retries', 0)))
+                continue
+            rows.append((test_name, mk, r['latency_s'], r['input_tokens'], r['output_tokens'],
+                         r['cost_usd'], r['response_chars'], r.get('ttft_s'), r.get('itl_p50_ms'),
+                         r.get('itl_p99_ms'), r.get('decode_tokens_per_s'), r.get('retries', 0),
+                         r.get('warm', True), r.get('server_latency_s'), r.get('overhead_s')))
+
+        quality_path = os.path.join(os.path.dirname(path), f'{quality_prefix(test_name)}_results{suffix}.json')
+        if not os.path.exists(quality_path):
+            continue
+        with open(quality_path) as f:
+            qr = json.load(f)
+        for mk, m in qr['models'].items():
+            qe = m.get('quality_evaluation', {})
+            if 'accuracy' in qe:
+                quality.append((test_name, mk, *(qe[c] for c in QUALITY_CRITERIA), qe.get('comment', '')))
+
+    models = {mk: m['name'] for mk, m in run['models'].items()}
+    return {'path': path, 'mtime': os.path.getmtime(path), 'models': models, 'rows': rows,
+            'failures': failures, 'quality': quality, 'region_rows': region_rows}
+
+def load_runs(paths):
+    """실행 파일들을 로드합니다 (많으면 프로세스 병렬)."""
+    if len(paths) >= PARALLEL_LOAD_MIN_RUNS:
+        with ProcessPoolExecutor() as executor:
+            return list(executor.map(load_run, paths))
+    return [load_run(p) for p in paths]
+
+def new_state():
+    return {'version': STATE_VERSION, 'runs': {}, 'models': {}, 'cells': {}, 'overall': {}, 'quality': {},
+            'regions': {}}
+
+def load_state(path, run_paths):
+    """저장된 부분 집계를 읽습니다. 처리했던 파일이 사라지거나 수정되었으면 처음부터 다시 집계합니다."""
+    if not os.path.exists(path):
+        return new_state()
+    with open(path) as f:
+        state = json.load(f)
+    current = set(run_paths)
+    if state.get('version') != STATE_VERSION or any(
+            p not in current or os.path.getmtime(p) != mtime for p, mtime in state['runs'].items()):
+        print(f"State file {path} is stale; rebuilding from all runs")
+        return new_state()
+    return state
+
+def _acc(table, *keys):
+    """중첩 dict에서 누적기를 찾거나 생성합니다 (JSON 상태의 dict를 Accumulator로 변환)."""
+    *path, last = keys
+    for k in path:
+        table = table.setdefault(k, {})
+    value = table.get(last)
+    if value is None:
+        value = table[last] = Accumulator()
+    elif isinstance(value, dict):
+        value = table[last] = Accumulator.from_dict(value)
+    return value
+
+def update_state(state, loaded):
+    """새 실행 하나의 값을 한 번의 순회로 모든 부분 집계에 반영합니다."""
+    state['models'].update(loaded['models'])
+    cells = state['cells']
+    run_latency = {}
+    run_warm_latency = {}
+    run_cost = {}
+    run_tokens = {}
+    for (test_name, mk, latency, in_tok, out_tok, cost, chars,
+         ttft, itl_p50, itl_p99, decode_tps, retries, warm, server_latency, overhead) in loaded['rows']:
+        _acc(cells, test_name, mk, 'latency').add(latency)
+        _acc(cells, test_name, mk, 'input_tokens').add(in_tok)
+        _acc(cells, test_name, mk, 'output_tokens').add(out_tok)
+        _acc(cells, test_name, mk, 'cost').add(cost)
+        _acc(cells, test_name, mk, 'chars').add(chars)
+        _acc(cells, test_name, mk, 'hit_limit').add(1 if out_tok >= MAX_TOKENS_LIMIT else 0)
+        # 재생·스텁 실행은 latency가 0으로 반올림될 수 있으므로 처리량에서 제외
+        # Replayed or stub runs can round latency down to 0, so such calls are left out of throughput
+        if latency > 0:
+            _acc(cells, test_name, mk, 'throughput').add(out_tok / latency)
+            _acc(state['overall'], mk, 'throughput').add(out_tok / latency)
+        _acc(state['overall'], mk, 'latency').add(latency)
+        # 정상 상태(warm) 표본은 따로 집계 / Steady-state (warm) samples are aggregated separately
+        if warm:
+            _acc(cells, test_name, mk, 'latency_warm').add(latency)
+            _acc(state['overall'], mk, 'latency_warm').add(latency)
+            run_warm_latency.setdefault(mk, []).append(latency)
+        else:
+            _acc(state['overall'], mk, 'cold').add(latency)
+        # 스트리밍 실행 시에만 존재하는 지표 / Metrics present only for streaming runs
+        for name, value in (('ttft', ttft), ('itl_p50_ms', itl_p50), ('itl_p99_ms', itl_p99),
+                            ('decode_tps', decode_tps)):
+            if value is not None:
+                _acc(cells, test_name, mk, name).add(value)
+        if ttft is not None:
+            _acc(state['overall'], mk, 'ttft').add(ttft)
+        if decode_tps is not None:
+            _acc(state['overall'], mk, 'decode_tps').add(decode_tps)
+        # Converse 실행 시에만 존재하는 서버 측 지연 / Server-side latency present only for Converse runs
+        if server_latency is not None:
+            _acc(cells, test_name, mk, 'server_latency').add(server_latency)
+            _acc(cells, test_name, mk, 'overhead').add(overhead)
+            _acc(state['overall'], mk, 'server_latency').add(server_latency)
+            _acc(state['overall'], mk, 'overhead').add(overhead)
+        # 재시도는 latency와 분리해 횟수만 집계 / Retries are counted apart from latency
+        _acc(state['overall'], mk, 'retries').add(retries)
+        run_latency.setdefault(mk, []).append(latency)
+        run_cost[mk] = run_cost.get(mk, 0) + cost
+        run_tokens.setdefault(mk, []).append(in_tok + out_tok)
+
+    for test_name, mk, retries in loaded['failures']:
+        _acc(state['overall'], mk, 'failures').add(1)
+        _acc(state['overall'], mk, 'retries').add(retries)
+
+    # 실행 단위 값 (실행별 평균 latency, 총 비용, 평균 토큰) / Per-run values
+    for mk, latencies in run_latency.items():
+        _acc(state['overall'], mk, 'run_latency').add(sum(latencies) / len(latencies))
+        _acc(state['overall'], mk, 'run_cost').add(run_cost[mk])
+        _acc(state['overall'], mk, 'run_tokens').add(sum(run_tokens[mk]) / len(run_tokens[mk]))
+    for mk, latencies in run_warm_latency.items():
+        _acc(state['overall'], mk, 'run_latency_warm').add(sum(latencies) / len(latencies))
+
+    # (모델, 리전)별 latency·처리량 / Latency and throughput per (model, region)
+    for mk, region, latency, out_tok, warm, server_latency, overhead in loaded['region_rows']:
+        if latency is None:
+            _acc(state['regions'], mk, region, 'failures').add(1)
+            continue
+        _acc(state['regions'], mk, region, 'latency').add(latency)
+        if warm:
+            _acc(state['regions'], mk, region, 'latency_warm').add(latency)
+        if latency > 0:
+            _acc(state['regions'], mk, region, 'throughput').add(out_tok / latency)
+        if server_latency is not None:
+            _acc(state['regions'], mk, region, 'server_latency').add(server_latency)
+            _acc(state['regions'], mk, region, 'overhead').add(overhead)
+
+    for test_name, mk, *scores, comment in loaded['quality']:
+        q = state['quality'].setdefault(test_name, {}).setdefault(mk, {'scores_per_run': [], 'comments': []})
+        for c, score in zip(QUALITY_CRITERIA, scores):
+            _acc(q, c).add(score)
+        _acc(q, 'total').add(sum(scores) / len(scores))
+        q['scores_per_run'].append({**dict(zip(QUALITY_CRITERIA, scores)),
+                                    'avg': round(sum(scores) / len(scores), 1)})
+        q['comments'].append(comment)
+
+    state['runs'][loaded['path']] = loaded['mtime']
+
+def save_state(state, path):
+    def encode(value):
+        if isinstance(value, Accumulator):
+            return value.to_dict()
+        raise TypeError(type(value))
+    with open(path, 'w') as f:
+        json.dump(state, f, ensure_ascii=False, default=encode)
+
+def summarize(state):
+    """부분 집계로부터 aggregated_results.json 구조를 만듭니다."""
+    def acc(d):
+        return d if isinstance(d, Accumulator) else Accumulator.from_dict(d)
 
-    # Per-test, per-model aggregation
     test_agg = {}
-    for test_name in TEST_NAMES:
+    throughput = {}
+    for test_name, models in state['cells'].items():
         test_agg[test_name] = {}
-        for mk in MODEL_KEYS:
-            latencies = []
-            input_tokens_list = []
-            output_tokens_list = []
-            costs = []
-            chars_list = []
-            for run in runs:
-                for t in run['tests']:
-                    if t['test_name'] == test_name:
-                        r = t['results'][mk]
-                        latencies.append(r['latency_s'])
-                        input_tokens_list.append(r['input_tokens'])
-                        output_tokens_list.append(r['output_tokens'])
-                        costs.append(r['cost_usd'])
-                        chars_list.append(r['response_chars'])
-            test_agg[test_name][mk] = {
-                'avg_latency': round(statistics.mean(latencies), 2),
-                'min_latency': round(min(latencies), 2),
-                'max_latency': round(max(latencies), 2),
-                'stdev_latency': round(statistics.stdev(latencies), 2) if len(latencies) > 1 else 0,
-                'avg_input_tokens': round(statistics.mean(input_tokens_list)),
-                'avg_output_tokens': round(statistics.mean(output_tokens_list)),
-                'avg_cost': round(statistics.mean(costs), 6),
-                'avg_chars': round(statistics.mean(chars_list)),
-                'hit_limit_count': sum(1 for ot in output_tokens_list if ot >= 4096),
+        for mk, cell in models.items():
+            latency = acc(cell['latency'])
+            entry = {
+                'avg_latency': round(latency.mean, 2),
+                'min_latency': round(latency.minimum, 2),
+                'max_latency': round(latency.maximum, 2),
+                'stdev_latency': round(latency.stdev, 2),
+                'avg_input_tokens': round(acc(cell['input_tokens']).mean),
+                'avg_output_tokens': round(acc(cell['output_tokens']).mean),
+                'avg_cost': round(acc(cell['cost']).mean, 6),
+                'avg_chars': round(acc(cell['chars']).mean),
+                'hit_limit_count': int(acc(cell['hit_limit']).total),
+                'latency_percentiles': latency_percentiles(latency.sample),
             }
+            if 'latency_warm' in cell and acc(cell['latency_warm']).count < latency.count:
+                entry['avg_latency_warm'] = round(acc(cell['latency_warm']).mean, 2)
+            if 'ttft' in cell:
+                ttft = acc(cell['ttft'])
+                entry.update({
+                    'avg_ttft': round(ttft.mean, 3),
+                    'stdev_ttft': round(ttft.stdev, 3),
+                    'avg_itl_p50_ms': round(acc(cell['itl_p50_ms']).mean, 1) if 'itl_p50_ms' in cell else None,
+                    'avg_itl_p99_ms': round(acc(cell['itl_p99_ms']).mean, 1) if 'itl_p99_ms' in cell else None,
+                    'avg_decode_tps': round(acc(cell['decode_tps']).mean, 1) if 'decode_tps' in cell else None,
+                })
+            if 'server_latency' in cell:
+                entry['avg_server_latency'] = round(acc(cell['server_latency']).mean, 3)
+                entry['avg_overhead'] = round(acc(cell['overhead']).mean, 3)
+            test_agg[test_name][mk] = entry
+            if 'throughput' in cell:
+                throughput.setdefault(mk, {})[test_name] = round(acc(cell['throughput']).mean, 1)
+    for mk, tests in throughput.items():
+        tests['average'] = round(sum(tests.values()) / len(tests), 1)
 
-    # Overall per-model aggregation
-    overall = {}
-    for mk in MODEL_KEYS:
-        all_latencies = []
-        total_costs = []
-        all_tokens = []
-        for run in runs:
-            run_total_cost = 0
-            run_latencies = []
-            run_tokens = []
-            for t in run['tests']:
-                r = t['results'][mk]
-                run_latencies.append(r['latency_s'])
-                run_total_cost += r['cost_usd']
-                run_tokens.append(r['input_tokens'] + r['output_tokens'])
-            all_latencies.append(statistics.mean(run_latencies))
-            total_costs.append(run_total_cost)
-            all_tokens.append(statistics.mean(run_tokens))
+    # 순위 통계는 누적기의 표본 저장소로 계산하며, latency는 warm 표본이 있으면 warm 기준
+    # Ranking statistics come from the reservoir samples; latency uses warm samples when present
+    def steady(o, name):
+        return acc(o[f'{name}_warm']).sample if f'{name}_warm' in o else acc(o[name]).sample
+    ranking, speed_pairwise = ranking_statistics({
+        mk: {'latency': steady(o, 'latency'), 'run_latency': steady(o, 'run_latency'),
+             'run_cost': acc(o['run_cost']).sample,
+             'throughput': acc(o['throughput']).sample if 'throughput' in o else []}
+        for mk, o in state['overall'].items() if 'run_latency' in o
+    })
 
+    overall = {}
+    for mk, o in state['overall'].items():
+        if 'run_latency' not in o:
+            continue
+        run_latency = acc(o['run_latency'])
+        run_cost = acc(o['run_cost'])
         overall[mk] = {
-            'avg_latency': round(statistics.mean(all_latencies), 2),
-            'stdev_latency': round(statistics.stdev(all_latencies), 2) if len(all_latencies) > 1 else 0,
-            'avg_total_cost': round(statistics.mean(total_costs), 6),
-            'min_total_cost': round(min(total_costs), 6),
-            'max_total_cost': round(max(total_costs), 6),
-            'avg_tokens': round(statistics.mean(all_tokens)),
+            'avg_latency': round(run_latency.mean, 2),
+            'stdev_latency': round(run_latency.stdev, 2),
+            'avg_total_cost': round(run_cost.mean, 6),
+            'min_total_cost': round(run_cost.minimum, 6),
+            'max_total_cost': round(run_cost.maximum, 6),
+            'avg_tokens': round(acc(o['run_tokens']).mean),
+            **ranking[mk],
         }
+        if 'ttft' in o:
+            overall[mk]['avg_ttft'] = round(acc(o['ttft']).mean, 3)
+            overall[mk]['stdev_ttft'] = round(acc(o['ttft']).stdev, 3)
+        if 'decode_tps' in o:
+            overall[mk]['avg_decode_tps'] = round(acc(o['decode_tps']).mean, 1)
+        if 'server_latency' in o:
+            overall[mk]['avg_server_latency'] = round(acc(o['server_latency']).mean, 3)
+            overall[mk]['avg_overhead'] = round(acc(o['overhead']).mean, 3)
+        if 'cold' in o:
+            # cold 표본이 있을 때만 warm 평균을 별도 표기 / Warm mean reported only when cold samples exist
+            overall[mk]['cold_samples'] = acc(o['cold']).count
+            overall[mk]['avg_cold_latency'] = round(acc(o['cold']).mean, 2)
+            if 'run_latency_warm' in o:
+                overall[mk]['avg_latency_warm'] = round(acc(o['run_latency_warm']).mean, 2)
+                overall[mk]['stdev_latency_warm'] = round(acc(o['run_latency_warm']).stdev, 2)
+        if 'retries' in o and acc(o['retries']).total:
+            overall[mk]['total_retries'] = int(acc(o['retries']).total)
+        if 'failures' in o:
+            overall[mk]['failed_calls'] = acc(o['failures']).count
 
-    # Quality evaluation aggregation — 전체 테스트
     quality_per_test = {}
-    for test_name in TEST_NAMES:
-        quality_per_test[test_name] = aggregate_quality_for_test(all_quality_runs[test_name])
-
-    # Throughput calculation (output tokens / latency)
-    throughput = {}
-    for mk in MODEL_KEYS:
-        test_throughputs = {}
-        for test_name in TEST_NAMES:
-            tp_list = []
-            for run in runs:
-                for t in run['tests']:
-                    if t['test_name'] == test_name:
-                        r = t['results'][mk]
-                        tp_list.append(r['output_tokens'] / r['latency_s'])
-            test_throughputs[test_name] = round(statistics.mean(tp_list), 1)
-        avg_tp = round(statistics.mean(list(test_throughputs.values())), 1)
-        throughput[mk] = {**test_throughputs, 'average': avg_tp}
+    for test_name, models in state['quality'].items():
+        quality_per_test[test_name] = {}
+        for mk, q in models.items():
+            quality_per_test[test_name][mk] = {
+                'avg_accuracy': round(acc(q['accuracy']).mean, 1),
+                'avg_specificity': round(acc(q['specificity']).mean, 1),
+                'avg_structure': round(acc(q['structure']).mean, 1),
+                'avg_practicality': round(acc(q['practicality']).mean, 1),
+                'avg_total': round(acc(q['total']).mean, 1),
+                'scores_per_run': q['scores_per_run'],
+                'comments': q['comments'],
+            }
 
     result = {
-        'num_runs': NUM_RUNS,
+        'num_runs': len(state['runs']),
         'overall': overall,
         'quality_per_test': quality_per_test,
         'throughput': throughput,
         'per_test': test_agg,
+        'speed_pairwise': speed_pairwise,
     }
+    # 리전이 둘 이상일 때만 (모델 × 리전) 행렬과 모델별 최적 리전 추가
+    # The (model x region) matrix and best region per model are added only when there are several regions
+    if any(len(regions) > 1 for regions in state['regions'].values()):
+        result['region_matrix'] = region_matrix(state['regions'])
+        result['best_region'] = {mk: row['best_region'] for mk, row in result['region_matrix'].items()
+                                 if 'best_region' in row}
+    return result
+
+def region_matrix(regions_state):
+    """(모델, 리전)별 누적기로 지연·처리량 행렬을 만듭니다. 최적 리전은 warm 평균 latency가 가장 낮은 리전입니다.
+    Builds the latency/throughput matrix from per-(model, region) accumulators; the best region has the
+    lowest warm mean latency."""
+    def acc(d):
+        return d if isinstance(d, Accumulator) else Accumulator.from_dict(d)
+
+    matrix = {}
+    for mk, regions in regions_state.items():
+        row = {}
+        for region, cell in sorted(regions.items()):
+            entry = {'samples': acc(cell['latency']).count if 'latency' in cell else 0,
+                     'failures': acc(cell['failures']).count if 'failures' in cell else 0}
+            if 'latency' in cell:
+                latency = acc(cell['latency'])
+                steady = acc(cell['latency_warm']) if 'latency_warm' in cell else latency
+                entry.update({
+                    'avg_latency': round(latency.mean, 3),
+                    'avg_latency_warm': round(steady.mean, 3),
+                    'stdev_latency_warm': round(steady.stdev, 3),
+                    'latency_percentiles': latency_percentiles(steady.sample),
+                    'avg_throughput': round(acc(cell['throughput']).mean, 1) if 'throughput' in cell else None,
+                })
+                if 'server_latency' in cell:
+                    entry['avg_server_latency'] = round(acc(cell['server_latency']).mean, 3)
+                    entry['avg_overhead'] = round(acc(cell['overhead']).mean, 3)
+            row[region] = entry
+        ranked = sorted((r for r in row if 'avg_latency_warm' in row[r]), key=lambda r: row[r]['avg_latency_warm'])
+        matrix[mk] = {'by_region': row}
+        if ranked:
+            matrix[mk]['best_region'] = ranked[0]
+    return matrix
+
+def aggregate(pattern=RUN_FILE_PATTERN, state_path=STATE_FILE, rebuild=False):
+    run_paths = discover_runs(pattern)
+    if not run_paths:
+        raise SystemExit(f"No run files match {pattern}")
+    state = new_state() if rebuild else load_state(state_path, run_paths)
+    new_paths = [p for p in run_paths if p not in state['runs']]
+    print(f"Runs: {len(run_paths)} found, {len(new_paths)} new")
+
+    for loaded in load_runs(new_paths):
+        update_state(state, loaded)
+    if new_paths:
+        save_state(state, state_path)
+
+    result = summarize(state)
+
+    with open('aggregated_results.json', 'w') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+
+    print_report(result, state['models'])
+    return result
+
+def aggregate_from_store(path):
+    """컬럼형 결과 저장소(results_store.py)의 모든 실행을 NumPy 벡터 연산으로 집계합니다.
+    Aggregates every run in the columnar results store with NumPy vector operations."""
+    from results_store import ResultsStore, aggregate_store
+
+    store = ResultsStore(path)
+    try:
+        result = aggregate_store(store)
+        model_names = store.model_names()
+    finally:
+        store.close()
 
     with open('aggregated_results.json', 'w') as f:
         json.dump(result, f, indent=2, ensure_ascii=False)
 
-    # Print summary
+    print_report(result, model_names)
+    return result
+
+def print_report(result, model_names):
+    """집계 결과의 순위와 테스트별 상세를 출력합니다."""
+    num_runs = result['num_runs']
+    overall = result['overall']
+    quality_per_test = result['quality_per_test']
+    throughput = result['throughput']
+    test_agg = result['per_test']
+    test_names = list(test_agg)
+
     print("=" * 70)
-    print(f"AGGREGATED RESULTS ({NUM_RUNS} RUNS)")
+    print(f"AGGREGATED RESULTS ({num_runs} RUNS)")
     print("=" * 70)
 
-    print("\n### Overall Average (5 runs)")
-    sorted_by_latency = sorted(overall.items(), key=lambda x: x[1]['avg_latency'])
+    print(f"\n### Overall Average ({num_runs} runs)")
+    # 정상 상태(warm) latency 기준 순위 / Rank on steady-state (warm) latency
+    def steady_latency(v):
+        return v.get('avg_latency_warm', v['avg_latency'])
+    sorted_by_latency = sorted(overall.items(), key=lambda x: steady_latency(x[1]))
     print("\nSpeed Ranking:")
+    pairwise = result.get('speed_pairwise', {})
     for i, (mk, v) in enumerate(sorted_by_latency, 1):
-        model_name = runs[0]['models'][mk]['name']
-        print(f"  {i}. {model_name:20s} | Avg: {v['avg_latency']:.2f}s (±{v['stdev_latency']:.2f}s) | Tokens: {v['avg_tokens']}")
+        model_name = model_names.get(mk, mk)
+        ci_str = ""
+        if 'avg_latency_warm' in v:
+            ci_str += f" | Warm: {v['avg_latency_warm']:.2f}s, cold: {v['avg_cold_latency']:.2f}s ({v['cold_samples']})"
+        if 'latency_ci95' in v:
+            lo, hi = v['latency_ci95']
+            pct = v['latency_percentiles']
+            ci_str += f" | 95% CI: {lo:.2f}-{hi:.2f}s | p50 {pct['p50']:.2f}s p99 {pct['p99']:.2f}s"
+        if 'avg_server_latency' in v:
+            ci_str += f" | Server: {v['avg_server_latency']:.2f}s + overhead {v['avg_overhead']:.2f}s"
+        # 다음 순위 모델보다 빠를 확률 / Probability of beating the next-ranked model
+        if i < len(sorted_by_latency) and mk in pairwise:
+            next_mk = sorted_by_latency[i][0]
+            ci_str += f" | P(faster than #{i + 1}): {pairwise[mk][next_mk]:.2f}"
+        print(f"  {i}. {model_name:20s} | Avg: {v['avg_latency']:.2f}s (±{v['stdev_latency']:.2f}s) | Tokens: {v['avg_tokens']}{ci_str}")
+
+    streamed = {mk: v for mk, v in overall.items() if 'avg_ttft' in v}
+    if streamed:
+        print("\nTTFT Ranking (streaming):")
+        for i, (mk, v) in enumerate(sorted(streamed.items(), key=lambda x: x[1]['avg_ttft']), 1):
+            model_name = model_names.get(mk, mk)
+            decode_str = f" | Decode: {v['avg_decode_tps']:.1f} tok/s" if 'avg_decode_tps' in v else ""
+            print(f"  {i}. {model_name:20s} | TTFT: {v['avg_ttft']:.3f}s (±{v['stdev_ttft']:.3f}s){decode_str}")
 
     sorted_by_cost = sorted(overall.items(), key=lambda x: x[1]['avg_total_cost'])
     print("\nCost Ranking:")
     for i, (mk, v) in enumerate(sorted_by_cost, 1):
-        model_name = runs[0]['models'][mk]['name']
+        model_name = model_names.get(mk, mk)
         print(f"  {i}. {model_name:20s} | Avg: ${v['avg_total_cost']:.6f} (min: ${v['min_total_cost']:.6f}, max: ${v['max_total_cost']:.6f})")
 
     # 전체 테스트 품질 순위 출력
-    for test_name in TEST_NAMES:
-        qa = quality_per_test[test_name]
+    for test_name in test_names:
+        qa = quality_per_test.get(test_name)
         if not qa:
             continue
         print(f"\nQuality Ranking ({test_name}):")
         sorted_by_quality = sorted(qa.items(), key=lambda x: x[1]['avg_total'], reverse=True)
         for i, (mk, v) in enumerate(sorted_by_quality, 1):
-            model_name = runs[0]['models'][mk]['name']
+            model_name = model_names.get(mk, mk)
             scores = v['scores_per_run']
             score_str = ', '.join(f"{s['avg']}" for s in scores)
             print(f"  {i}. {model_name:20s} | Avg: {v['avg_total']:.1f} | 정확: {v['avg_accuracy']:.1f} 구체: {v['avg_specificity']:.1f} 구조: {v['avg_structure']:.1f} 실용: {v['avg_practicality']:.1f} | Per-run: [{score_str}]")
@@ -203,17 +524,46 @@ def aggregate():
     print("\nThroughput (tok/s):")
     sorted_by_tp = sorted(throughput.items(), key=lambda x: x[1]['average'], reverse=True)
     for i, (mk, v) in enumerate(sorted_by_tp, 1):
-        model_name = runs[0]['models'][mk]['name']
+        model_name = model_names.get(mk, mk)
         print(f"  {i}. {model_name:20s} | Avg: {v['average']:.1f} tok/s")
 
+    matrix = result.get('region_matrix')
+    if matrix:
+        regions = sorted({r for row in matrix.values() for r in row['by_region']})
+        print("\nLatency by Region (warm avg s / tok/s):")
+        print(f"  {'':20s} | " + " | ".join(f"{r:>16s}" for r in regions) + " | Best")
+        for mk, row in sorted(matrix.items(), key=lambda x: model_names.get(x[0], x[0])):
+            cells = []
+            for r in regions:
+                v = row['by_region'].get(r, {})
+                if 'avg_latency_warm' not in v:
+                    cells.append(f"{'-':>16s}")
+                    continue
+                tps = f"{v['avg_throughput']:6.1f}" if v['avg_throughput'] is not None else f"{'-':>6s}"
+                cells.append(f"{v['avg_latency_warm']:7.2f} / {tps}")
+            print(f"  {model_names.get(mk, mk):20s} | " + " | ".join(cells) + f" | {row.get('best_region', '-')}")
+
     print("\n### Per-Test Details")
-    for test_name in TEST_NAMES:
+    for test_name in test_names:
         print(f"\n{test_name}:")
         sorted_models = sorted(test_agg[test_name].items(), key=lambda x: x[1]['avg_latency'])
         for mk, v in sorted_models:
-            model_name = runs[0]['models'][mk]['name']
-            limit_str = f" [한도 도달 {v['hit_limit_count']}/{NUM_RUNS}회]" if v['hit_limit_count'] > 0 else ""
+            model_name = model_names.get(mk, mk)
+            limit_str = f" [한도 도달 {v['hit_limit_count']}/{num_runs}회]" if v['hit_limit_count'] > 0 else ""
             print(f"  {model_name:20s} | {v['avg_latency']:.2f}s (±{v['stdev_latency']:.2f}) | Out: {v['avg_output_tokens']} tok | ${v['avg_cost']:.6f} | {v['avg_chars']}자{limit_str}")
 
 if __name__ == '__main__':
-    aggregate()
+    parser = argparse.ArgumentParser(description='Aggregate benchmark runs')
+    parser.add_argument('--pattern', default=RUN_FILE_PATTERN,
+                        help='실행 결과 파일 glob 패턴 / Glob pattern for run result files')
+    parser.add_argument('--state', default=STATE_FILE,
+                        help='부분 집계 상태 파일 / Partial aggregate state file')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='상태 파일을 무시하고 전체 재집계 / Ignore the state file and recompute from all runs')
+    parser.add_argument('--store', metavar='PATH', default=None,
+                        help='JSON 파일 대신 컬럼형 결과 저장소에서 집계 / Aggregate from the columnar results store')
+    args = parser.parse_args()
+    if args.store:
+        aggregate_from_store(args.store)
+    else:
+        aggregate(args.pattern, args.state, args.rebuild)
@@ -10,11 +10,271 @@ Invokes 5 lightweight LLM models (Haiku, Qwen, Nova, Llama, Ministral) with iden
 prompts and compares response latency, token usage, and cost.
 """
 
+import argparse
 import boto3
 import json
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple, Union
+
+from botocore.config import Config
+
+from bedrock_recorder import RecordingClient, ReplayClient
+from call_hooks import CallHooks, PhaseTimer, dispatch
+from compact_results import BlobStore, CallRecord
+from eval_cache import EvaluationCache
+from metrics_exporter import attach_exporter
+from model_adapters import get_adapter
+from rate_limit import ModelRateLimiter, backoff_delay, is_throttle_exception
+from run_journal import RunJournal
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """
+    선형 보간 방식의 백분위수를 계산합니다 (값이 없으면 None).
+    Computes a linearly interpolated percentile (None for empty input).
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def latency_summary(values: List[float]) -> Dict:
+    """
+    latency 목록의 평균·백분위수 요약을 반환합니다 (초).
+    Returns mean/percentile summary of a latency list (seconds).
+    """
+    if not values:
+        return {}
+    return {
+        "mean_s": round(sum(values) / len(values), 3),
+        "p50_s": round(percentile(values, 50), 3),
+        "p90_s": round(percentile(values, 90), 3),
+        "p95_s": round(percentile(values, 95), 3),
+        "p99_s": round(percentile(values, 99), 3),
+        "max_s": round(max(values), 3)
+    }
+
+
+def stream_metrics(chunk_times: List[float], output_tokens: int) -> Dict:
+    """
+    텍스트 청크 도착 시각(요청 시작 기준, 초)으로 스트리밍 지표를 계산합니다. 청크 간 지연과 디코드 속도는
+    첫 토큰 이후 구간 기준입니다.
+    Computes the streaming metrics from text chunk arrival offsets (seconds since the request started).
+    Inter-chunk latency and decode speed are measured after the first token.
+    """
+    gaps = [b - a for a, b in zip(chunk_times, chunk_times[1:])]
+    decode_time = chunk_times[-1] - chunk_times[0] if len(chunk_times) > 1 else 0
+    return {
+        'streaming': True,
+        'ttft': chunk_times[0] if chunk_times else None,
+        'chunk_times': chunk_times,
+        'itl_p50': percentile(gaps, 50),
+        'itl_p90': percentile(gaps, 90),
+        'itl_p99': percentile(gaps, 99),
+        'decode_tps': (output_tokens - 1) / decode_time if decode_time > 0 and output_tokens > 1 else None
+    }
+
+
+# 리전 접두사 → 교차 리전 inference profile 지역 / Region prefix -> cross-region inference profile geography
+INFERENCE_PROFILE_GEOGRAPHIES = (('us-gov-', 'us-gov'), ('us-', 'us'), ('ca-', 'us'), ('eu-', 'eu'), ('ap-', 'apac'))
+
+
+def regional_model_id(model_id: str, region: str) -> str:
+    """
+    inference profile ID(us./eu./apac. 접두사)를 대상 리전의 지역 접두사로 바꿉니다. 기본 모델 ID는 그대로 둡니다.
+    Rewrites an inference profile ID (us./eu./apac. prefix) to the target region's geography;
+    plain model IDs are returned unchanged.
+    """
+    prefix, _, rest = model_id.partition('.')
+    if prefix not in {geo for _, geo in INFERENCE_PROFILE_GEOGRAPHIES}:
+        return model_id
+    for region_prefix, geo in INFERENCE_PROFILE_GEOGRAPHIES:
+        if region.startswith(region_prefix):
+            return f"{geo}.{rest}"
+    return model_id
+
+
+# 품질 평가(judge) 모델 및 채점 기준 / Quality judge model and scoring rubric
+JUDGE_MODEL_ID = 'us.anthropic.claude-opus-4-6-v1'
+JUDGE_CRITERIA = """- 정확성 (Accuracy): 사실 관계 및 기술적 정확성
+- 구체성 (Specificity): 구체적 예시, 수치, 구현 디테일 포함 정도
+- 구조화 (Structure): 논리적 구성, 가독성, 체계적 전개
+- 실용성 (Practicality): 실무에서 바로 적용 가능한 정도"""
+# judge 가격 (1M 토큰당 USD, 캐시 쓰기는 입력의 1.25배, 캐시 읽기는 0.1배)
+# Judge pricing (USD per 1M tokens; cache writes are 1.25x input, cache reads 0.1x)
+JUDGE_PRICING = {'input': 5.00, 'output': 25.00, 'cache_write': 6.25, 'cache_read': 0.50}
+# judge 모델(Opus)의 최소 캐시 길이 (토큰). 이보다 짧은 앞부분은 cache_control이 있어도 Bedrock이 캐시하지 않음
+# Judge model's (Opus) minimum cacheable length (tokens); Bedrock does not cache shorter prefixes even with
+# cache_control
+JUDGE_MIN_CACHE_TOKENS = 1024
+# 모든 평가에 공통인 점수 구간별 세부 기준. 채점 일관성을 높이고, 평가 프롬프트의 공통 앞부분이 내장 테스트에서도
+# judge의 최소 캐시 길이를 넘도록 합니다.
+# Per-band scoring rubric shared by every evaluation. It makes scoring more consistent and lets the shared
+# eval prefix of the built-in tests reach the judge's minimum cacheable length.
+JUDGE_RUBRIC = """## 채점 세부 기준
+각 기준은 서로 독립적으로 채점합니다. 한 기준의 약점이 다른 기준의 점수에 영향을 주지 않도록 하고, 응답 길이 자체는
+점수에 반영하지 않습니다. 길지만 요구 사항을 벗어난 응답보다 짧더라도 요구 사항을 정확히 충족한 응답을 높게 평가합니다.
+응답이 도중에 끊겼다면 끊긴 지점까지의 내용으로 채점하되, 빠진 부분은 구체성과 실용성에서 감점합니다.
+모델 이름이나 응답 순서는 채점에 영향을 주지 않아야 하며, 같은 수준의 응답에는 같은 점수를 줍니다.
+
+### 정확성 (Accuracy)
+- 9~10점: 사실 관계, 수치, 기술 용어, 코드 동작이 모두 정확합니다. 전제나 한계를 정확히 밝히고, 검증 가능한 주장만 합니다.
+- 7~8점: 핵심 내용은 정확하지만 사소한 부정확성(용어 혼용, 근사치 오류, 드문 예외 누락)이 한두 개 있습니다.
+- 5~6점: 대체로 맞지만 결론에 영향을 줄 수 있는 오류가 하나 있거나, 근거 없는 단정이 여러 곳에 있습니다.
+- 3~4점: 핵심 개념을 잘못 이해했거나, 코드가 주요 경우에 올바르게 동작하지 않거나, 번역이 원문의 의미를 바꿉니다.
+- 1~2점: 대부분이 틀렸거나 질문과 무관하며, 그대로 따르면 잘못된 결과로 이어집니다.
+
+### 구체성 (Specificity)
+- 9~10점: 구체적인 수치, 예시, 구성 요소 이름, 구현 디테일, 트레이드오프를 제시하며 프롬프트의 모든 요구 항목을 다룹니다.
+- 7~8점: 대부분의 요구 항목에 구체적인 내용이 있지만 일부 항목은 일반론에 머뭅니다.
+- 5~6점: 요구 항목을 나열하는 수준이며 수치, 예시, 구현 디테일이 부족합니다.
+- 3~4점: 요구 항목의 절반 이상을 빠뜨렸거나 교과서적인 설명만 반복합니다.
+- 1~2점: 구체적인 내용이 거의 없습니다.
+
+### 구조화 (Structure)
+- 9~10점: 요구 사항의 순서와 범위에 맞춘 논리적 구성으로, 제목·목록·표·코드 블록을 적절히 사용해 바로 읽고 찾을 수 있습니다.
+- 7~8점: 구성은 논리적이지만 일부 중복이 있거나 섹션 간 연결이 약합니다.
+- 5~6점: 정보는 있으나 순서가 뒤섞여 있어 독자가 재구성해야 합니다.
+- 3~4점: 구성이 거의 없고 서로 다른 주제가 섞여 있습니다.
+- 1~2점: 읽기 어려운 나열이거나 형식이 깨져 있습니다.
+
+### 실용성 (Practicality)
+- 9~10점: 실무자가 그대로 적용하거나 실행할 수 있으며, 운영 시 주의점, 실패 사례, 대안을 함께 제시합니다.
+- 7~8점: 적용 가능하지만 운영 환경의 제약(비용, 규모, 장애 대응) 일부를 고려하지 않았습니다.
+- 5~6점: 방향은 맞지만 실제로 적용하려면 상당한 추가 조사나 설계가 필요합니다.
+- 3~4점: 현실적인 제약을 무시해 그대로 적용하기 어렵습니다.
+- 1~2점: 실무에 쓸 수 없습니다.
+
+### 과제 유형별 참고 사항
+- 설계·추론 과제: 요구된 설계 결정마다 근거와 트레이드오프를 제시했는지, 규모·지연·비용 같은 제약을 수치로 다뤘는지 봅니다.
+- 코드 생성 과제: 코드가 문법적으로 완결되어 실행 가능한지, 요구된 시간 복잡도와 동시성 요구를 지키는지, 타입 힌트·문서화·테스트 등
+  요청된 부수 요소를 포함했는지 봅니다. 설명만 있고 코드가 불완전하면 정확성과 실용성에서 감점합니다.
+- 분석 과제: 요구된 관점을 빠짐없이 다뤘는지, 정량적 근거와 위험 요인을 제시했는지, 결론이 분석에서 도출되는지 봅니다.
+- 번역 과제: 원문의 의미를 빠짐없이 옮겼는지, 기술 용어를 업계 관례에 맞게 번역하거나 원어를 병기했는지, 대상 언어에서 자연스러운
+  문체인지 봅니다. 원문에 없는 내용을 덧붙였거나 일부를 생략했다면 정확성에서 감점합니다.
+
+### 점수 보정
+- 7점은 실무자가 약간의 수정만으로 참고할 수 있는 수준, 5점은 방향은 맞지만 그대로 쓰기 어려운 수준을 기준으로 삼습니다.
+- 9점 이상은 해당 기준에서 뚜렷한 약점을 찾을 수 없을 때만 주고, 10점은 전문가가 작성한 모범 답안과 견줄 수 있을 때만 줍니다.
+- 점수는 정수로만 매기며, 확신이 없을 때는 두 구간 중 낮은 쪽을 택합니다.
+
+### 코멘트 작성
+코멘트는 한 문장으로, 점수에 가장 큰 영향을 준 강점 하나와 약점 하나를 구체적으로 언급합니다."""
+
+
+# 테스트 케이스 정의 / Define test cases
+# 1. Complex Reasoning        - 복합 추론 (아키텍처 설계)
+# 2. Advanced Code Gen        - 고급 코드 생성 (LRU 캐시)
+# 3. Multi-dim Analysis       - 다각도 분석 (B2B 전환)
+# 4. Technical Translation    - 기술 번역 (한→영)
+# 5. Technical Translation EN-KO - 기술 번역 (영→한)
+TEST_CASES = [
+    {
+        'name': 'Complex Reasoning',
+        'prompt': '''다음 상황을 분석하고 해결책을 제시해주세요:
+
+한 글로벌 기업이 3개 대륙(아시아, 유럽, 북미)에 분산된 팀으로 실시간 협업 플랫폼을 구축하려 합니다.
+- 각 지역마다 데이터 주권 법규가 다름
+- 평균 동시 접속자 50만명, 피크 시간대 200만명
+- 99.99% 가용성 요구사항
+- 레이턴시는 100ms 이하 유지 필요
+- 기존 레거시 시스템 3개와 통합 필요
+
+아키텍처 설계 시 고려해야 할 핵심 요소들을 우선순위와 함께 제시하고,
+각 요소에 대한 구체적인 기술 스택과 구현 전략을 설명해주세요.'''
+    },
+    {
+        'name': 'Advanced Code Generation',
+        'prompt': '''다음 요구사항을 만족하는 Python 클래스를 작성해주세요:
+
+1. LRU(Least Recently Used) 캐시를 구현하되, 다음 기능을 포함:
+   - O(1) 시간복잡도로 get/put 연산
+   - TTL(Time To Live) 지원 (각 항목마다 만료 시간 설정 가능)
+   - 메모리 사용량 제한 (바이트 단위)
+   - 통계 정보 제공 (hit rate, miss rate, eviction count)
+   - Thread-safe 구현
+
+2. 타입 힌팅 포함
+3. 주요 메서드에 대한 docstring 작성
+4. 간단한 사용 예제 포함'''
+    },
+    {
+        'name': 'Multi-dimensional Analysis',
+        'prompt': '''다음 비즈니스 시나리오를 다각도로 분석해주세요:
+
+한 AI 스타트업이 B2B SaaS 모델로 전환을 고려 중입니다.
+현재 상황:
+- 현재 B2C 모델, 월 활성 사용자 10만명, 무료 사용자 95%
+- 연간 매출 5억원, 운영비용 8억원 (적자 3억원)
+- 개발팀 15명, 마케팅팀 5명, 영업팀 2명
+- 주요 경쟁사 3곳이 이미 B2B 시장 선점
+- 투자 유치 필요 (Series A, 목표 100억원)
+
+다음 관점에서 분석하고 실행 계획을 제시해주세요:
+1. 재무적 타당성 (손익분기점, 예상 CAC/LTV)
+2. 조직 재편 전략 (인력 구조, 채용 계획)
+3. 제품 전환 로드맵 (기능 우선순위, 마이그레이션 전략)
+4. 시장 진입 전략 (타겟 고객, 가격 정책)
+5. 리스크 요인과 완화 방안'''
+    },
+    {
+        'name': 'Technical Translation',
+        'prompt': '''다음 기술 문서를 자연스러운 영어로 번역하되, 기술 용어의 정확성을 유지해주세요:
+
+"분산 시스템에서 CAP 정리는 일관성(Consistency), 가용성(Availability), 분할 내성(Partition Tolerance) 중
+최대 2가지만 동시에 보장할 수 있다고 명시합니다. 실제 프로덕션 환경에서는 네트워크 분할이 불가피하므로,
+대부분의 시스템은 일관성과 가용성 사이에서 트레이드오프를 선택해야 합니다.
+이벤트 소싱과 CQRS 패턴을 활용하면 최종 일관성(Eventual Consistency)을 달성하면서도
+높은 가용성을 유지할 수 있습니다. 다만, 이 경우 비즈니스 로직에서 일시적인 불일치 상태를
+처리할 수 있는 보상 트랜잭션(Compensating Transaction) 메커니즘이 필요합니다."'''
+    },
+    {
+        'name': 'Technical Translation EN-KO',
+        'prompt': '''Translate the following technical document into natural, fluent Korean while maintaining the accuracy of technical terms:
+
+"In modern cloud-native architectures, observability is achieved through three pillars: metrics, logs, and traces.
+Metrics provide quantitative measurements of system behavior over time, typically collected via time-series databases
+such as Prometheus or Amazon CloudWatch. Logs capture discrete events with contextual metadata, enabling post-hoc
+debugging through centralized platforms like the ELK stack or Amazon OpenSearch. Distributed tracing, implemented
+through standards like OpenTelemetry, correlates requests across microservice boundaries by propagating trace context
+headers. Together, these pillars enable Site Reliability Engineers (SREs) to define Service Level Objectives (SLOs),
+set error budgets, and implement automated incident response workflows. The key challenge lies in balancing the
+cardinality of collected telemetry data against storage costs and query performance."'''
+    }
+]
+
+# 프롬프트 캐싱 벤치마크의 공통 앞부분 머리말 (긴 시스템 프롬프트 워크로드를 흉내 냄)
+# Header of the prompt caching benchmark's shared prefix (mimics long-system-prompt workloads)
+CACHE_PREFIX_INTRO = """당신은 사내 기술 지원 어시스턴트입니다. 아래 참고 문서는 사내 지식 베이스에서 발췌한 자료입니다.
+답변할 때 참고 문서의 용어와 형식을 따르고, 문서에 없는 내용은 일반적인 모범 사례에 근거해 설명해주세요.
+질문은 참고 문서 다음에 주어집니다.
+
+# 참고 문서"""
+
+
+def build_cache_prefix(target_tokens: int = 6000) -> str:
+    """
+    프롬프트 캐싱 벤치마크용 공통 앞부분을 만듭니다. 머리말 뒤에 테스트 프롬프트들을 참고 문서로 반복해
+    추정 토큰 수(문자 수 / 4)가 target_tokens 이상이 되도록 합니다. 한국어는 문자당 토큰이 더 많으므로 실제
+    토큰 수는 추정보다 큽니다.
+    Builds the shared prefix for the prompt caching benchmark: the header followed by the test prompts
+    repeated as reference documents until the estimated token count (chars / 4) reaches target_tokens.
+    Korean text has more tokens per character, so the real token count exceeds the estimate.
+    """
+    parts = [CACHE_PREFIX_INTRO]
+    section = 0
+    while sum(len(part) for part in parts) // 4 < target_tokens:
+        case = TEST_CASES[section % len(TEST_CASES)]
+        section += 1
+        parts.append(f"## 문서 {section}: {case['name']}\n{case['prompt']}")
+    return '\n\n'.join(parts)
 
 
 class BedrockModelComparison:
@@ -26,19 +286,123 @@ class BedrockModelComparison:
     Invokes multiple Bedrock models with the same prompt and collects/compares performance metrics.
     """
 
-    def __init__(self, region='us-east-1'):
-        self.client = boto3.client('bedrock-runtime', region_name=region)
+    def __init__(self, region='us-east-1', max_concurrency: int = 1,
+                 per_model_concurrency: Union[int, Dict[str, int]] = 1, stream: bool = False,
+                 eval_cache: Optional[EvaluationCache] = None, record_path: Optional[str] = None,
+                 replay_path: Optional[str] = None, replay_latency_scale: float = 1.0,
+                 endpoint_url: Optional[str] = None,
+                 requests_per_min: Union[None, float, Dict[str, float]] = None,
+                 tokens_per_min: Union[None, float, Dict[str, float]] = None,
+                 max_retries: int = 4, backoff_base: float = 1.0, backoff_cap: float = 20.0,
+                 max_pool_connections: Optional[int] = None, connect_timeout: float = 10,
+                 read_timeout: float = 300, tcp_keepalive: bool = True,
+                 hooks: Optional[List[CallHooks]] = None, regions: Optional[List[str]] = None,
+                 blob_store: Optional[BlobStore] = None, journal: Optional[RunJournal] = None,
+                 converse: bool = False):
+        """
+        Args:
+            region: AWS 리전 (regions가 없을 때) / AWS region (when regions is not given)
+            max_concurrency: 전체 동시 호출 수 상한 (1이면 순차 실행)
+                             Global limit on in-flight requests (1 = sequential)
+            per_model_concurrency: 모델별 동시 호출 수 상한 (int 또는 {model_key: n})
+                                   Per-model in-flight limit (int or {model_key: n})
+            stream: True이면 스트리밍 API로 호출하여 TTFT 등을 측정
+                    Use the streaming API and record TTFT and inter-token latency
+            eval_cache: 품질 평가 캐시 (None이면 캐시 미사용)
+                        Quality evaluation cache (None disables caching)
+            record_path: 모든 Bedrock 호출을 기록할 아카이브 경로
+                         Archive path to record every Bedrock call to
+            replay_path: 네트워크 대신 재생할 아카이브 경로 (AWS 자격 증명 불필요)
+                         Archive path to replay instead of calling the network (no AWS credentials needed)
+            replay_latency_scale: 재생 시 기록된 지연 시간 배율 (0이면 대기 없음)
+                                  Multiplier on recorded latencies during replay (0 = no wait)
+            endpoint_url: bedrock-runtime 엔드포인트 재정의 (예: 로컬 스텁 서버)
+                          bedrock-runtime endpoint override (e.g. the local stub server)
+            requests_per_min: 모델별 분당 요청 수 제한 (숫자 또는 {model_key: n}, None이면 제한 없음)
+                              Per-model requests/min limit (number or {model_key: n}, None = unlimited)
+            tokens_per_min: 모델별 분당 토큰 수 제한 (숫자 또는 {model_key: n})
+                            Per-model tokens/min limit (number or {model_key: n})
+            max_retries: 스로틀링 시 최대 재시도 횟수 / Maximum retries on throttling
+            backoff_base: 지수 백오프 기준 시간 (초) / Exponential backoff base (seconds)
+            backoff_cap: 재시도 대기 상한 (초) / Cap on a single backoff delay (seconds)
+            max_pool_connections: HTTP 연결 풀 크기 (기본: max(10, max_concurrency + 2), 재생 시 무시)
+                                  HTTP connection pool size (default: max(10, max_concurrency + 2))
+            connect_timeout: 연결 타임아웃 (초) / Connect timeout (seconds)
+            read_timeout: 응답 읽기 타임아웃 (초, 긴 생성 응답 고려) / Read timeout (seconds, allows long generations)
+            tcp_keepalive: TCP keep-alive 사용 여부 / Enable TCP keep-alive
+            hooks: 호출마다 실행할 CallHooks 목록 (pre_request, post_response, on_error)
+                   CallHooks run on every call (pre_request, post_response, on_error)
+            regions: 동시에 호출할 리전 목록 (첫 리전이 기본 리전: 품질 평가와 results에 사용)
+                     Regions invoked concurrently (the first is the primary region used for judging and results)
+            blob_store: 보관하는 결과의 응답 텍스트를 내려 쓸 디스크 저장소 (None이면 메모리에 보관)
+                        On-disk store that kept results spill their response text to (None keeps it in memory)
+            journal: 완료된 호출·평가를 기록하고 재개 시 재생하는 저널 (run을 지정한 run_test에만 적용)
+                     Journal that records completed calls and evaluations and replays them on resume
+                     (applies to run_test calls given a run)
+            converse: True이면 InvokeModel 대신 Converse / ConverseStream API로 호출 (통일된 usage와 서버 측
+                      latency 기록)
+                      Call through the Converse / ConverseStream APIs instead of InvokeModel (uniform usage
+                      and server-side latency)
+        """
+        self.stream = stream
+        self.converse = converse
+        self.eval_cache = eval_cache
+        self.blob_store = blob_store
+        self.journal = journal
+        if max_pool_connections is None:
+            max_pool_connections = max(10, max_concurrency + 2)
+        # 재생 클라이언트는 연결 풀이 없음 / Replay clients have no connection pool
+        self.max_pool_connections = None if replay_path else max_pool_connections
+        # 리전별 클라이언트 (각자 연결 풀 보유) / Per-region clients (each with its own connection pool)
+        self.regions = list(regions) if regions else [region]
+        self.region = self.regions[0]
+        self.clients = {}
+        recorder = None
+        replay = None
+        for name in self.regions:
+            if replay_path:
+                # 재생 아카이브는 한 번만 읽고 리전마다 기록된 region으로 거른 뷰를 사용
+                # The replay archive is read once; each region gets a view filtered by the recorded region
+                if replay is None:
+                    client = replay = ReplayClient(replay_path, latency_scale=replay_latency_scale, region=name)
+                else:
+                    client = replay.sibling(name)
+            else:
+                # botocore 자체 재시도를 끄고 invoke_model_limited에서 재시도 (재시도가 latency에 섞이지 않도록)
+                # Disable botocore's own retries; invoke_model_limited retries so they never leak into latency
+                config = Config(
+                    retries={'total_max_attempts': 1, 'mode': 'standard'},
+                    max_pool_connections=max_pool_connections,
+                    connect_timeout=connect_timeout,
+                    read_timeout=read_timeout,
+                    tcp_keepalive=tcp_keepalive
+                )
+                client = boto3.client('bedrock-runtime', region_name=name, endpoint_url=endpoint_url,
+                                      config=config)
+            if record_path:
+                multi = len(self.regions) > 1
+                if recorder is None:
+                    client = recorder = RecordingClient(client, record_path, region=name if multi else None)
+                else:
+                    client = recorder.sibling(client, region=name)
+            self.clients[name] = client
+        # 기본 리전 클라이언트 (품질 평가용) / Primary region client (used for judging)
+        self.client = self.clients[self.region]
 
         # 모델 ID 및 가격 정보 (2026년 2월 기준, 1M 토큰당 USD)
         # Model IDs and pricing (as of Feb 2026, USD per 1M tokens)
         # 일부 모델은 inference profile ID를 사용해야 합니다 (us. prefix)
         # Some models require inference profile IDs (us. prefix)
+        # 프롬프트 캐싱을 지원하는 모델은 캐시 쓰기/읽기 단가도 가짐 (없으면 입력 단가 적용)
+        # Models supporting prompt caching also carry cache write/read prices (input price otherwise)
         self.models = {
             'haiku-4.5': {
                 'id': 'us.anthropic.claude-haiku-4-5-20251001-v1:0',
                 'name': 'Claude Haiku 4.5',
                 'input_price': 1.00,
                 'output_price': 5.00,
+                'cache_write_price': 1.25,
+                'cache_read_price': 0.10,
                 'format': 'claude'
             },
             'qwen-3.2': {
@@ -53,6 +417,8 @@ class BedrockModelComparison:
                 'name': 'Nova 2 Lite',
                 'input_price': 0.30,
                 'output_price': 2.50,
+                'cache_write_price': 0.30,
+                'cache_read_price': 0.075,
                 'format': 'nova'
             },
             'llama-3.2-11b': {
@@ -71,138 +437,534 @@ class BedrockModelComparison:
             }
         }
         
+        # 모델별 provider 어댑터 (요청 구성·응답 파싱 담당) / Per-model provider adapters (payload/response handling)
+        self._adapters = {key: get_adapter(m['format']) for key, m in self.models.items()}
+        # (모델, 리전)별 모델 ID / Model ID per (model, region)
+        self._model_ids = {(key, name): regional_model_id(m['id'], name)
+                           for key, m in self.models.items() for name in self.regions}
+
         self.results = []
-    
-    def invoke_model(self, model_key: str, prompt: str, max_tokens: int = 4096) -> Dict:
+        self.concurrency_sweep = {}  # 모델별 동시성 스윕 결과 / Per-model concurrency sweep results
+        self.cache_benchmark = {}  # 모델별 프롬프트 캐싱 벤치마크 결과 / Per-model prompt caching benchmark results
+
+        # 동시 실행 제한 (전역 + (모델, 리전)별 세마포어, 쿼터는 리전마다 따로 적용됨)
+        # Concurrency limits (global + per (model, region) semaphores; quotas apply per region)
+        self.max_concurrency = max(1, max_concurrency)
+        self._global_slots = threading.BoundedSemaphore(self.max_concurrency)
+        self.model_concurrency = {}
+        self._model_slots = {}
+        for key in self.models:
+            if isinstance(per_model_concurrency, dict):
+                limit = per_model_concurrency.get(key, 1)
+            else:
+                limit = per_model_concurrency
+            self.model_concurrency[key] = max(1, limit)
+            for name in self.regions:
+                self._model_slots[(key, name)] = threading.BoundedSemaphore(self.model_concurrency[key])
+
+        # 모델별 RPM/TPM 토큰 버킷과 스로틀링 재시도 설정
+        # Per-model RPM/TPM token buckets and throttle retry settings
+        def per_model(value, key):
+            return value.get(key) if isinstance(value, dict) else value
+        self._rate_limiters = {(key, name): ModelRateLimiter(per_model(requests_per_min, key),
+                                                             per_model(tokens_per_min, key))
+                               for key in self.models for name in self.regions}
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+        # cold/warm 구분: (모델, 리전)별 처음 model_concurrency개의 호출은 새 연결·TLS 설정을 포함할 수 있으므로
+        # cold로 표시하며, warm_up() 실행 후에는 모든 호출이 warm입니다.
+        # Cold/warm labelling: the first model_concurrency calls per (model, region) may include connection
+        # and TLS setup and are labelled cold; after warm_up() every call is warm.
+        self._call_counts = {(key, name): 0 for key in self.models for name in self.regions}
+        self._call_lock = threading.Lock()
+        self.warmup = {}  # 모델별 워밍업 결과 / Per-model warm-up results
+
+        # 호출 훅 (추적·지표 수집용) / Call hooks (for tracing and metrics)
+        self.hooks: List[CallHooks] = list(hooks or [])
+
+        # judge 호출 누적 사용량 (프롬프트 캐시 읽기/쓰기 토큰 포함)
+        # Accumulated judge usage (including prompt cache read/write tokens)
+        self.judge_usage = {'calls': 0, 'input_tokens': 0, 'output_tokens': 0, 'cache_read_input_tokens': 0,
+                            'cache_creation_input_tokens': 0, 'uncached_calls': 0, 'cost': 0.0, 'latency': 0.0}
+        self._judge_lock = threading.Lock()
+
+    def add_hook(self, hook: CallHooks):
+        """
+        호출 훅을 등록합니다. / Registers a call hook.
+        """
+        self.hooks.append(hook)
+
+    def compact(self, result: Dict) -> CallRecord:
+        """
+        호출 결과를 보관용 CallRecord로 압축합니다 (응답 텍스트는 blob_store로 내려 씀).
+        Packs a call result into a CallRecord for keeping (response text spills to blob_store).
+        """
+        return CallRecord(result, self.blob_store)
+
+    @staticmethod
+    def _response_chars(r) -> int:
+        """
+        응답 길이 (CallRecord는 텍스트를 읽지 않음) / Response length (without reading a CallRecord's text)
+        """
+        return r['response_chars'] if 'response_chars' in r else len(r['output_text'])
+
+    def _next_call_is_warm(self, model_key: str, region: str) -> bool:
+        with self._call_lock:
+            self._call_counts[(model_key, region)] += 1
+            return self._call_counts[(model_key, region)] > self.model_concurrency[model_key]
+
+    def _costs(self, model_key: str, input_tokens: int, output_tokens: int, cache_read_tokens: int = 0,
+               cache_write_tokens: int = 0) -> Tuple[float, float]:
+        """
+        (입력 비용, 출력 비용)을 계산합니다. 입력 비용에는 캐시 쓰기·읽기 토큰이 각 단가로 포함됩니다.
+        Computes (input cost, output cost); the input cost includes cache write and read tokens at their rates.
+        """
+        model_info = self.models[model_key]
+        input_cost = (input_tokens * model_info['input_price']
+                      + cache_write_tokens * model_info.get('cache_write_price', model_info['input_price'])
+                      + cache_read_tokens * model_info.get('cache_read_price', model_info['input_price'])) / 1_000_000
+        output_cost = (output_tokens / 1_000_000) * model_info['output_price']
+        return input_cost, output_cost
+
+    def warm_up(self, prompt: str = 'Hi', max_tokens: int = 8) -> Dict:
+        """
+        모델마다 model_concurrency개의 짧은 요청을 동시에 보내 연결 풀과 TLS 세션을 미리 열어 둡니다.
+        Sends model_concurrency tiny requests per model in parallel to pre-open pooled connections
+        and TLS sessions.
+
+        워밍업 호출은 결과에 포함되지 않으며, 이후 호출은 모두 warm으로 표시됩니다.
+        Warm-up calls are not part of the results; every later call is labelled warm.
+        """
+        invoke = self._invoker()
+        calls = [(key, name) for key in self.models for name in self.regions
+                 for _ in range(self.model_concurrency[key])]
+        print(f"\nWarm-up: {len(calls)} requests across {len(self.models)} models x {len(self.regions)} regions")
+        workers = min(len(calls), self.max_concurrency + len(self.models) * len(self.regions))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(lambda call: (call, invoke(call[0], prompt, max_tokens, region=call[1])),
+                                        calls))
+
+        def summary(call_results):
+            latencies = [r['latency'] for r in call_results if r['success']]
+            return {
+                "requests": len(call_results),
+                "errors": len(call_results) - len(latencies),
+                "latency_s": [round(v, 3) for v in latencies]
+            }
+
+        for key in self.models:
+            self.warmup[key] = summary([r for (k, _), r in results if k == key])
+            if len(self.regions) > 1:
+                self.warmup[key]["by_region"] = {name: summary([r for call, r in results if call == (key, name)])
+                                                 for name in self.regions}
+            latencies = self.warmup[key]['latency_s']
+            status = f"{max(latencies):.2f}s" if latencies else "failed"
+            print(f"  {self.models[key]['name']:20}: {status}")
+        # 워밍업 후에는 모든 호출을 warm으로 표시 / Label every later call warm
+        with self._call_lock:
+            for call in self._call_counts:
+                self._call_counts[call] = max(self._call_counts[call], self.model_concurrency[call[0]])
+        return self.warmup
+
+    def _invoker(self):
+        """
+        설정(converse, stream)에 맞는 단일 호출 메서드 / Single-call method matching the converse and stream settings
+        """
+        if self.converse:
+            return self.invoke_model_converse_stream if self.stream else self.invoke_model_converse
+        return self.invoke_model_stream if self.stream else self.invoke_model
+
+    def invoke_model_limited(self, model_key: str, prompt: str, max_tokens: int = 4096,
+                             region: Optional[str] = None, prefix: Optional[str] = None,
+                             cache: bool = True) -> Dict:
+        """
+        RPM/TPM 제한과 전역/모델별 동시 실행 한도 안에서 invoke_model을 호출하고, 스로틀링 시
+        지터가 적용된 지수 백오프로 재시도합니다.
+        Calls invoke_model within the RPM/TPM limits and the global and per-model concurrency slots,
+        retrying throttled attempts with jittered exponential backoff.
+
+        latency는 마지막 시도만의 시간입니다. 슬롯·속도 제한 대기와 재시도는 latency에 포함되지 않고
+        다음 필드로 따로 기록됩니다:
+        latency covers the final attempt only. Slot and rate-limit waits and retries are excluded from
+        latency and recorded separately:
+          - retries: 스로틀링으로 인한 재시도 횟수 / Retries caused by throttling
+          - retry_wait: 백오프 대기 + 스로틀된 시도에 걸린 시간 (초) / Backoff sleeps plus throttled attempts
+          - rate_limit_wait: RPM/TPM 버킷 대기 시간 (초) / Time spent waiting on RPM/TPM buckets
+
+        prefix와 cache는 invoke_model에 그대로 전달됩니다 (프롬프트 캐싱 벤치마크용).
+        prefix and cache are passed through to invoke_model (used by the prompt caching benchmark).
+        """
+        region = region or self.region
+        limiter = self._rate_limiters[(model_key, region)]
+        estimated_tokens = (len(prefix or '') + len(prompt)) // 4
+        retries = 0
+        retry_wait = 0.0
+        rate_limit_wait = 0.0
+        while True:
+            rate_limit_wait += limiter.acquire(estimated_tokens)
+            attempt_start = time.perf_counter()
+            with self._global_slots, self._model_slots[(model_key, region)]:
+                result = self._invoker()(model_key, prompt, max_tokens, region, prefix, cache)
+            if result['success']:
+                limiter.settle(estimated_tokens, result['total_tokens'])
+                break
+            if not result.get('throttled') or retries >= self.max_retries:
+                break
+            delay = backoff_delay(retries, self.backoff_base, self.backoff_cap)
+            time.sleep(delay)
+            retry_wait += time.perf_counter() - attempt_start
+            retries += 1
+
+        result['retries'] = retries
+        result['retry_wait'] = retry_wait
+        result['rate_limit_wait'] = rate_limit_wait
+        return result
+
+    def invoke_model(self, model_key: str, prompt: str, max_tokens: int = 4096, region: Optional[str] = None,
+                     prefix: Optional[str] = None, cache: bool = True) -> Dict:
         """
         단일 모델을 호출하고 성능 지표를 반환합니다.
         Invokes a single model and returns performance metrics.
 
         Args:
             model_key: 모델 식별 키 (예: 'haiku-4.5') / Model identifier key
-            prompt: 입력 프롬프트 / Input prompt
+            prompt: 입력 프롬프트 (prefix가 있으면 달라지는 뒷부분) / Input prompt (the varying suffix with a prefix)
             max_tokens: 최대 출력 토큰 수 / Maximum output tokens
+            region: 호출할 리전 (기본: 기본 리전) / Region to call (default: the primary region)
+            prefix: 프롬프트 캐싱 대상 공통 앞부분 (프롬프트 캐싱 지원 형식만). 주어지면 결과에
+                    cache_read_tokens, cache_write_tokens가 추가됩니다.
+                    Shared prefix for prompt caching (formats supporting it only). When given the result
+                    also carries cache_read_tokens and cache_write_tokens.
+            cache: False이면 prefix를 캐시 지점 없이 전송 (비교 기준) / Send the prefix without a cache point (baseline)
 
         Returns:
             Dict: 성공 시 latency, tokens, cost 등 포함 / On success includes latency, tokens, cost, etc.
                   실패 시 error 메시지 포함 / On failure includes error message
         """
-        model_info = self.models[model_key]
+        adapter = self._adapters[model_key]
+        region = region or self.region
+        warm = self._next_call_is_warm(model_key, region)
+        context = self._call_context(model_key, region, (prefix or '') + prompt, max_tokens, warm, stream=False)
+        dispatch(self.hooks, 'pre_request', context)
 
-        # 모델별 요청 페이로드 구성 (각 provider마다 API 형식이 다름)
-        # Build request payload per model (each provider has a different API format)
-        if model_info['format'] == 'claude':
-            payload = {
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": max_tokens,
-                "messages": [
-                    {"role": "user", "content": prompt}
-                ]
-            }
-        elif model_info['format'] == 'nova':
-            payload = {
-                "messages": [
-                    {"role": "user", "content": [{"text": prompt}]}
-                ],
-                "inferenceConfig": {
-                    "max_new_tokens": max_tokens
-                }
-            }
-        elif model_info['format'] == 'llama':
-            payload = {
-                "prompt": prompt,
-                "max_gen_len": max_tokens,
-                "temperature": 0.7
-            }
-        elif model_info['format'] == 'mistral':
-            payload = {
-                "messages": [
-                    {"role": "user", "content": prompt}
-                ],
-                "max_tokens": max_tokens,
-                "temperature": 0.7
-            }
-        else:  # Qwen
-            payload = {
-                "messages": [
-                    {"role": "user", "content": prompt}
-                ],
-                "max_tokens": max_tokens
-            }
-        
-        # 응답 시간 측정 시작 / Start latency measurement
-        start_time = time.time()
+        # 단계별 타이밍 시작 (단조 나노초 시계) / Start per-phase timing (monotonic nanosecond clock)
+        timer = PhaseTimer()
 
         try:
-            # Bedrock InvokeModel API 호출 / Call Bedrock InvokeModel API
-            response = self.client.invoke_model(
-                modelId=model_info['id'],
-                body=json.dumps(payload)
+            # 직렬화된 요청 본문 (동일 프롬프트·max_tokens는 재사용)
+            # Serialized request body (reused for the same prompt and max_tokens)
+            if prefix is None:
+                body = adapter.request_body(prompt, max_tokens)
+            else:
+                body = adapter.cached_request_body(prefix, prompt, max_tokens, cache)
+            timer.mark('serialize')
+
+            # Bedrock InvokeModel API 호출 (응답 헤더 수신까지) / Call Bedrock InvokeModel API (until response headers)
+            response = self.clients[region].invoke_model(
+                modelId=self._model_ids[(model_key, region)],
+                body=body
             )
+            timer.mark('send')
+            raw_body = response['body'].read()
+            timer.mark('body_read')
+
+            # 응답 본문 파싱 (provider마다 JSON 구조가 다름)
+            # Parse response body (JSON structure differs by provider)
+            response_body = json.loads(raw_body)
+            output_text, input_tokens, output_tokens = adapter.parse_response(response_body, (prefix or '') + prompt)
+            cache_usage = adapter.cache_usage(response_body) if prefix is not None else {}
+            timer.mark('parse')
+
+            # 응답 시간: 요청 전송부터 파싱된 응답을 얻기까지 (초)
+            # Latency: from sending the request until the parsed response is available (seconds)
+            latency = timer.seconds('send', 'body_read', 'parse')
+            return self._success_result(model_key, region, context, timer, latency, input_tokens, output_tokens,
+                                        output_text, cache_usage)
 
-            # 응답 시간 계산 (초) / Calculate response time (seconds)
-            latency = time.time() - start_time
-
-            # 응답 본문 파싱 / Parse response body
-            response_body = json.loads(response['body'].read())
-
-            # 모델별 응답 형식 처리 (provider마다 JSON 구조가 다름)
-            # Parse model-specific response format (JSON structure differs by provider)
-            if model_info['format'] == 'claude':
-                output_text = response_body['content'][0]['text']
-                input_tokens = response_body['usage']['input_tokens']
-                output_tokens = response_body['usage']['output_tokens']
-            elif model_info['format'] == 'nova':
-                output_text = response_body['output']['message']['content'][0]['text']
-                input_tokens = response_body['usage']['inputTokens']
-                output_tokens = response_body['usage']['outputTokens']
-            elif model_info['format'] == 'llama':
-                output_text = response_body['generation']
-                input_tokens = response_body.get('prompt_token_count', len(prompt) // 4)
-                output_tokens = response_body.get('generation_token_count', len(output_text) // 4)
-            elif model_info['format'] == 'mistral':
-                output_text = response_body['choices'][0]['message']['content']
-                input_tokens = response_body['usage']['prompt_tokens']
-                output_tokens = response_body['usage']['completion_tokens']
-            else:  # Qwen
-                output_text = response_body['choices'][0]['message']['content']
-                input_tokens = response_body['usage']['prompt_tokens']
-                output_tokens = response_body['usage']['completion_tokens']
-            
-            # 비용 계산 (토큰 수 × 1M 토큰당 가격)
-            # Calculate cost (token count × price per 1M tokens)
-            input_cost = (input_tokens / 1_000_000) * model_info['input_price']
-            output_cost = (output_tokens / 1_000_000) * model_info['output_price']
-            total_cost = input_cost + output_cost
-            
-            return {
-                'success': True,
-                'model': model_info['name'],
-                'model_key': model_key,
-                'latency': latency,
-                'input_tokens': input_tokens,
-                'output_tokens': output_tokens,
-                'total_tokens': input_tokens + output_tokens,
-                'input_cost': input_cost,
-                'output_cost': output_cost,
-                'total_cost': total_cost,
-                'output_text': output_text,
-                'timestamp': datetime.now().isoformat()
-            }
-            
         except Exception as e:
-            return {
-                'success': False,
-                'model': model_info['name'],
-                'model_key': model_key,
-                'error': str(e),
-                'timestamp': datetime.now().isoformat()
-            }
+            return self._failure_result(model_key, region, e, timer, context)
+    
+    def invoke_model_stream(self, model_key: str, prompt: str, max_tokens: int = 4096,
+                            region: Optional[str] = None, prefix: Optional[str] = None,
+                            cache: bool = True) -> Dict:
+        """
+        스트리밍 API(InvokeModelWithResponseStream)로 단일 모델을 호출합니다.
+        Invokes a single model through the streaming API (InvokeModelWithResponseStream).
+
+        invoke_model과 같은 결과 Dict에 다음 지표를 추가합니다:
+        Returns the same result Dict as invoke_model plus:
+          - ttft: 첫 토큰까지 걸린 시간 (초) / Time to first token (seconds)
+          - chunk_times: 텍스트 청크별 도착 시각 (요청 시작 기준, 초) / Text chunk arrival offsets
+          - itl_p50/itl_p90/itl_p99: 청크 간 지연 백분위수 (초) / Inter-token latency percentiles
+          - decode_tps: 첫 토큰 이후 출력 토큰/초 / Output tokens/sec after the first token
+        prefix와 cache는 invoke_model과 같습니다. / prefix and cache behave as in invoke_model.
+        """
+        adapter = self._adapters[model_key]
+        region = region or self.region
+        warm = self._next_call_is_warm(model_key, region)
+        context = self._call_context(model_key, region, (prefix or '') + prompt, max_tokens, warm, stream=True)
+        dispatch(self.hooks, 'pre_request', context)
+
+        # 단계별 타이밍 시작 (단조 나노초 시계) / Start per-phase timing (monotonic nanosecond clock)
+        timer = PhaseTimer()
+
+        try:
+            if prefix is None:
+                body = adapter.request_body(prompt, max_tokens)
+            else:
+                body = adapter.cached_request_body(prefix, prompt, max_tokens, cache)
+            send_start = timer.mark('serialize')
+
+            response = self.clients[region].invoke_model_with_response_stream(
+                modelId=self._model_ids[(model_key, region)],
+                body=body
+            )
+            timer.mark('send')
+
+            # 이벤트 대기는 body_read, 청크 디코딩·파싱은 parse에 누적
+            # Waiting for events accumulates into body_read, chunk decoding and parsing into parse
+            text_parts = []
+            chunk_times = []
+            usage = {}
+            for event in response['body']:
+                arrival_ns = timer.mark('body_read')
+                if 'chunk' not in event:
+                    continue
+                chunk = json.loads(event['chunk']['bytes'])
+                text, chunk_usage = adapter.parse_stream_chunk(chunk)
+                for key, value in chunk_usage.items():
+                    if value is not None:
+                        usage[key] = value
+                if text:
+                    text_parts.append(text)
+                    chunk_times.append((arrival_ns - send_start) / 1e9)
+                timer.mark('parse')
+            timer.mark('body_read')
+
+            # 스트림 종료 시점까지의 전체 응답 시간 / End-to-end latency until the stream closes
+            latency = timer.seconds('send', 'body_read', 'parse')
+            output_text = ''.join(text_parts)
+
+            input_tokens = usage.get('input_tokens', len((prefix or '') + prompt) // 4)
+            output_tokens = usage.get('output_tokens', len(output_text) // 4)
+            cache_usage = ({key: usage.get(key, 0) for key in ('cache_read_tokens', 'cache_write_tokens')}
+                           if prefix is not None else {})
+
+            return self._success_result(model_key, region, context, timer, latency, input_tokens, output_tokens,
+                                        output_text, cache_usage, **stream_metrics(chunk_times, output_tokens))
+
+        except Exception as e:
+            return self._failure_result(model_key, region, e, timer, context)
+
+    def invoke_model_converse(self, model_key: str, prompt: str, max_tokens: int = 4096,
+                              region: Optional[str] = None, prefix: Optional[str] = None,
+                              cache: bool = True) -> Dict:
+        """
+        Converse API로 단일 모델을 호출합니다. 인자와 결과는 invoke_model과 같고 다음이 추가됩니다:
+        Invokes a single model through the Converse API. Arguments and result match invoke_model, plus:
+          - server_latency: 응답의 metrics.latencyMs (초) / metrics.latencyMs from the response (seconds)
+          - overhead: latency - server_latency, 네트워크 왕복·대기열 등 서버 밖에서 쓴 시간 (초)
+                      Time spent outside the model server, i.e. network round trip and queueing (seconds)
+
+        Converse는 모든 provider가 같은 usage 구조를 반환하므로 토큰 수를 추정하지 않습니다. 응답 본문은
+        botocore가 호출 안에서 읽고 파싱하므로 body_read 단계는 send에 포함됩니다.
+        Converse returns the same usage shape for every provider, so token counts are never estimated.
+        botocore reads and parses the response body inside the call, so the body_read phase is part of send.
+        """
+        adapter = self._adapters[model_key]
+        region = region or self.region
+        warm = self._next_call_is_warm(model_key, region)
+        context = self._call_context(model_key, region, (prefix or '') + prompt, max_tokens, warm, stream=False,
+                                     api='converse')
+        dispatch(self.hooks, 'pre_request', context)
+
+        timer = PhaseTimer()
+
+        try:
+            request = adapter.converse_request(prompt, max_tokens, prefix, cache)
+            timer.mark('serialize')
+
+            response = self.clients[region].converse(modelId=self._model_ids[(model_key, region)], **request)
+            timer.mark('send')
+
+            output_text = ''.join(block.get('text', '') for block in response['output']['message']['content'])
+            usage = adapter.converse_usage(response['usage'])
+            cache_usage = ({key: usage[key] for key in ('cache_read_tokens', 'cache_write_tokens')}
+                           if prefix is not None else {})
+            server_latency = response['metrics']['latencyMs'] / 1000
+            timer.mark('parse')
+
+            latency = timer.seconds('send', 'parse')
+            return self._success_result(model_key, region, context, timer, latency, usage['input_tokens'],
+                                        usage['output_tokens'], output_text, cache_usage,
+                                        server_latency=server_latency, overhead=latency - server_latency)
+
+        except Exception as e:
+            return self._failure_result(model_key, region, e, timer, context)
+
+    def invoke_model_converse_stream(self, model_key: str, prompt: str, max_tokens: int = 4096,
+                                     region: Optional[str] = None, prefix: Optional[str] = None,
+                                     cache: bool = True) -> Dict:
+        """
+        ConverseStream API로 단일 모델을 호출합니다. invoke_model_stream과 같은 스트리밍 지표에 마지막
+        metadata 이벤트의 usage와 metrics.latencyMs로 server_latency, overhead를 추가합니다.
+        Invokes a single model through the ConverseStream API. Adds server_latency and overhead, taken
+        from the usage and metrics.latencyMs of the final metadata event, to the streaming metrics of
+        invoke_model_stream. metadata 이벤트가 없으면 토큰 수는 invoke 경로처럼 글자 수/4로 추정하고
+        server_latency, overhead는 None입니다.
+        Without a metadata event token counts are estimated as characters / 4 like the invoke paths, and
+        server_latency and overhead are None.
+        """
+        adapter = self._adapters[model_key]
+        region = region or self.region
+        warm = self._next_call_is_warm(model_key, region)
+        context = self._call_context(model_key, region, (prefix or '') + prompt, max_tokens, warm, stream=True,
+                                     api='converse')
+        dispatch(self.hooks, 'pre_request', context)
+
+        timer = PhaseTimer()
+
+        try:
+            request = adapter.converse_request(prompt, max_tokens, prefix, cache)
+            send_start = timer.mark('serialize')
+
+            response = self.clients[region].converse_stream(modelId=self._model_ids[(model_key, region)], **request)
+            timer.mark('send')
+
+            # 이벤트 대기는 body_read, 이벤트 처리는 parse에 누적
+            # Waiting for events accumulates into body_read, event handling into parse
+            text_parts = []
+            chunk_times = []
+            metadata = {}
+            for event in response['stream']:
+                arrival_ns = timer.mark('body_read')
+                if 'contentBlockDelta' in event:
+                    text = event['contentBlockDelta']['delta'].get('text')
+                    if text:
+                        text_parts.append(text)
+                        chunk_times.append((arrival_ns - send_start) / 1e9)
+                elif 'metadata' in event:
+                    metadata = event['metadata']
+                timer.mark('parse')
+            timer.mark('body_read')
+
+            latency = timer.seconds('send', 'body_read', 'parse')
+            output_text = ''.join(text_parts)
+            if 'usage' in metadata:
+                usage = adapter.converse_usage(metadata['usage'])
+            else:
+                # metadata 이벤트가 없으면 invoke 경로처럼 글자 수로 추정 (캐시 토큰은 알 수 없음)
+                # Without a metadata event estimate from characters as the invoke paths do (cache tokens unknown)
+                usage = {'input_tokens': len((prefix or '') + prompt) // 4,
+                         'output_tokens': len(output_text) // 4,
+                         'cache_read_tokens': 0, 'cache_write_tokens': 0}
+            cache_usage = ({key: usage[key] for key in ('cache_read_tokens', 'cache_write_tokens')}
+                           if prefix is not None else {})
+            latency_ms = metadata.get('metrics', {}).get('latencyMs')
+            server_latency = latency_ms / 1000 if latency_ms is not None else None
+            overhead = latency - server_latency if server_latency is not None else None
+            return self._success_result(model_key, region, context, timer, latency, usage['input_tokens'],
+                                        usage['output_tokens'], output_text, cache_usage,
+                                        server_latency=server_latency, overhead=overhead,
+                                        **stream_metrics(chunk_times, usage['output_tokens']))
+
+        except Exception as e:
+            return self._failure_result(model_key, region, e, timer, context)
+
+    def _call_context(self, model_key: str, region: str, prompt: str, max_tokens: int, warm: bool,
+                      stream: bool, api: str = 'invoke_model') -> Dict:
+        """
+        훅에 전달할 호출 컨텍스트 / Call context passed to hooks
+        """
+        return {
+            'model_key': model_key,
+            'model_id': self._model_ids[(model_key, region)],
+            'region': region,
+            'stream': stream,
+            'api': api,
+            'max_tokens': max_tokens,
+            'prompt_chars': len(prompt),
+            'warm': warm
+        }
+
+    def _success_result(self, model_key: str, region: str, context: Dict, timer: PhaseTimer, latency: float,
+                        input_tokens: int, output_tokens: int, output_text: str, cache_usage: Dict,
+                        **extra) -> Dict:
+        """
+        비용을 계산해 성공 결과를 만들고 post_response 훅을 호출합니다. 호출 경로별 지표(스트리밍 지표,
+        server_latency 등)는 extra로 받아 output_text 뒤에 담습니다.
+        Computes the cost, builds the success result and fires post_response. Path-specific metrics
+        (streaming metrics, server_latency, ...) arrive through extra and are placed after output_text.
+        """
+        # 비용 계산 (토큰 수 × 1M 토큰당 가격, 캐시 토큰은 캐시 단가)
+        # Calculate cost (token count × price per 1M tokens, cache tokens at cache rates)
+        input_cost, output_cost = self._costs(model_key, input_tokens, output_tokens, **cache_usage)
+        timer.mark('cost')
+
+        result = {
+            'success': True,
+            'model': self.models[model_key]['name'],
+            'model_key': model_key,
+            'region': region,
+            'latency': latency,
+            'input_tokens': input_tokens,
+            'output_tokens': output_tokens,
+            'total_tokens': input_tokens + sum(cache_usage.values()) + output_tokens,
+            'input_cost': input_cost,
+            'output_cost': output_cost,
+            'total_cost': input_cost + output_cost,
+            'output_text': output_text,
+            **extra,
+            'warm': context['warm'],
+            'phases': timer.as_ms(),
+            'timestamp': datetime.now().isoformat(),
+            **cache_usage
+        }
+        dispatch(self.hooks, 'post_response', context, result)
+        return result
+
+    def _failure_result(self, model_key: str, region: str, e: Exception, timer: PhaseTimer, context: Dict) -> Dict:
+        """
+        실패 결과를 만들고 on_error 훅을 호출합니다. phases에는 실패 시점까지 끝난 단계만 담깁니다.
+        Builds the failure result and fires on_error; phases only holds the phases completed before the failure.
+        """
+        result = {
+            'success': False,
+            'model': self.models[model_key]['name'],
+            'model_key': model_key,
+            'region': region,
+            'error': str(e),
+            'throttled': is_throttle_exception(e),
+            'phases': timer.as_ms(),
+            'timestamp': datetime.now().isoformat()
+        }
+        dispatch(self.hooks, 'on_error', context, e, result)
+        return result
     
-    def run_test(self, prompt: str, test_name: str = "Test") -> Dict:
+    def run_test(self, prompt: str, test_name: str = "Test", max_tokens: int = 4096, keep: bool = True,
+                 run: Union[None, int, str] = None, test_id: Optional[str] = None) -> Dict:
         """
-        동일한 프롬프트로 등록된 모든 모델을 순차 호출합니다.
-        Runs the same prompt against all registered models sequentially.
+        동일한 프롬프트로 등록된 모든 모델을 호출합니다.
+        Runs the same prompt against all registered models.
+
+        max_concurrency가 1이면 순차 호출하고, 그보다 크면 스레드 풀로 동시 호출합니다.
+        리전이 여럿이면 모든 (모델, 리전) 쌍을 호출하고, 기본 리전 결과는 results에, 전체는
+        region_results({region: {model_key: result}})에 담습니다.
+        보관하는 결과는 CallRecord로 압축되며, keep이 False이면 결과를 self.results에 보관하지 않고
+        호출 결과 Dict를 그대로 반환합니다 (데이터셋 스트리밍용).
+        Models are called sequentially when max_concurrency is 1, otherwise concurrently
+        through a thread pool. With several regions every (model, region) pair is called; the primary
+        region's results go into results and all of them into region_results
+        ({region: {model_key: result}}). Kept results are compacted into CallRecords; with keep=False the
+        result is not kept in self.results and the plain result Dicts are returned (used for dataset streaming).
+
+        journal이 있고 run이 주어지면 (run, test_id)에 이미 기록된 호출은 건너뛰고 저널의 결과를 쓰며,
+        새로 성공한 호출은 끝나는 즉시 기록합니다 (test_id 기본값은 test_name).
+        With a journal and a run, calls already journaled for (run, test_id) are skipped and their journaled
+        results reused, and each new successful call is journaled as soon as it finishes (test_id defaults
+        to test_name).
         """
         print(f"\n{'='*60}")
         print(f"Test: {test_name}")
@@ -210,29 +972,367 @@ class BedrockModelComparison:
         print(f"Prompt: {prompt[:100]}...")
         print()
         
-        results = {}
-        
-        for model_key in self.models.keys():
-            print(f"Testing {self.models[model_key]['name']}...")
-            result = self.invoke_model(model_key, prompt)
-            results[model_key] = result
-            
-            if result['success']:
-                print(f"  Done - {result['latency']:.2f}s, {result['total_tokens']} tokens, ${result['total_cost']:.6f}")
-            else:
-                print(f"  Failed - {result['error']}")
-        
+        # 저널에 기록된 호출 (재개 시) / Calls already in the journal (on resume)
+        test_id = test_id or test_name
+        journaled = {}
+        if self.journal and run is not None:
+            journaled = {call: v for call, v in self.journal.calls(run, test_id).items()
+                         if call[0] in self.models and call[1] in self.regions}
+        if journaled:
+            print(f"  Resumed {len(journaled)} calls from journal")
+
+        # (모델, 리전) 호출 목록 / (model, region) calls
+        calls = [(key, name) for key in self.models for name in self.regions if (key, name) not in journaled]
+        multi_region = len(self.regions) > 1
+        call_results = {call: r for call, (r, _, _) in journaled.items()}
+        wall_start = time.time()
+
+        if self.max_concurrency == 1:
+            for model_key, region in calls:
+                region_str = f" [{region}]" if multi_region else ""
+                print(f"Testing {self.models[model_key]['name']}{region_str}...")
+                result = self._invoke_journaled(model_key, prompt, max_tokens, region, run, test_id)
+                call_results[(model_key, region)] = result
+                self._print_result(result)
+        elif calls:
+            # 모델·리전별 호출을 동시에 실행하고, 완료 순서대로 출력
+            # Fan out model (and region) calls concurrently and report them as they complete
+            workers = min(self.max_concurrency, len(calls))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {}
+                for model_key, region in calls:
+                    region_str = f" [{region}]" if multi_region else ""
+                    print(f"Testing {self.models[model_key]['name']}{region_str}...")
+                    futures[executor.submit(self._invoke_journaled, model_key, prompt, max_tokens,
+                                            region, run, test_id)] = (model_key, region)
+                for future in as_completed(futures):
+                    result = future.result()
+                    call_results[futures[future]] = result
+                    self._print_result(result, show_name=True)
+
+        # 보관할 결과는 압축해 응답 텍스트를 디스크로 내려 씀 (실행 길이와 무관하게 메모리 일정)
+        # Kept results are compacted with their text spilled to disk (memory stays flat however long the run)
+        if keep:
+            call_results = {call: self.compact(r) for call, r in call_results.items()}
+
+        # 기본 리전 결과는 self.models 순서로 results에 (compare_results/save_results/품질 평가용)
+        # Primary region results go into results in self.models order (compare/save/judge)
+        results = {key: call_results[(key, self.region)] for key in self.models if (key, self.region) in call_results}
+
+        wall_time = time.time() - wall_start
+        if journaled and not calls:
+            # 모두 저널에서 재개한 경우 기록된 호출 구간 / Journaled span when every call was resumed
+            wall_time = max(f for _, _, f in journaled.values()) - min(s for _, s, _ in journaled.values())
+        print(f"  Wall time: {wall_time:.2f}s")
+
         # 테스트 결과 저장 / Store test result
         test_result = {
             'test_name': test_name,
             'prompt': prompt,
             'results': results,
+            'wall_time': wall_time,
             'timestamp': datetime.now().isoformat()
         }
-        self.results.append(test_result)
+        if multi_region:
+            test_result['region_results'] = {name: {key: call_results[(key, name)] for key in self.models
+                                                    if (key, name) in call_results}
+                                              for name in self.regions}
+        if run is not None:
+            test_result['run'] = run
+            test_result['test_id'] = test_id
+            test_result['resumed'] = bool(journaled) and not calls
+        if keep:
+            self.results.append(test_result)
         
         return test_result
+
+    def _invoke_journaled(self, model_key: str, prompt: str, max_tokens: int, region: str,
+                          run: Union[None, int, str], test_id: str) -> Dict:
+        """
+        invoke_model_limited 후 성공한 결과를 저널에 기록합니다 (journal과 run이 있을 때).
+        Calls invoke_model_limited and journals a successful result (when there is a journal and a run).
+        """
+        started = time.time()
+        result = self.invoke_model_limited(model_key, prompt, max_tokens, region)
+        if self.journal and run is not None:
+            self.journal.record_call(run, test_id, result, started)
+        return result
+
+    def _print_result(self, result: Dict, show_name: bool = False):
+        """
+        단일 호출 결과를 한 줄로 출력합니다.
+        Prints a one-line summary of a single invocation result.
+        """
+        prefix = f"  {result['model']:20}: " if show_name else "  "
+        if show_name and len(self.regions) > 1:
+            prefix = f"  {result['model']:20} [{result['region']}]: "
+        retry_str = f" ({result['retries']} retries, {result['retry_wait']:.1f}s retry wait)" if result.get('retries') else ""
+        if result['success']:
+            ttft_str = f", TTFT {result['ttft']:.2f}s" if result.get('ttft') is not None else ""
+            cold_str = " [cold]" if not result.get('warm', True) else ""
+            server_str = (f" (server {result['server_latency']:.2f}s + overhead {result['overhead']:.2f}s)"
+                          if result.get('server_latency') is not None else "")
+            print(f"{prefix}Done - {result['latency']:.2f}s{server_str}{cold_str}{ttft_str}, {result['total_tokens']} tokens, ${result['total_cost']:.6f}{retry_str}")
+        else:
+            print(f"{prefix}Failed - {result['error']}{retry_str}")
     
+    def run_concurrency_sweep(self, model_key: str, prompt: str, levels: List[int],
+                              duration: float = 30, max_tokens: int = 4096) -> Dict:
+        """
+        closed-loop 동시성 수준을 높여가며 단일 모델의 처리량-지연 곡선을 측정합니다.
+        Measures a single model's throughput-vs-latency curve at increasing closed-loop concurrency.
+
+        각 수준에서 N개의 워커가 duration초 동안 쉬지 않고 요청을 반복하며, 요청/초, 출력 토큰/초,
+        latency 백분위수를 기록합니다. latency 증가율이 처리량 증가율을 처음 넘어서는 지점의 직전
+        수준을 knee(포화점)로 판정합니다.
+        At each level N workers issue back-to-back requests for `duration` seconds, recording
+        requests/sec, output tokens/sec and latency percentiles. The knee (saturation point) is the
+        level just before latency growth first outpaces throughput growth.
+
+        스윕은 순수한 모델 용량을 재기 위해 설정된 호출 메서드를 직접 사용하므로 RPM/TPM 제한, 동시 실행 슬롯,
+        스로틀링 재시도가 적용되지 않습니다 (스로틀된 호출은 errors로 셉니다). 최고 수준이 연결 풀 크기를 넘으면
+        초과 연결이 매번 새로 열려 latency가 부풀려지므로 ValueError를 냅니다.
+        The sweep calls the configured invoke method directly to measure raw model capacity, so RPM/TPM
+        limits, concurrency slots and throttle retries do not apply (throttled calls count as errors). A top
+        level above the connection pool size raises ValueError, since extra connections would be opened and
+        discarded per request and inflate latency.
+
+        Args:
+            model_key: 대상 모델 키 / Target model key
+            prompt: 입력 프롬프트 / Input prompt
+            levels: 동시성 수준 목록 (예: [1, 2, 4, 8, 16]) / Concurrency levels
+            duration: 수준별 측정 시간 (초) / Measurement time per level (seconds)
+            max_tokens: 최대 출력 토큰 수 / Maximum output tokens
+
+        Returns:
+            Dict: levels(수준별 지표), knee_concurrency, saturated — self.concurrency_sweep에도 저장
+                  Per-level metrics, knee_concurrency, saturated — also stored in self.concurrency_sweep
+        """
+        if self.max_pool_connections is not None and max(levels) > self.max_pool_connections:
+            raise ValueError(f"Sweep level {max(levels)} exceeds the connection pool size "
+                             f"({self.max_pool_connections}); raise max_pool_connections")
+        invoke = self._invoker()
+        print(f"\nConcurrency sweep: {self.models[model_key]['name']} (levels {levels}, {duration}s each)")
+        print("  Raw calls: rate limits, concurrency slots and throttle retries are not applied")
+
+        points = []
+        for level in sorted(levels):
+            samples = []
+            lock = threading.Lock()
+            deadline = time.time() + duration
+
+            def worker():
+                while time.time() < deadline:
+                    result = invoke(model_key, prompt, max_tokens)
+                    with lock:
+                        samples.append(result)
+
+            start = time.time()
+            with ThreadPoolExecutor(max_workers=level) as executor:
+                for _ in range(level):
+                    executor.submit(worker)
+            elapsed = time.time() - start
+
+            successes = [r for r in samples if r['success']]
+            point = {
+                "concurrency": level,
+                "requests": len(samples),
+                "errors": len(samples) - len(successes),
+                "requests_per_s": round(len(successes) / elapsed, 3),
+                "output_tokens_per_s": round(sum(r['output_tokens'] for r in successes) / elapsed, 1),
+                "latency": latency_summary([r['latency'] for r in successes])
+            }
+            points.append(point)
+            print(f"  c={level:<3} {point['requests_per_s']:.2f} req/s, "
+                  f"{point['output_tokens_per_s']:.1f} tok/s, p50 {point['latency'].get('p50_s', 0):.2f}s, "
+                  f"p95 {point['latency'].get('p95_s', 0):.2f}s, errors {point['errors']}")
+
+        # knee 판정: 직전 수준 대비 p50 latency 증가율 > 처리량 증가율이 되는 첫 지점
+        # Knee: first level where relative p50 latency growth exceeds relative throughput growth
+        knee = points[-1]['concurrency'] if points else None
+        saturated = False
+        for prev, cur in zip(points, points[1:]):
+            prev_p50 = prev['latency'].get('p50_s')
+            cur_p50 = cur['latency'].get('p50_s')
+            if not prev_p50 or not cur_p50 or not prev['requests_per_s']:
+                continue
+            throughput_growth = cur['requests_per_s'] / prev['requests_per_s'] - 1
+            latency_growth = cur_p50 / prev_p50 - 1
+            if latency_growth > throughput_growth:
+                knee = prev['concurrency']
+                saturated = True
+                break
+
+        sweep = {
+            "model": self.models[model_key]['name'],
+            "duration_per_level_s": duration,
+            "levels": points,
+            "knee_concurrency": knee,
+            "saturated": saturated
+        }
+        self.concurrency_sweep[model_key] = sweep
+        print(f"  Knee: c={knee}" + ("" if saturated else " (not saturated within tested levels)"))
+        return sweep
+
+    def run_cache_benchmark(self, model_key: str, prefix: str, suffixes: List[str], rounds: int = 2,
+                            max_tokens: int = 512) -> Dict:
+        """
+        큰 공통 앞부분 + 달라지는 뒷부분 요청을 캐시 없이/캐시와 함께 보내 프롬프트 캐싱의 latency·비용 효과를
+        측정합니다 (claude, nova 형식).
+        Measures the latency and cost effect of prompt caching by sending requests made of a large shared
+        prefix and a varying suffix without and with caching (claude and nova formats).
+
+        라운드마다 앞부분 맨 앞에 세션 표식을 붙여 새 캐시 항목으로 시작하고, 뒷부분(suffixes)마다 캐시 없이
+        한 번(off), 캐시 지점을 표시해 한 번(on) 호출합니다. 캐시 사용 호출은 응답 usage로 분류합니다:
+        Each round starts a fresh cache entry by putting a session marker at the very start of the prefix,
+        then calls every suffix once without caching (off) and once with a cache point (on). Cached calls
+        are classified by the usage in the response:
+          - cold: 캐시 쓰기만 발생 (캐시 생성) / Cache write only (cache creation)
+          - warm: 캐시 읽기 발생 (캐시 적중) / Cache read (cache hit)
+          - uncached: 둘 다 없음 (앞부분이 최소 캐시 길이보다 짧은 경우 등) / Neither (e.g. prefix below the
+            minimum cacheable length)
+
+        Returns:
+            Dict: off/cold/warm 평균 지표와 warm·cold의 off 대비 차이 — self.cache_benchmark에도 저장
+                  off/cold/warm averages and the warm and cold deltas against off — also stored in
+                  self.cache_benchmark
+        """
+        if not self._adapters[model_key].supports_prompt_cache:
+            raise ValueError(f"Prompt caching is not supported for {model_key} "
+                             f"(format '{self.models[model_key]['format']}')")
+        name = self.models[model_key]['name']
+        print(f"\nPrompt caching benchmark: {name} ({len(prefix):,}-char prefix, {len(suffixes)} suffixes, "
+              f"{rounds} rounds)")
+
+        session = datetime.now().strftime('%Y%m%dT%H%M%S')
+        samples = {'off': [], 'cold': [], 'warm': [], 'uncached': []}
+        failures = 0
+        for round_index in range(rounds):
+            round_prefix = f"[session {session}-{round_index + 1}]\n{prefix}"
+            for mode, cache in (('off', False), ('on', True)):
+                for suffix in suffixes:
+                    result = self.invoke_model_limited(model_key, suffix, max_tokens, prefix=round_prefix,
+                                                       cache=cache)
+                    if not result['success']:
+                        failures += 1
+                        print(f"  [{mode:4}] Failed - {result['error']}")
+                        continue
+                    if not cache:
+                        kind = 'off'
+                    elif result['cache_read_tokens']:
+                        kind = 'warm'
+                    elif result['cache_write_tokens']:
+                        kind = 'cold'
+                    else:
+                        kind = 'uncached'
+                    samples[kind].append(result)
+                    ttft_str = f", TTFT {result['ttft']:.2f}s" if result.get('ttft') is not None else ""
+                    print(f"  [{kind:8}] {result['latency']:.2f}s{ttft_str}, {result['input_tokens']} in "
+                          f"+ {result['cache_write_tokens']} cache write + {result['cache_read_tokens']} cache read, "
+                          f"${result['total_cost']:.6f}")
+
+        def stats(results):
+            if not results:
+                return {"samples": 0}
+            n = len(results)
+            entry = {
+                "samples": n,
+                "avg_latency_s": round(sum(r['latency'] for r in results) / n, 3),
+                "avg_input_tokens": round(sum(r['input_tokens'] for r in results) / n),
+                "avg_cache_write_tokens": round(sum(r['cache_write_tokens'] for r in results) / n),
+                "avg_cache_read_tokens": round(sum(r['cache_read_tokens'] for r in results) / n),
+                "avg_cost_usd": round(sum(r['total_cost'] for r in results) / n, 6)
+            }
+            ttfts = [r['ttft'] for r in results if r.get('ttft') is not None]
+            if ttfts:
+                entry["avg_ttft_s"] = round(sum(ttfts) / len(ttfts), 3)
+            return entry
+
+        def delta(cached, baseline):
+            if not cached['samples'] or not baseline['samples']:
+                return None
+            diff = {
+                "latency_delta_s": round(cached['avg_latency_s'] - baseline['avg_latency_s'], 3),
+                "latency_delta_pct": round((cached['avg_latency_s'] / baseline['avg_latency_s'] - 1) * 100, 1),
+                "cost_delta_usd": round(cached['avg_cost_usd'] - baseline['avg_cost_usd'], 6),
+                "cost_delta_pct": (round((cached['avg_cost_usd'] / baseline['avg_cost_usd'] - 1) * 100, 1)
+                                   if baseline['avg_cost_usd'] else None)
+            }
+            if 'avg_ttft_s' in cached and 'avg_ttft_s' in baseline:
+                diff["ttft_delta_s"] = round(cached['avg_ttft_s'] - baseline['avg_ttft_s'], 3)
+            return diff
+
+        summary = {kind: stats(results) for kind, results in samples.items()}
+        benchmark = {
+            "model": name,
+            "prefix_chars": len(prefix),
+            "rounds": rounds,
+            "max_tokens": max_tokens,
+            "failures": failures,
+            **summary,
+            "warm_vs_off": delta(summary['warm'], summary['off']),
+            "cold_vs_off": delta(summary['cold'], summary['off'])
+        }
+        self.cache_benchmark[model_key] = benchmark
+        if benchmark['warm_vs_off']:
+            d = benchmark['warm_vs_off']
+            cost_pct = f" ({d['cost_delta_pct']:+.1f}%)" if d['cost_delta_pct'] is not None else ""
+            print(f"  Warm cache vs no cache: latency {d['latency_delta_s']:+.2f}s ({d['latency_delta_pct']:+.1f}%), "
+                  f"cost ${d['cost_delta_usd']:+.6f}{cost_pct}")
+        elif summary['uncached']['samples']:
+            print("  No cache activity reported (prefix may be below the model's minimum cacheable length)")
+        return benchmark
+
+    def print_cache_benchmark(self):
+        """
+        프롬프트 캐싱 벤치마크 결과를 모델별 표로 출력합니다 (캐시 없음 / cold / warm).
+        Prints the prompt caching benchmark results as a per-model table (no cache / cold / warm).
+        """
+        print(f"\n{'='*60}")
+        print("Prompt Caching Benchmark")
+        print(f"{'='*60}")
+        print(f"  {'Model':20} {'Mode':9} {'Samples':>7} {'Latency':>9} {'TTFT':>7} {'Cost/call':>11}")
+        for bench in self.cache_benchmark.values():
+            for kind in ('off', 'cold', 'warm', 'uncached'):
+                entry = bench[kind]
+                if not entry['samples']:
+                    continue
+                ttft = f"{entry['avg_ttft_s']:.2f}s" if 'avg_ttft_s' in entry else '-'
+                print(f"  {bench['model']:20} {kind:9} {entry['samples']:>7} {entry['avg_latency_s']:>8.2f}s "
+                      f"{ttft:>7} ${entry['avg_cost_usd']:>10.6f}")
+
+    def save_cache_benchmark(self, filename: str = 'cache_benchmark_results.json'):
+        """
+        프롬프트 캐싱 벤치마크 결과를 JSON으로 저장합니다 (warm 캐시 기준 속도·비용 순위 포함).
+        Saves the prompt caching benchmark results as JSON (including latency and cost rankings with a
+        warm cache).
+        """
+        def ranking(kind, field):
+            entries = [(key, bench[kind][field]) for key, bench in self.cache_benchmark.items()
+                       if bench[kind]['samples']]
+            return [{"rank": i + 1, "model": self.models[key]['name'], field: value}
+                    for i, (key, value) in enumerate(sorted(entries, key=lambda x: x[1]))]
+
+        output = {
+            "meta": {
+                "title": "AWS Bedrock 프롬프트 캐싱 벤치마크",
+                "date": datetime.now().strftime('%Y-%m-%d'),
+                "region": self.region,
+                "streaming": self.stream
+            },
+            "models": {key: {"name": self.models[key]['name'], "model_id": self.models[key]['id'],
+                             "pricing_per_1M_tokens": self._pricing(key)}
+                       for key in self.cache_benchmark},
+            "cache_benchmark": self.cache_benchmark,
+            "rankings": {
+                "off": {"by_latency": ranking('off', 'avg_latency_s'), "by_cost": ranking('off', 'avg_cost_usd')},
+                "warm": {"by_latency": ranking('warm', 'avg_latency_s'), "by_cost": ranking('warm', 'avg_cost_usd')}
+            }
+        }
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(output, f, indent=2, ensure_ascii=False)
+        print(f"\nCache benchmark results saved: {filename}")
+
     def compare_results(self, test_result: Dict):
         """
         단일 테스트의 모델별 결과를 비교 출력합니다 (속도, 토큰, 비용, 응답 길이).
@@ -278,52 +1378,197 @@ class BedrockModelComparison:
         print(f"\nResponse Length:")
         for key, r in results.items():
             if r.get('success'):
-                print(f"  {r['model']:20}: {len(r['output_text'])} chars")
+                print(f"  {r['model']:20}: {self._response_chars(r)} chars")
     
-    def save_results(self, filename: str = 'comparison_results.json'):
+    @staticmethod
+    def _streaming_metrics(r: Dict) -> Dict:
+        """
+        스트리밍 호출 결과의 TTFT·ITL·디코드 속도 지표를 JSON용으로 정리합니다.
+        Formats TTFT, inter-token latency and decode speed of a streaming result for JSON.
+        """
+        if not r.get('streaming'):
+            return {}
+
+        def ms(value):
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            "ttft_s": round(r['ttft'], 3) if r['ttft'] is not None else None,
+            "itl_p50_ms": ms(r['itl_p50']),
+            "itl_p90_ms": ms(r['itl_p90']),
+            "itl_p99_ms": ms(r['itl_p99']),
+            "decode_tokens_per_s": round(r['decode_tps'], 1) if r['decode_tps'] is not None else None
+        }
+
+    @staticmethod
+    def _server_metrics(r: Dict) -> Dict:
+        """
+        Converse 호출 결과의 서버 측 지연과 오버헤드(네트워크·대기열)를 JSON용으로 정리합니다.
+        Formats the server-side latency and overhead (network, queueing) of a Converse result for JSON.
+        """
+        if r.get('server_latency') is None:
+            return {}
+        return {
+            "server_latency_s": round(r['server_latency'], 3),
+            "overhead_s": round(r['overhead'], 3)
+        }
+
+    @staticmethod
+    def _retry_metrics(r: Dict) -> Dict:
+        """
+        스로틀링 재시도·속도 제한 대기 지표를 JSON용으로 정리합니다 (latency와 별도).
+        Formats throttle retry and rate-limit wait metrics for JSON (kept apart from latency).
+        """
+        if 'retries' not in r:
+            return {}
+        return {
+            "retries": r['retries'],
+            "retry_wait_s": round(r['retry_wait'], 2),
+            "rate_limit_wait_s": round(r['rate_limit_wait'], 2)
+        }
+
+    def _result_entry(self, r: Dict) -> Dict:
+        """
+        호출 결과 하나를 JSON용 지표 Dict로 정리합니다 (성공 시 지표, 실패 시 에러 메시지).
+        Formats one call result as a JSON metrics Dict (metrics on success, error message on failure).
+        """
+        if r.get('success'):
+            return {
+                "latency_s": round(r['latency'], 3),
+                "input_tokens": r['input_tokens'],
+                "output_tokens": r['output_tokens'],
+                "cost_usd": round(r['total_cost'], 6),
+                "response_chars": self._response_chars(r),
+                "warm": r.get('warm', True),
+                **self._streaming_metrics(r),
+                **self._server_metrics(r),
+                **self._retry_metrics(r)
+            }
+        return {
+            "error": r.get('error', 'Unknown error'),
+            **self._retry_metrics(r)
+        }
+
+    def region_matrix(self, results: Optional[List[Dict]] = None) -> Dict:
+        """
+        (모델 × 리전)별 평균 latency·처리량 행렬과 모델별 최적 리전을 계산합니다 (단일 리전이면 빈 Dict).
+        Computes the (model x region) mean latency/throughput matrix and the best region per model
+        (empty for single-region runs).
+
+        latency는 warm 표본이 있으면 warm 기준이며, 최적 리전은 해당 평균이 가장 낮은 리전입니다.
+        Latency uses warm samples when present; the best region is the one with the lowest such mean.
+        """
+        if results is None:
+            results = self.results
+        cells = {}
+        for test in results:
+            for region, region_results in test.get('region_results', {}).items():
+                for key, r in region_results.items():
+                    cell = cells.setdefault(key, {}).setdefault(region, {'latency': [], 'warm': [], 'tps': [],
+                                                                         'server': [], 'overhead': [],
+                                                                         'failures': 0})
+                    if not r.get('success'):
+                        cell['failures'] += 1
+                        continue
+                    cell['latency'].append(r['latency'])
+                    if r.get('warm', True):
+                        cell['warm'].append(r['latency'])
+                    if r['latency'] > 0:
+                        cell['tps'].append(r['output_tokens'] / r['latency'])
+                    if r.get('server_latency') is not None:
+                        cell['server'].append(r['server_latency'])
+                        cell['overhead'].append(r['overhead'])
+
+        matrix = {}
+        for key in self.models:
+            if key not in cells:
+                continue
+            row = {}
+            for region in self.regions:
+                cell = cells[key].get(region)
+                if not cell:
+                    continue
+                entry = {"samples": len(cell['latency']), "failures": cell['failures']}
+                if cell['latency']:
+                    steady = cell['warm'] or cell['latency']
+                    entry.update({
+                        "avg_latency_s": round(sum(cell['latency']) / len(cell['latency']), 3),
+                        "avg_latency_warm_s": round(sum(steady) / len(steady), 3),
+                        "avg_tokens_per_s": round(sum(cell['tps']) / len(cell['tps']), 1) if cell['tps'] else None
+                    })
+                    # 리전 간 차이가 네트워크에서 오는지 서버에서 오는지 구분
+                    # Tells whether a gap between regions comes from the network or the server
+                    if cell['server']:
+                        entry["avg_server_latency_s"] = round(sum(cell['server']) / len(cell['server']), 3)
+                        entry["avg_overhead_s"] = round(sum(cell['overhead']) / len(cell['overhead']), 3)
+                row[region] = entry
+            ranked = sorted((region for region in row if 'avg_latency_warm_s' in row[region]),
+                            key=lambda region: row[region]['avg_latency_warm_s'])
+            matrix[key] = {"by_region": row}
+            if ranked:
+                matrix[key]["best_region"] = ranked[0]
+        return matrix
+
+    def _pricing(self, model_key: str) -> Dict:
+        """
+        1M 토큰당 가격 (캐시 단가가 있으면 포함) / Price per 1M tokens (with cache rates when defined)
+        """
+        m = self.models[model_key]
+        pricing = {"input": m['input_price'], "output": m['output_price']}
+        if 'cache_write_price' in m:
+            pricing["cache_write"] = m['cache_write_price']
+            pricing["cache_read"] = m['cache_read_price']
+        return pricing
+
+    def save_results(self, filename: str = 'comparison_results.json', results: Optional[List[Dict]] = None):
         """
         테스트 결과를 구조화된 JSON 파일로 저장합니다.
         Saves test results as a structured JSON file.
 
+        results를 주면 self.results 대신 해당 테스트 결과 목록을 저장합니다 (다중 실행 스케줄러용).
+        When results is given it is saved instead of self.results (used by the multi-run scheduler).
+
         JSON 구조 / JSON structure:
           - meta: 테스트 메타 정보 / Test metadata
           - models: 모델 ID, 가격 정보 / Model IDs and pricing
-          - tests: 테스트별 모델 지표 및 순위 / Per-test metrics and rankings
-          - summary: 모델별 평균 통계 및 종합 순위 / Per-model averages and overall rankings
+          - tests: 테스트별 모델 지표 및 순위 (멀티 리전 시 regions 포함) / Per-test metrics and rankings
+                   (plus regions for multi-region runs)
+          - summary: 모델별 평균 통계 및 종합 순위 (멀티 리전 시 region_matrix, best_region 포함)
+                     Per-model averages and overall rankings (plus region_matrix and best_region)
         """
+        # judge 사용량은 프로세스 전체 누적값이므로 self.results를 저장할 때만 포함
+        # Judge usage is a process-wide total, so it is only included when saving self.results
+        include_judge = results is None
+        if results is None:
+            results = self.results
+
         # 모델 정보 구성 / Build model info section
         models_info = {}
         for key, m in self.models.items():
             models_info[key] = {
                 "name": m['name'],
                 "model_id": m['id'],
-                "pricing_per_1M_tokens": {
-                    "input": m['input_price'],
-                    "output": m['output_price']
-                }
+                "pricing_per_1M_tokens": self._pricing(key)
             }
+            if len(self.regions) > 1:
+                models_info[key]["model_id_by_region"] = {name: self._model_ids[(key, name)] for name in self.regions}
 
         # 테스트별 결과 구성 (성공 시 지표, 실패 시 에러 메시지)
         # Build per-test results (metrics on success, error message on failure)
         tests = []
-        for test in self.results:
+        for test in results:
             test_entry = {
                 "test_name": test['test_name'],
                 "results": {}
             }
+            if 'wall_time' in test:
+                test_entry["wall_time_s"] = round(test['wall_time'], 2)
             for model_key, r in test['results'].items():
-                if r.get('success'):
-                    test_entry["results"][model_key] = {
-                        "latency_s": round(r['latency'], 2),
-                        "input_tokens": r['input_tokens'],
-                        "output_tokens": r['output_tokens'],
-                        "cost_usd": round(r['total_cost'], 6),
-                        "response_chars": len(r['output_text'])
-                    }
-                else:
-                    test_entry["results"][model_key] = {
-                        "error": r.get('error', 'Unknown error')
-                    }
+                test_entry["results"][model_key] = self._result_entry(r)
+            # 리전별 결과 (멀티 리전 실행 시) / Per-region results (multi-region runs)
+            if 'region_results' in test:
+                test_entry["regions"] = {region: {key: self._result_entry(r) for key, r in region_results.items()}
+                                         for region, region_results in test['region_results'].items()}
 
             # 테스트별 순위 산출 (성공한 모델만 대상)
             # Determine per-test rankings (only successful models)
@@ -336,14 +1581,27 @@ class BedrockModelComparison:
             tests.append(test_entry)
 
         # 모델별 평균 통계 집계 / Aggregate per-model average statistics
-        all_stats = {key: {'latency': [], 'cost': [], 'tokens': []} for key in self.models}
-        for test in self.results:
+        all_stats = {key: {'latency': [], 'warm_latency': [], 'cost': [], 'tokens': [], 'ttft': [],
+                           'decode_tps': [], 'server_latency': [], 'overhead': [], 'retries': 0, 'retry_wait': 0.0}
+                     for key in self.models}
+        for test in results:
             for model_key in self.models:
                 r = test['results'].get(model_key, {})
+                all_stats[model_key]['retries'] += r.get('retries', 0)
+                all_stats[model_key]['retry_wait'] += r.get('retry_wait', 0.0)
                 if r.get('success'):
                     all_stats[model_key]['latency'].append(r['latency'])
+                    if r.get('warm', True):
+                        all_stats[model_key]['warm_latency'].append(r['latency'])
                     all_stats[model_key]['cost'].append(r['total_cost'])
                     all_stats[model_key]['tokens'].append(r['total_tokens'])
+                    if r.get('ttft') is not None:
+                        all_stats[model_key]['ttft'].append(r['ttft'])
+                    if r.get('decode_tps') is not None:
+                        all_stats[model_key]['decode_tps'].append(r['decode_tps'])
+                    if r.get('server_latency') is not None:
+                        all_stats[model_key]['server_latency'].append(r['server_latency'])
+                        all_stats[model_key]['overhead'].append(r['overhead'])
 
         avg_per_model = {}  # 모델별 평균 latency, 총 비용, 평균 토큰 / Per-model avg latency, total cost, avg tokens
         for key, stats in all_stats.items():
@@ -353,19 +1611,41 @@ class BedrockModelComparison:
                     "total_cost_usd": round(sum(stats['cost']), 6),
                     "avg_tokens": round(sum(stats['tokens']) / len(stats['tokens']))
                 }
-
-        # 종합 순위표 생성 (속도순, 비용순)
-        # Build overall rankings (by latency, by cost)
-        by_latency = sorted(avg_per_model.items(), key=lambda x: x[1]['avg_latency_s'])
+                if stats['ttft']:
+                    avg_per_model[key]["avg_ttft_s"] = round(sum(stats['ttft']) / len(stats['ttft']), 3)
+                if stats['decode_tps']:
+                    avg_per_model[key]["avg_decode_tokens_per_s"] = round(
+                        sum(stats['decode_tps']) / len(stats['decode_tps']), 1)
+                if stats['server_latency']:
+                    avg_per_model[key]["avg_server_latency_s"] = round(
+                        sum(stats['server_latency']) / len(stats['server_latency']), 3)
+                    avg_per_model[key]["avg_overhead_s"] = round(sum(stats['overhead']) / len(stats['overhead']), 3)
+                # warm 표본만의 평균 (정상 상태 성능) / Mean over warm samples only (steady state)
+                if stats['warm_latency']:
+                    avg_per_model[key]["avg_latency_warm_s"] = round(
+                        sum(stats['warm_latency']) / len(stats['warm_latency']), 2)
+                avg_per_model[key]["cold_samples"] = len(stats['latency']) - len(stats['warm_latency'])
+                if stats['retries']:
+                    avg_per_model[key]["total_retries"] = stats['retries']
+                    avg_per_model[key]["total_retry_wait_s"] = round(stats['retry_wait'], 2)
+
+        # 종합 순위표 생성 (속도순은 warm 표본 기준, 비용순)
+        # Build overall rankings (latency on warm samples when available, cost)
+        def steady_latency(v):
+            return v.get('avg_latency_warm_s', v['avg_latency_s'])
+        by_latency = sorted(avg_per_model.items(), key=lambda x: steady_latency(x[1]))
         by_cost = sorted(avg_per_model.items(), key=lambda x: x[1]['total_cost_usd'])
 
         output = {
             "meta": {
                 "title": "AWS Bedrock 경량 모델 비교 테스트",
                 "date": datetime.now().strftime('%Y-%m-%d'),
-                "region": "us-east-1",
+                "regions": self.regions,
                 "max_tokens": 4096,
-                "total_tests": len(self.results)
+                "streaming": self.stream,
+                "api": "converse" if self.converse else "invoke_model",
+                "warmed_up": bool(self.warmup),
+                "total_tests": len(results)
             },
             "models": models_info,
             "tests": tests,
@@ -373,7 +1653,8 @@ class BedrockModelComparison:
                 "average_per_model": avg_per_model,
                 "rankings": {
                     "by_latency": [
-                        {"rank": i+1, "model": self.models[k]['name'], "avg_latency_s": v['avg_latency_s']}
+                        {"rank": i+1, "model": self.models[k]['name'], "avg_latency_s": v['avg_latency_s'],
+                         "avg_latency_warm_s": steady_latency(v)}
                         for i, (k, v) in enumerate(by_latency)
                     ],
                     "by_cost": [
@@ -384,10 +1665,128 @@ class BedrockModelComparison:
             }
         }
 
+        # 워밍업 결과 (실행한 경우에만) / Warm-up results (only if run)
+        if self.warmup:
+            output["summary"]["warm_up"] = self.warmup
+
+        # (모델 × 리전) 지연·처리량 행렬과 모델별 최적 리전 (멀티 리전 실행 시)
+        # (model x region) latency/throughput matrix and best region per model (multi-region runs)
+        region_matrix = self.region_matrix(results)
+        if region_matrix:
+            output["summary"]["region_matrix"] = region_matrix
+            output["summary"]["best_region"] = {key: cells['best_region'] for key, cells in region_matrix.items()
+                                                if 'best_region' in cells}
+
+        # judge 사용량과 프롬프트 캐시 효과 (평가한 경우에만) / Judge usage and prompt cache effect (only if judged)
+        if include_judge and self.judge_usage['calls']:
+            output["summary"]["judge"] = self.judge_summary()
+
+        # 동시성 스윕 결과 (실행한 경우에만) / Concurrency sweep results (only if run)
+        if self.concurrency_sweep:
+            output["summary"]["concurrency_sweep"] = {
+                "by_model": self.concurrency_sweep,
+                "by_knee": [
+                    {"rank": i+1, "model": v['model'], "knee_concurrency": v['knee_concurrency'],
+                     "saturated": v['saturated']}
+                    for i, v in enumerate(sorted(self.concurrency_sweep.values(),
+                                                 key=lambda v: -v['knee_concurrency']))
+                ]
+            }
+
         with open(filename, 'w', encoding='utf-8') as f:
             json.dump(output, f, indent=2, ensure_ascii=False)
         print(f"\nResults saved: {filename}")
 
+    def _invoke_judge(self, prefix: str, suffix: str, max_tokens: int = 300) -> str:
+        """
+        Opus 4.6 judge를 호출하고 응답 텍스트를 반환합니다.
+        Calls the Opus 4.6 judge and returns its response text.
+
+        평가 프롬프트는 두 콘텐츠 블록으로 전송됩니다. 모델 응답마다 동일한 앞부분(평가 지시, 원본 프롬프트,
+        평가 기준, 채점 세부 기준)에는 항상 cache_control을 붙여 Bedrock 프롬프트 캐시에 올리고, 모델 응답이
+        들어가는 뒷부분만 매번 새로 처리됩니다. 앞부분이 judge의 최소 캐시 길이보다 짧으면 Bedrock이 캐시 지점을
+        무시하며, 그런 호출은 응답 usage로 판별해 uncached_calls로 셉니다. 사용량(캐시 읽기/쓰기 토큰 포함)과
+        비용은 judge_usage에 누적됩니다.
+        The eval prompt is sent as two content blocks. The prefix shared by every model response
+        (instructions, original prompt, criteria, scoring rubric) always carries cache_control so it lands in
+        the Bedrock prompt cache, and only the suffix holding the model response is processed afresh. Bedrock
+        ignores the cache point when the prefix is below the judge's minimum cacheable length; such calls are
+        detected from the response usage and counted in uncached_calls. Usage (including cache read/write
+        tokens) and cost accumulate in judge_usage.
+        """
+        eval_payload = {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": max_tokens,
+            "messages": [
+                {"role": "user", "content": [
+                    {"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}},
+                    {"type": "text", "text": suffix}
+                ]}
+            ]
+        }
+        start_time = time.time()
+        eval_response = self.client.invoke_model(
+            modelId=JUDGE_MODEL_ID,
+            body=json.dumps(eval_payload)
+        )
+        eval_body = json.loads(eval_response['body'].read())
+        self._record_judge_usage(eval_body.get('usage', {}), time.time() - start_time)
+        return eval_body['content'][0]['text']
+
+    def _record_judge_usage(self, usage: Dict, latency: float):
+        """
+        judge 호출 하나의 토큰 사용량과 비용을 누적합니다. input_tokens에는 캐시 토큰이 포함되지 않으며,
+        캐시 쓰기·읽기 토큰은 각각 JUDGE_PRICING의 cache_write·cache_read 단가로 계산합니다. 캐시 쓰기도
+        읽기도 없는 호출은 앞부분이 캐시되지 않은 것이므로 uncached_calls로 셉니다.
+        Accumulates one judge call's token usage and cost. input_tokens excludes cached tokens; cache
+        write and read tokens are priced at JUDGE_PRICING's cache_write and cache_read rates. A call with
+        neither cache writes nor reads had its prefix left uncached and is counted in uncached_calls.
+        """
+        tokens = {key: usage.get(key) or 0 for key in
+                  ('input_tokens', 'output_tokens', 'cache_read_input_tokens', 'cache_creation_input_tokens')}
+        cost = (tokens['input_tokens'] * JUDGE_PRICING['input']
+                + tokens['output_tokens'] * JUDGE_PRICING['output']
+                + tokens['cache_creation_input_tokens'] * JUDGE_PRICING['cache_write']
+                + tokens['cache_read_input_tokens'] * JUDGE_PRICING['cache_read']) / 1_000_000
+        with self._judge_lock:
+            self.judge_usage['calls'] += 1
+            if not tokens['cache_read_input_tokens'] and not tokens['cache_creation_input_tokens']:
+                self.judge_usage['uncached_calls'] += 1
+            for key, value in tokens.items():
+                self.judge_usage[key] += value
+            self.judge_usage['cost'] += cost
+            self.judge_usage['latency'] += latency
+
+    def judge_summary(self) -> Dict:
+        """
+        judge 사용량 요약 (캐시 적중률과 캐시 없이 냈을 비용 대비 절감액 포함)
+        Judge usage summary (including cache hit ratio and savings against the uncached cost)
+        """
+        with self._judge_lock:
+            usage = dict(self.judge_usage)
+        prompt_tokens = (usage['input_tokens'] + usage['cache_read_input_tokens']
+                         + usage['cache_creation_input_tokens'])
+        uncached_cost = (prompt_tokens * JUDGE_PRICING['input']
+                         + usage['output_tokens'] * JUDGE_PRICING['output']) / 1_000_000
+        usage['cost'] = round(usage['cost'], 6)
+        usage['avg_latency'] = round(usage.pop('latency') / usage['calls'], 3) if usage['calls'] else None
+        usage['cache_hit_ratio'] = (round(usage['cache_read_input_tokens'] / prompt_tokens, 4)
+                                    if prompt_tokens else None)
+        usage['cache_savings'] = round(uncached_cost - usage['cost'], 6)
+        return usage
+
+    @staticmethod
+    def _extract_json(eval_text: str) -> Optional[Dict]:
+        """
+        judge 응답에서 JSON 부분을 추출합니다 (응답에 부가 텍스트가 있을 수 있음).
+        Extracts the JSON portion of a judge response (response may contain extra text).
+        """
+        json_start = eval_text.find('{')
+        json_end = eval_text.rfind('}') + 1
+        if json_start != -1 and json_end > json_start:
+            return json.loads(eval_text[json_start:json_end])
+        return None
+
     def evaluate_quality(self, test_result: Dict) -> Dict:
         """
         Opus 4.6을 호출하여 각 모델 응답의 품질을 평가합니다.
@@ -408,57 +1807,51 @@ class BedrockModelComparison:
         evaluations = {}
         prompt_text = test_result['prompt']
 
+        # 모든 모델 응답에 공통인 앞부분 (프롬프트 캐시 대상) / Prefix shared by every response (prompt-cached)
+        eval_prefix = f"""당신은 AI 모델 응답 품질 평가 전문가입니다. 아래 프롬프트에 대한 모델의 응답을 평가해주세요.
+
+## 원본 프롬프트
+{prompt_text}
+
+## 평가 기준
+프롬프트 다음에 주어지는 모델 응답을 아래 4가지 기준으로 1~10점 채점하고, 마지막에 한줄 코멘트를 작성해주세요.
+{JUDGE_CRITERIA}
+
+{JUDGE_RUBRIC}
+
+## 출력 형식 (반드시 아래 JSON 형식으로만 응답)
+{{"accuracy": <점수>, "specificity": <점수>, "structure": <점수>, "practicality": <점수>, "comment": "<한줄 코멘트>"}}"""
+
         for model_key, result in test_result['results'].items():
             if not result.get('success'):
                 evaluations[model_key] = {
-                    'error': 'Model invocation failed, skipping evaluation'
+                    'error': 'Model invocation failed, skipping evaluation',
+                    'skipped': True
                 }
                 continue
 
             model_name = result['model']
             response_text = result['output_text']
 
-            eval_prompt = f"""당신은 AI 모델 응답 품질 평가 전문가입니다. 아래 프롬프트에 대한 모델의 응답을 평가해주세요.
-
-## 원본 프롬프트
-{prompt_text}
+            eval_suffix = f"""## 모델 응답 ({model_name})
+{response_text}"""
 
-## 모델 응답 ({model_name})
-{response_text}
-
-## 평가 기준
-다음 4가지 기준으로 1~10점 채점하고, 마지막에 한줄 코멘트를 작성해주세요.
-- 정확성 (Accuracy): 사실 관계 및 기술적 정확성
-- 구체성 (Specificity): 구체적 예시, 수치, 구현 디테일 포함 정도
-- 구조화 (Structure): 논리적 구성, 가독성, 체계적 전개
-- 실용성 (Practicality): 실무에서 바로 적용 가능한 정도
-
-## 출력 형식 (반드시 아래 JSON 형식으로만 응답)
-{{"accuracy": <점수>, "specificity": <점수>, "structure": <점수>, "practicality": <점수>, "comment": "<한줄 코멘트>"}}"""
+            # 동일한 (judge, 평가 프롬프트)는 캐시에서 재사용 / Reuse cached result for identical (judge, eval prompt)
+            cache_key = EvaluationCache.make_key('per-model', JUDGE_MODEL_ID, eval_prefix, eval_suffix)
+            cached = self.eval_cache.get(cache_key) if self.eval_cache else None
+            if cached is not None:
+                print(f"  Evaluating {model_name} with Opus 4.6... (cached)")
+                evaluations[model_key] = cached
+                continue
 
             print(f"  Evaluating {model_name} with Opus 4.6...")
             try:
-                eval_payload = {
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 300,
-                    "messages": [
-                        {"role": "user", "content": eval_prompt}
-                    ]
-                }
-                eval_response = self.client.invoke_model(
-                    modelId='us.anthropic.claude-opus-4-6-v1',
-                    body=json.dumps(eval_payload)
-                )
-                eval_body = json.loads(eval_response['body'].read())
-                eval_text = eval_body['content'][0]['text']
-
-                # JSON 부분 추출 (응답에 부가 텍스트가 있을 수 있음)
-                # Extract JSON portion (response may contain extra text)
-                json_start = eval_text.find('{')
-                json_end = eval_text.rfind('}') + 1
-                if json_start != -1 and json_end > json_start:
-                    eval_json = json.loads(eval_text[json_start:json_end])
+                eval_text = self._invoke_judge(eval_prefix, eval_suffix)
+                eval_json = self._extract_json(eval_text)
+                if eval_json is not None:
                     evaluations[model_key] = eval_json
+                    if self.eval_cache and 'accuracy' in eval_json:
+                        self.eval_cache.put(cache_key, eval_json)
                 else:
                     evaluations[model_key] = {'raw_response': eval_text}
 
@@ -467,6 +1860,123 @@ class BedrockModelComparison:
 
         return evaluations
 
+    def evaluate_quality_batched(self, test_result: Dict) -> Dict:
+        """
+        한 번의 Opus 4.6 호출로 테스트의 모든 성공 응답을 함께 평가합니다.
+        Evaluates all successful responses of a test together in a single Opus 4.6 call.
+
+        원본 프롬프트를 한 번만 전송하므로 judge 호출 수와 입력 토큰이 줄어듭니다.
+        반환 형식은 evaluate_quality와 동일합니다 (모델 키별 accuracy/specificity/structure/practicality/comment).
+        The original prompt is sent once, reducing judge calls and input tokens.
+        Returns the same shape as evaluate_quality (accuracy/specificity/structure/practicality/comment per model key).
+        """
+        evaluations = {}
+        successful = {}
+        cache_keys = {}
+        for model_key, result in test_result['results'].items():
+            if not result.get('success'):
+                evaluations[model_key] = {
+                    'error': 'Model invocation failed, skipping evaluation',
+                    'skipped': True
+                }
+                continue
+
+            # 캐시에 있는 응답은 배치에서 제외 / Responses found in the cache are left out of the batch
+            cache_keys[model_key] = EvaluationCache.make_key(
+                'batched', JUDGE_MODEL_ID, JUDGE_CRITERIA, JUDGE_RUBRIC, test_result['prompt'],
+                result['model'], result['output_text'])
+            cached = self.eval_cache.get(cache_keys[model_key]) if self.eval_cache else None
+            if cached is not None:
+                evaluations[model_key] = cached
+            else:
+                successful[model_key] = result
+
+        if not successful:
+            return evaluations
+
+        response_sections = "\n\n".join(
+            f"## 모델 응답: {model_key} ({result['model']})\n{result['output_text']}"
+            for model_key, result in successful.items()
+        )
+        output_example = ", ".join(
+            f'"{model_key}": {{"accuracy": <점수>, "specificity": <점수>, "structure": <점수>, '
+            f'"practicality": <점수>, "comment": "<한줄 코멘트>"}}'
+            for model_key in successful
+        )
+
+        # 응답 구성과 무관한 앞부분은 프롬프트 캐시 대상 / The prefix independent of the response set is prompt-cached
+        eval_prefix = f"""당신은 AI 모델 응답 품질 평가 전문가입니다. 아래 프롬프트에 대한 여러 모델의 응답을 각각 독립적으로 평가해주세요.
+
+## 원본 프롬프트
+{test_result['prompt']}
+
+## 평가 기준
+프롬프트 다음에 주어지는 각 응답을 아래 4가지 기준으로 1~10점 채점하고, 응답마다 한줄 코멘트를 작성해주세요.
+{JUDGE_CRITERIA}
+
+{JUDGE_RUBRIC}"""
+
+        eval_suffix = f"""{response_sections}
+
+## 출력 형식 (반드시 아래 JSON 형식으로만 응답, 모든 모델 키 포함)
+{{{output_example}}}"""
+
+        print(f"  Evaluating {len(successful)} responses with Opus 4.6 (batched)...")
+        try:
+            eval_text = self._invoke_judge(eval_prefix, eval_suffix, max_tokens=300 * len(successful))
+            eval_json = self._extract_json(eval_text)
+            for model_key in successful:
+                if eval_json is None:
+                    evaluations[model_key] = {'raw_response': eval_text}
+                elif isinstance(eval_json.get(model_key), dict):
+                    evaluations[model_key] = eval_json[model_key]
+                    if self.eval_cache and 'accuracy' in eval_json[model_key]:
+                        self.eval_cache.put(cache_keys[model_key], eval_json[model_key])
+                else:
+                    evaluations[model_key] = {'error': 'Missing from batched judge response'}
+
+        except Exception as e:
+            for model_key in successful:
+                evaluations[model_key] = {'error': str(e)}
+
+        return evaluations
+
+    def evaluate_test(self, test_result: Dict, batched: bool = False) -> Dict:
+        """
+        테스트 하나를 평가합니다. 저널에 평가가 있으면 재사용하고, 새 평가는 끝나는 즉시 기록합니다.
+        Evaluates one test, reusing journaled evaluations and journaling new ones as soon as they finish.
+        """
+        run = test_result.get('run')
+        journaled = self.journal is not None and run is not None
+        if journaled:
+            cached = self.journal.evaluations(run, test_result['test_id'])
+            if cached is not None:
+                print(f"  {test_result['test_name']}: evaluations resumed from journal")
+                return cached
+        evaluations = (self.evaluate_quality_batched if batched else self.evaluate_quality)(test_result)
+        if journaled:
+            self.journal.record_evaluations(run, test_result['test_id'], evaluations)
+        return evaluations
+
+    def evaluate_all(self, test_results: List[Dict], batched: bool = False,
+                     max_workers: int = 5) -> List[Dict]:
+        """
+        여러 테스트의 품질 평가를 병렬로 실행합니다 (테스트 단위 동시 실행).
+        Runs quality evaluation for several tests in parallel (one worker per test).
+
+        Args:
+            test_results: run_test() 결과 목록 / List of run_test() results
+            batched: True이면 테스트당 한 번의 judge 호출로 평가 / One judge call per test when True
+            max_workers: 동시에 평가할 테스트 수 / Number of tests evaluated concurrently
+
+        Returns:
+            List[Dict]: test_results와 같은 순서의 평가 결과 / Evaluations in test_results order
+        """
+        if max_workers <= 1:
+            return [self.evaluate_test(result, batched) for result in test_results]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda result: self.evaluate_test(result, batched), test_results))
+
     def save_test_detail(self, test_result: Dict, evaluations: Dict, filename: str):
         """
         단일 테스트 결과를 품질 평가 포함하여 별도 JSON으로 저장합니다.
@@ -494,15 +2004,25 @@ class BedrockModelComparison:
 
             if result.get('success'):
                 entry["metrics"] = {
-                    "latency_s": round(result['latency'], 2),
+                    "latency_s": round(result['latency'], 3),
                     "input_tokens": result['input_tokens'],
                     "output_tokens": result['output_tokens'],
                     "total_tokens": result['total_tokens'],
-                    "cost_usd": round(result['total_cost'], 6)
+                    "cost_usd": round(result['total_cost'], 6),
+                    "warm": result.get('warm', True),
+                    **self._streaming_metrics(result),
+                    **self._server_metrics(result),
+                    **self._retry_metrics(result)
                 }
+                if result.get('phases'):
+                    entry["metrics"]["phases_ms"] = result['phases']
+                if result.get('streaming'):
+                    entry["metrics"]["chunk_times_s"] = [round(t, 4) for t in result['chunk_times']]
                 entry["response"] = result['output_text']
             else:
                 entry["error"] = result.get('error', 'Unknown error')
+                if result.get('phases'):
+                    entry["phases_ms"] = result['phases']
 
             if model_key in evaluations:
                 entry["quality_evaluation"] = evaluations[model_key]
@@ -513,6 +2033,36 @@ class BedrockModelComparison:
             json.dump(detail, f, indent=2, ensure_ascii=False)
         print(f"\nDetail results saved: {filename}")
 
+    def close_eval_cache(self):
+        """
+        품질 평가 캐시 적중률을 출력하고 캐시를 닫습니다 (캐시를 쓰지 않으면 아무것도 하지 않음).
+        Prints the quality evaluation cache hit rate and closes the cache (no-op without a cache).
+        """
+        if not self.eval_cache:
+            return
+        stats = self.eval_cache.stats()
+        print(f"\nEval cache: {stats['hits']} hits, {stats['misses']} misses "
+              f"(hit rate {stats['hit_rate']:.1%}, {stats['entries']} entries)")
+        self.eval_cache.close()
+
+    def print_judge_usage(self):
+        """
+        judge 호출 수, 캐시 읽기/쓰기 토큰, 비용과 캐시 절감액을 출력합니다.
+        Prints judge calls, cache read/write tokens, cost and cache savings.
+        """
+        if not self.judge_usage['calls']:
+            return
+        usage = self.judge_summary()
+        hit = f"{usage['cache_hit_ratio']:.0%}" if usage['cache_hit_ratio'] is not None else 'n/a'
+        print(f"\nJudge: {usage['calls']} calls, avg {usage['avg_latency']:.2f}s, "
+              f"input {usage['input_tokens']:,} + cache write {usage['cache_creation_input_tokens']:,} "
+              f"+ cache read {usage['cache_read_input_tokens']:,} tokens (hit {hit}), "
+              f"output {usage['output_tokens']:,} tokens")
+        print(f"Judge cost: ${usage['cost']:.6f} (saved ${usage['cache_savings']:.6f} by prompt caching)")
+        if usage['uncached_calls']:
+            print(f"Judge prompt not cached for {usage['uncached_calls']} calls "
+                  f"(shared prefix below the judge's {JUDGE_MIN_CACHE_TOKENS}-token minimum)")
+
     def print_summary(self):
         """
         전체 테스트의 모델별 평균 통계를 콘솔에 출력합니다.
@@ -524,15 +2074,20 @@ class BedrockModelComparison:
 
         # 모든 모델에 대해 동적으로 통계 집계
         # Dynamically aggregate statistics for all models
-        all_stats = {key: {'latency': [], 'cost': [], 'tokens': []} for key in self.models}
+        all_stats = {key: {'latency': [], 'warm_latency': [], 'cost': [], 'tokens': [], 'ttft': []}
+                     for key in self.models}
 
         for test in self.results:
             for model_key in self.models:
                 result = test['results'].get(model_key, {})
                 if result.get('success'):
                     all_stats[model_key]['latency'].append(result['latency'])
+                    if result.get('warm', True):
+                        all_stats[model_key]['warm_latency'].append(result['latency'])
                     all_stats[model_key]['cost'].append(result['total_cost'])
                     all_stats[model_key]['tokens'].append(result['total_tokens'])
+                    if result.get('ttft') is not None:
+                        all_stats[model_key]['ttft'].append(result['ttft'])
 
         print(f"\nTotal tests: {len(self.results)}")
 
@@ -540,129 +2095,354 @@ class BedrockModelComparison:
             if stats['latency']:
                 name = self.models[model_key]['name']
                 print(f"\n{name} Average:")
-                print(f"  Latency: {sum(stats['latency'])/len(stats['latency']):.2f}s")
+                warm = stats['warm_latency']
+                warm_str = f" (warm {sum(warm)/len(warm):.2f}s)" if warm and len(warm) < len(stats['latency']) else ""
+                print(f"  Latency: {sum(stats['latency'])/len(stats['latency']):.2f}s{warm_str}")
+                if stats['ttft']:
+                    print(f"  TTFT: {sum(stats['ttft'])/len(stats['ttft']):.2f}s")
                 print(f"  Total cost: ${sum(stats['cost']):.6f}")
                 print(f"  Avg tokens: {sum(stats['tokens'])/len(stats['tokens']):.0f}")
 
-
-def main():
+        # 모델 × 리전 latency 행렬 (멀티 리전 실행 시) / Model x region latency matrix (multi-region runs)
+        matrix = self.region_matrix()
+        if matrix:
+            print("\nLatency by region (warm avg, s / tok/s):")
+            print(f"  {'':20}  " + "  ".join(f"{region:>18}" for region in self.regions) + "  best")
+            for key, row in matrix.items():
+                cells = []
+                for region in self.regions:
+                    cell = row['by_region'].get(region, {})
+                    if 'avg_latency_warm_s' in cell:
+                        tps = f"{cell['avg_tokens_per_s']:.0f}" if cell['avg_tokens_per_s'] is not None else "-"
+                        cells.append(f"{cell['avg_latency_warm_s']:>9.2f} / {tps:>6}")
+                    else:
+                        cells.append(f"{'failed':>18}")
+                print(f"  {self.models[key]['name']:20}  " + "  ".join(cells) + f"  {row.get('best_region', '-')}")
+
+
+def dataset_output_path(args) -> str:
     """
-    메인 실행 함수: 5가지 테스트 케이스로 모델을 비교하고 결과를 저장합니다.
-    Main entry point: compares models with 5 test cases and saves results.
+    데이터셋 결과 JSONL 경로 (기본: dataset_results[.shardIofN].jsonl)
+    Dataset result JSONL path (default: dataset_results[.shardIofN].jsonl)
     """
-    comparison = BedrockModelComparison(region='us-east-1')
-
-    # 테스트 케이스 정의 / Define test cases
-    # 1. Complex Reasoning        - 복합 추론 (아키텍처 설계)
-    # 2. Advanced Code Gen        - 고급 코드 생성 (LRU 캐시)
-    # 3. Multi-dim Analysis       - 다각도 분석 (B2B 전환)
-    # 4. Technical Translation    - 기술 번역 (한→영)
-    # 5. Technical Translation EN-KO - 기술 번역 (영→한)
-    test_cases = [
-        {
-            'name': 'Complex Reasoning',
-            'prompt': '''다음 상황을 분석하고 해결책을 제시해주세요:
-
-한 글로벌 기업이 3개 대륙(아시아, 유럽, 북미)에 분산된 팀으로 실시간 협업 플랫폼을 구축하려 합니다.
-- 각 지역마다 데이터 주권 법규가 다름
-- 평균 동시 접속자 50만명, 피크 시간대 200만명
-- 99.99% 가용성 요구사항
-- 레이턴시는 100ms 이하 유지 필요
-- 기존 레거시 시스템 3개와 통합 필요
-
-아키텍처 설계 시 고려해야 할 핵심 요소들을 우선순위와 함께 제시하고,
-각 요소에 대한 구체적인 기술 스택과 구현 전략을 설명해주세요.'''
-        },
-        {
-            'name': 'Advanced Code Generation',
-            'prompt': '''다음 요구사항을 만족하는 Python 클래스를 작성해주세요:
-
-1. LRU(Least Recently Used) 캐시를 구현하되, 다음 기능을 포함:
-   - O(1) 시간복잡도로 get/put 연산
-   - TTL(Time To Live) 지원 (각 항목마다 만료 시간 설정 가능)
-   - 메모리 사용량 제한 (바이트 단위)
-   - 통계 정보 제공 (hit rate, miss rate, eviction count)
-   - Thread-safe 구현
-
-2. 타입 힌팅 포함
-3. 주요 메서드에 대한 docstring 작성
-4. 간단한 사용 예제 포함'''
-        },
-        {
-            'name': 'Multi-dimensional Analysis',
-            'prompt': '''다음 비즈니스 시나리오를 다각도로 분석해주세요:
-
-한 AI 스타트업이 B2B SaaS 모델로 전환을 고려 중입니다.
-현재 상황:
-- 현재 B2C 모델, 월 활성 사용자 10만명, 무료 사용자 95%
-- 연간 매출 5억원, 운영비용 8억원 (적자 3억원)
-- 개발팀 15명, 마케팅팀 5명, 영업팀 2명
-- 주요 경쟁사 3곳이 이미 B2B 시장 선점
-- 투자 유치 필요 (Series A, 목표 100억원)
-
-다음 관점에서 분석하고 실행 계획을 제시해주세요:
-1. 재무적 타당성 (손익분기점, 예상 CAC/LTV)
-2. 조직 재편 전략 (인력 구조, 채용 계획)
-3. 제품 전환 로드맵 (기능 우선순위, 마이그레이션 전략)
-4. 시장 진입 전략 (타겟 고객, 가격 정책)
-5. 리스크 요인과 완화 방안'''
-        },
-        {
-            'name': 'Technical Translation',
-            'prompt': '''다음 기술 문서를 자연스러운 영어로 번역하되, 기술 용어의 정확성을 유지해주세요:
+    if args.dataset_output:
+        return args.dataset_output
+    suffix = f'.shard{args.shard_index}of{args.shards}' if args.shards > 1 else ''
+    return f'dataset_results{suffix}.jsonl'
 
-"분산 시스템에서 CAP 정리는 일관성(Consistency), 가용성(Availability), 분할 내성(Partition Tolerance) 중
-최대 2가지만 동시에 보장할 수 있다고 명시합니다. 실제 프로덕션 환경에서는 네트워크 분할이 불가피하므로,
-대부분의 시스템은 일관성과 가용성 사이에서 트레이드오프를 선택해야 합니다.
-이벤트 소싱과 CQRS 패턴을 활용하면 최종 일관성(Eventual Consistency)을 달성하면서도
-높은 가용성을 유지할 수 있습니다. 다만, 이 경우 비즈니스 로직에서 일시적인 불일치 상태를
-처리할 수 있는 보상 트랜잭션(Compensating Transaction) 메커니즘이 필요합니다."'''
-        },
-        {
-            'name': 'Technical Translation EN-KO',
-            'prompt': '''Translate the following technical document into natural, fluent Korean while maintaining the accuracy of technical terms:
 
-"In modern cloud-native architectures, observability is achieved through three pillars: metrics, logs, and traces.
-Metrics provide quantitative measurements of system behavior over time, typically collected via time-series databases
-such as Prometheus or Amazon CloudWatch. Logs capture discrete events with contextual metadata, enabling post-hoc
-debugging through centralized platforms like the ELK stack or Amazon OpenSearch. Distributed tracing, implemented
-through standards like OpenTelemetry, correlates requests across microservice boundaries by propagating trace context
-headers. Together, these pillars enable Site Reliability Engineers (SREs) to define Service Level Objectives (SLOs),
-set error budgets, and implement automated incident response workflows. The key challenge lies in balancing the
-cardinality of collected telemetry data against storage costs and query performance."'''
-        }
-    ]
-    
+def run_dataset(comparison: BedrockModelComparison, args):
+    """
+    JSONL 데이터셋을 제너레이터 파이프라인으로 실행합니다 (읽기 → 샤드 → 호출 → 평가 → 기록).
+    Runs a JSONL dataset through the generator pipeline (read -> shard -> invoke -> judge -> write).
+    """
+    from prompt_dataset import DatasetWriter, invoke_stage, iter_jsonl, judge_stage, shard
+
+    output = dataset_output_path(args)
+    store = None
+    run_id = args.run_id or datetime.now().strftime('%Y%m%dT%H%M%S')
+    if args.store:
+        from results_store import ResultsStore
+        store = ResultsStore(args.store)
+        store.register_models(comparison.models)
+
+    rows = shard(iter_jsonl(args.dataset), args.shards, args.shard_index, args.limit)
+    judged = judge_stage(comparison, invoke_stage(comparison, rows, args.max_tokens), batched=args.batch_judge,
+                         judge_window=args.judge_concurrency, enabled=not args.no_judge)
+    writer = DatasetWriter(comparison, output, store=store, run_id=run_id)
+    try:
+        for record, test_result, evaluations in judged:
+            writer.write(record, test_result, evaluations)
+    finally:
+        writer.close()
+        if store:
+            store.close()
+        if comparison.journal:
+            comparison.journal.close()
+
+    summary = writer.summary()
+    summary_path = output.rsplit('.', 1)[0] + '_summary.json'
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump({"dataset": args.dataset, "shards": args.shards, "shard_index": args.shard_index,
+                   **summary, **({"judge": comparison.judge_summary()} if comparison.judge_usage['calls'] else {})},
+                  f, indent=2, ensure_ascii=False)
+
+    print(f"\n{'='*60}")
+    print(f"Dataset Summary ({summary['rows']} rows, shard {args.shard_index + 1}/{args.shards})")
+    print(f"{'='*60}")
+    for key in summary['by_latency']:
+        m = summary['models'][key]
+        quality = f", quality {m['avg_quality']:.2f}" if 'avg_quality' in m else ''
+        print(f"  {m['model_name']:20}: {m['avg_latency_s']:.2f}s avg, {m['output_tokens_per_s']} tok/s, "
+              f"${m['total_cost_usd']:.4f}, {m['failures']} failed{quality}")
+    comparison.print_judge_usage()
+    print(f"\nDataset results saved: {output}, {summary_path}")
+    if store:
+        print(f"Results appended to {args.store} (run {run_id})")
+    comparison.close_eval_cache()
+
+
+def run_builtin_tests(comparison: BedrockModelComparison, args):
+    """
+    내장 테스트 5종을 실행하고 품질 평가, 저장소 추가, 동시성 스윕, 요약·결과 저장을 수행합니다.
+    Runs the five built-in tests, then quality evaluation, store append, concurrency sweep, summary and
+    result files.
+    """
     # 각 테스트 실행 후 비교 결과 출력 (테스트 간 1초 대기)
     # 모든 테스트 결과를 보관하여 품질 평가에 사용
     # Run each test, print comparison, and wait 1s between tests
     # Keep all test results for quality evaluation
     test_results = []
 
-    for test_case in test_cases:
-        result = comparison.run_test(test_case['prompt'], test_case['name'])
+    for test_case in TEST_CASES:
+        result = comparison.run_test(test_case['prompt'], test_case['name'], run=1)
         comparison.compare_results(result)
         test_results.append(result)
         time.sleep(1)
 
-    # 전체 테스트 결과를 Opus 4.6으로 품질 평가 후 별도 JSON 저장
-    # Evaluate all test results with Opus 4.6 and save as separate JSON files
-    for result in test_results:
+    # 전체 테스트 결과를 Opus 4.6으로 품질 평가 (테스트 간 병렬) 후 별도 JSON 저장
+    # Evaluate all test results with Opus 4.6 (parallel across tests) and save as separate JSON files
+    print(f"\n{'='*60}")
+    print(f"Opus 4.6 Quality Evaluation ({len(test_results)} tests{', batched' if args.batch_judge else ''})")
+    print(f"{'='*60}")
+    all_evaluations = comparison.evaluate_all(test_results, batched=args.batch_judge,
+                                              max_workers=args.judge_concurrency)
+    comparison.print_judge_usage()
+    for result, evaluations in zip(test_results, all_evaluations):
         test_name = result['test_name']
         safe_name = test_name.lower().replace(' ', '_').replace('-', '_')
         filename = f'{safe_name}_results.json'
-        print(f"\n{'='*60}")
-        print(f"Opus 4.6 Quality Evaluation ({test_name})")
-        print(f"{'='*60}")
-        evaluations = comparison.evaluate_quality(result)
         comparison.save_test_detail(result, evaluations, filename)
 
+    # 컬럼형 저장소에 추가 (요청 시, NumPy 필요) / Append to the columnar store (if requested, needs NumPy)
+    if args.store:
+        from results_store import ResultsStore
+        run_id = args.run_id or datetime.now().strftime('%Y%m%dT%H%M%S')
+        store = ResultsStore(args.store)
+        store.register_models(comparison.models)
+        for result, evaluations in zip(test_results, all_evaluations):
+            store.append_test(run_id, result, evaluations)
+        store.close()
+        print(f"Results appended to {args.store} (run {run_id})")
+
+    # 동시성 스윕 (요청 시) / Concurrency sweep (if requested)
+    if args.sweep_levels:
+        levels = [int(level) for level in args.sweep_levels.split(',')]
+        sweep_prompt = next(t['prompt'] for t in TEST_CASES if t['name'] == args.sweep_test)
+        for model_key in comparison.models:
+            comparison.run_concurrency_sweep(model_key, sweep_prompt, levels, args.sweep_duration)
+
     # 전체 요약 출력 / Print overall summary
     comparison.print_summary()
 
     # 구조화된 JSON으로 결과 저장 / Save results as structured JSON
     comparison.save_results()
 
+    comparison.close_eval_cache()
+
+    if comparison.journal:
+        comparison.journal.close()
+
+
+def run_cache_benchmark(comparison: BedrockModelComparison, args):
+    """
+    프롬프트 캐싱 벤치마크 모드: 캐싱을 지원하는 모델마다 내장 테스트 프롬프트를 달라지는 뒷부분으로 삼아
+    캐시 없이/캐시와 함께 호출하고 결과를 cache_benchmark_results.json에 저장합니다.
+    Prompt caching benchmark mode: for every model supporting prompt caching, calls the built-in test
+    prompts as the varying suffix without and with caching and saves cache_benchmark_results.json.
+    """
+    if args.cache_prefix_file:
+        with open(args.cache_prefix_file, encoding='utf-8') as f:
+            prefix = f.read()
+    else:
+        prefix = build_cache_prefix(args.cache_prefix_tokens)
+    suffixes = [f"# 질문\n{case['prompt']}" for case in TEST_CASES]
+
+    for model_key, adapter in comparison._adapters.items():
+        if not adapter.supports_prompt_cache:
+            print(f"Skipping {comparison.models[model_key]['name']}: prompt caching not supported "
+                  f"(format '{adapter.format}')")
+            continue
+        comparison.run_cache_benchmark(model_key, prefix, suffixes, args.cache_rounds, args.cache_max_tokens)
+
+    comparison.print_cache_benchmark()
+    comparison.save_cache_benchmark()
+
+
+def main():
+    """
+    메인 실행 함수: 5가지 테스트 케이스로 모델을 비교하고 결과를 저장합니다.
+    Main entry point: compares models with 5 test cases and saves results.
+    """
+    parser = argparse.ArgumentParser(description='AWS Bedrock Lightweight Model Comparison')
+    parser.add_argument('--region', default='us-east-1',
+                        help='AWS 리전 / AWS region')
+    parser.add_argument('--regions', default=None,
+                        help='동시에 비교할 리전 목록 (예: us-east-1,us-west-2,eu-central-1, 첫 리전이 기본) '
+                             '/ Comma-separated regions to compare concurrently (the first is primary)')
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help='전체 동시 호출 수 (1 = 순차) / Global in-flight request limit (1 = sequential)')
+    parser.add_argument('--per-model-concurrency', type=int, default=1,
+                        help='모델별 동시 호출 수 / Per-model in-flight request limit')
+    parser.add_argument('--stream', action='store_true',
+                        help='스트리밍 API로 호출하여 TTFT·ITL 측정 / Use streaming API to measure TTFT and ITL')
+    parser.add_argument('--converse', action='store_true',
+                        help='Converse API로 호출하여 서버 측 지연(metrics.latencyMs)과 오버헤드 분리 / Use the Converse API to separate server latency from overhead')
+    parser.add_argument('--batch-judge', action='store_true',
+                        help='테스트당 한 번의 Opus 호출로 전체 응답 평가 / Judge all responses of a test in one Opus call')
+    parser.add_argument('--judge-concurrency', type=int, default=5,
+                        help='동시에 평가할 테스트 수 / Number of tests judged in parallel')
+    parser.add_argument('--eval-cache', default='eval_cache.db',
+                        help='품질 평가 캐시 파일 (SQLite) / Quality evaluation cache file (SQLite)')
+    parser.add_argument('--no-eval-cache', action='store_true',
+                        help='품질 평가 캐시 사용 안 함 / Disable the quality evaluation cache')
+    parser.add_argument('--blob-dir', default='response_blobs',
+                        help='응답 텍스트를 내려 쓸 디렉터리 (SHA-256 콘텐츠 주소) / Directory response texts spill to (SHA-256 addressed)')
+    parser.add_argument('--no-blob-store', action='store_true',
+                        help='응답 텍스트를 메모리에 보관 / Keep response texts in memory')
+    parser.add_argument('--journal', metavar='PATH', default=None,
+                        help='완료된 호출·평가 저널 (기본: comparison_journal.jsonl, 데이터셋은 <출력>_journal.jsonl) '
+                             '/ Journal of completed calls and evaluations')
+    parser.add_argument('--no-journal', action='store_true',
+                        help='저널 기록 안 함 / Disable the journal')
+    parser.add_argument('--resume', action='store_true',
+                        help='저널을 재생하고 빠진 호출·평가만 실행 / Replay the journal and only run what is missing')
+    parser.add_argument('--endpoint-url', default=None,
+                        help='bedrock-runtime 엔드포인트 재정의 (예: http://localhost:8080) / Endpoint override')
+    parser.add_argument('--record', metavar='PATH', default=None,
+                        help='모든 Bedrock 호출을 아카이브에 기록 / Record every Bedrock call to an archive')
+    parser.add_argument('--replay', metavar='PATH', default=None,
+                        help='기록된 아카이브로 오프라인 재생 / Replay a recorded archive offline')
+    parser.add_argument('--replay-latency-scale', type=float, default=1.0,
+                        help='재생 지연 시간 배율 (0 = 대기 없음) / Replay latency multiplier (0 = no wait)')
+    parser.add_argument('--sweep-levels', type=str, default=None,
+                        help='동시성 스윕 수준 (예: 1,2,4,8,16) / Concurrency sweep levels, e.g. 1,2,4,8,16')
+    parser.add_argument('--sweep-duration', type=float, default=30,
+                        help='스윕 수준별 측정 시간 (초) / Measurement time per sweep level (seconds)')
+    parser.add_argument('--sweep-test', choices=[t['name'] for t in TEST_CASES], default='Technical Translation',
+                        help='스윕에 사용할 테스트 프롬프트 / Test prompt used for the sweep')
+    parser.add_argument('--rpm', type=float, default=None,
+                        help='모델별 분당 요청 수 제한 / Per-model requests-per-minute limit')
+    parser.add_argument('--tpm', type=float, default=None,
+                        help='모델별 분당 토큰 수 제한 / Per-model tokens-per-minute limit')
+    parser.add_argument('--max-retries', type=int, default=4,
+                        help='스로틀링 시 최대 재시도 횟수 / Maximum retries on throttling')
+    parser.add_argument('--warm-up', action='store_true',
+                        help='테스트 전 모델별 짧은 요청으로 연결 예열 / Pre-open connections with tiny requests per model')
+    parser.add_argument('--max-pool-connections', type=int, default=None,
+                        help='HTTP 연결 풀 크기 / HTTP connection pool size')
+    parser.add_argument('--connect-timeout', type=float, default=10,
+                        help='연결 타임아웃 (초) / Connect timeout (seconds)')
+    parser.add_argument('--read-timeout', type=float, default=300,
+                        help='응답 읽기 타임아웃 (초) / Read timeout (seconds)')
+    parser.add_argument('--store', metavar='PATH', default=None,
+                        help='컬럼형 결과 저장소(SQLite)에 호출별 지표 추가 / Append per-call metrics to the columnar store')
+    parser.add_argument('--run-id', default=None,
+                        help='저장소에 기록할 실행 ID (기본: 시작 시각) / Run ID recorded in the store (default: start time)')
+    parser.add_argument('--dataset', metavar='PATH', default=None,
+                        help='내장 테스트 대신 JSONL 프롬프트 데이터셋을 스트리밍 실행 / Stream a JSONL prompt dataset instead of the built-in tests')
+    parser.add_argument('--shards', type=int, default=1,
+                        help='데이터셋을 나눌 프로세스 수 / Number of processes splitting the dataset')
+    parser.add_argument('--shard-index', type=int, default=0,
+                        help='이 프로세스의 샤드 번호 (0부터) / This process\'s shard index (0-based)')
+    parser.add_argument('--limit', type=int, default=None,
+                        help='샤드당 최대 행 수 / Maximum rows per shard')
+    parser.add_argument('--max-tokens', type=int, default=4096,
+                        help='행에 max_tokens가 없을 때의 최대 출력 토큰 수 / Maximum output tokens when a row has none')
+    parser.add_argument('--no-judge', action='store_true',
+                        help='데이터셋 실행 시 품질 평가 생략 / Skip quality evaluation in dataset mode')
+    parser.add_argument('--dataset-output', metavar='PATH', default=None,
+                        help='데이터셋 결과 JSONL (기본: dataset_results[.shardIofN].jsonl) / Dataset result JSONL')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='실시간 지표 OpenMetrics 엔드포인트 포트 (예: 9464) / Port for the live OpenMetrics endpoint')
+    parser.add_argument('--metrics-file', metavar='PATH', default=None,
+                        help='실시간 지표를 주기적으로 기록할 파일 / File the live metrics are flushed to periodically')
+    parser.add_argument('--metrics-interval', type=float, default=10,
+                        help='지표 파일 기록 주기 (초) / Metrics file flush interval (seconds)')
+    parser.add_argument('--cache-benchmark', action='store_true',
+                        help='내장 테스트 대신 프롬프트 캐싱 벤치마크 실행 (claude, nova) '
+                             '/ Run the prompt caching benchmark instead of the built-in tests')
+    parser.add_argument('--cache-prefix-tokens', type=int, default=6000,
+                        help='공통 앞부분 추정 토큰 수 (문자 수 / 4) / Estimated shared prefix tokens (chars / 4)')
+    parser.add_argument('--cache-prefix-file', metavar='PATH', default=None,
+                        help='공통 앞부분으로 쓸 텍스트 파일 / Text file used as the shared prefix')
+    parser.add_argument('--cache-rounds', type=int, default=2,
+                        help='캐시 벤치마크 라운드 수 (라운드마다 새 캐시) / Benchmark rounds (fresh cache each round)')
+    parser.add_argument('--cache-max-tokens', type=int, default=512,
+                        help='캐시 벤치마크 최대 출력 토큰 수 / Maximum output tokens in the cache benchmark')
+    args = parser.parse_args()
+
+    # 스윕 수준이 연결 풀보다 크면 초과 요청마다 연결·TLS를 새로 맺어 latency가 부풀고 거짓 knee가 생길 수 있으므로
+    # 풀을 최고 수준에 맞춤
+    # Sweep levels above the connection pool would open and discard a connection (and TLS session) per
+    # extra request, inflating latency and possibly producing a false knee, so the pool follows the top level
+    max_pool_connections = args.max_pool_connections
+    if args.sweep_levels:
+        sweep_max = max(int(level) for level in args.sweep_levels.split(','))
+        if max_pool_connections is None:
+            max_pool_connections = max(10, args.concurrency + 2, sweep_max + 2)
+        elif max_pool_connections < sweep_max:
+            parser.error(f'--max-pool-connections ({max_pool_connections}) is smaller than the largest '
+                         f'--sweep-levels level ({sweep_max})')
+
+    # 완료된 호출·평가 저널 (--resume이면 재생 후 이어서 기록, 캐시 벤치마크는 기록 안 함)
+    # Journal of completed calls and evaluations (replayed and appended to with --resume; not used by the
+    # cache benchmark)
+    journal = None
+    if not args.no_journal and not args.cache_benchmark:
+        journal_path = args.journal
+        if journal_path is None:
+            journal_path = (dataset_output_path(args).rsplit('.', 1)[0] + '_journal.jsonl' if args.dataset
+                            else 'comparison_journal.jsonl')
+        journal = RunJournal(journal_path, resume=args.resume)
+        if args.resume:
+            print(f"Resuming from {journal_path}: {journal.resumed_calls} calls, "
+                  f"{journal.resumed_evaluations} evaluations journaled")
+
+    comparison = BedrockModelComparison(
+        region=args.region,
+        regions=args.regions.split(',') if args.regions else None,
+        max_concurrency=args.concurrency,
+        per_model_concurrency=args.per_model_concurrency,
+        stream=args.stream,
+        converse=args.converse,
+        eval_cache=None if args.no_eval_cache else EvaluationCache(args.eval_cache),
+        blob_store=None if args.no_blob_store else BlobStore(args.blob_dir),
+        journal=journal,
+        record_path=args.record,
+        replay_path=args.replay,
+        replay_latency_scale=args.replay_latency_scale,
+        endpoint_url=args.endpoint_url,
+        requests_per_min=args.rpm,
+        tokens_per_min=args.tpm,
+        max_retries=args.max_retries,
+        max_pool_connections=max_pool_connections,
+        connect_timeout=args.connect_timeout,
+        read_timeout=args.read_timeout
+    )
+
+    # 실시간 지표 (요청 시) / Live metrics (if requested)
+    exporter = attach_exporter(comparison, args.metrics_port, args.metrics_file, args.metrics_interval)
+
+    if args.warm_up:
+        comparison.warm_up()
+
+    # 중단되거나 예외가 나도 기록 아카이브와 지표 엔드포인트는 닫음
+    # The recording archive and the metrics endpoint are closed even on Ctrl-C or an exception
+    try:
+        if args.cache_benchmark:
+            run_cache_benchmark(comparison, args)
+        elif args.dataset:
+            run_dataset(comparison, args)
+        else:
+            run_builtin_tests(comparison, args)
+    finally:
+        if exporter:
+            exporter.close()
+        if isinstance(comparison.client, RecordingClient):
+            comparison.client.close()
+            print(f"Recorded Bedrock calls: {args.record}")
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Bedrock 호출 기록/재생 도구
+Bedrock invocation record/replay
+
+RecordingClient는 bedrock-runtime 클라이언트를 감싸 모든 요청 본문, 원본 응답 본문(스트리밍 청크 포함),
+관측된 소요 시간을 gzip 압축 JSONL 아카이브에 기록합니다. ReplayClient는 이 아카이브를 읽어 네트워크 없이
+기록된(또는 배율 조정된) 지연 시간으로 응답을 재생합니다. AWS 자격 증명이 없는 CI 환경에서도 run_test,
+evaluate_quality, save_results, aggregate_results.py를 벤치마크·프로파일링할 수 있습니다.
+Converse / ConverseStream 호출은 파싱된 응답과 이벤트를 그대로 기록합니다.
+
+기록 하나마다 완결된 gzip 멤버 하나를 추가하므로, Ctrl-C나 예외로 close() 없이 끝나도 그때까지의 기록은
+읽을 수 있습니다. 일부만 쓰인 마지막 멤버는 읽을 때 건너뛰고, 이어서 기록할 때 잘라냅니다.
+
+RecordingClient wraps a bedrock-runtime client and writes every request body, raw response body
+(including streaming chunks) and observed timing to a gzip-compressed JSONL archive. ReplayClient
+serves those responses back with the recorded (or scaled) latencies and no network, so run_test,
+evaluate_quality, save_results and aggregate_results.py can be benchmarked and profiled on CI
+machines without AWS credentials. Converse / ConverseStream calls record the parsed response and
+events as they are.
+
+Every record is appended as one complete gzip member, so an archive left without close() by Ctrl-C or
+an exception stays readable up to the last record. A partially written last member is skipped when
+reading and truncated before appending.
+"""
+
+import base64
+import gzip
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+
+# 아카이브 읽기 단위 (바이트) / Archive read size (bytes)
+_READ_CHUNK = 1 << 16
+
+
+def _body_digest(body) -> str:
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    return hashlib.sha256(body).hexdigest()
+
+
+def _scan_archive(path: str) -> Tuple[List[Dict], int]:
+    """
+    아카이브의 gzip 멤버를 차례로 풀어 (기록 목록, 마지막 완결 멤버의 끝 위치)를 반환합니다.
+    일부만 쓰인 마지막 멤버(중단된 기록)는 건너뜁니다.
+    Decompresses the archive's gzip members in order and returns (records, end offset of the last
+    complete member). A partially written last member (an interrupted record) is skipped.
+    """
+    records = []
+    good_end = 0
+    fed = 0  # 현재 멤버에 넣은 바이트 수 / Bytes fed to the current member
+    member = zlib.decompressobj(wbits=31)
+    parts = []
+    buf = b''
+    with open(path, 'rb') as f:
+        while True:
+            if not buf:
+                buf = f.read(_READ_CHUNK)
+                if not buf:
+                    break
+            try:
+                parts.append(member.decompress(buf))
+            except zlib.error:
+                break
+            if not member.eof:
+                fed += len(buf)
+                buf = b''
+                continue
+            good_end += fed + len(buf) - len(member.unused_data)
+            for line in b''.join(parts).decode('utf-8').splitlines():
+                if line.strip():
+                    records.append(json.loads(line))
+            buf = member.unused_data
+            member = zlib.decompressobj(wbits=31)
+            parts = []
+            fed = 0
+    return records, good_end
+
+
+def read_archive(path: str) -> List[Dict]:
+    """
+    아카이브의 완결된 기록 목록 / Complete records of an archive
+    """
+    return _scan_archive(path)[0]
+
+
+class RecordingClient:
+    """
+    bedrock-runtime 클라이언트 기록 래퍼
+    Recording wrapper around a bedrock-runtime client
+
+    invoke_model / invoke_model_with_response_stream / converse / converse_stream 호출을 그대로 전달하면서
+    결과를 아카이브에 추가합니다.
+    Forwards invoke_model / invoke_model_with_response_stream / converse / converse_stream calls and
+    appends the outcome to the archive.
+    """
+
+    def __init__(self, client, path: str, region: Optional[str] = None):
+        self.client = client
+        self.path = path
+        self.region = region
+        self._lock = threading.Lock()
+        # gzip 멤버를 이어 붙이는 방식이므로 기존 아카이브에 추가 기록 가능 (중단된 마지막 멤버는 잘라냄)
+        # Appends gzip members, so an existing archive can be extended (a torn last member is truncated)
+        if os.path.exists(path):
+            _, good_end = _scan_archive(path)
+            if good_end < os.path.getsize(path):
+                print(f"Recorder: dropping a partially written record at the end of {path}")
+                with open(path, 'r+b') as f:
+                    f.truncate(good_end)
+        self._file = open(path, 'ab')
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def sibling(self, client, region: Optional[str] = None) -> 'RecordingClient':
+        """
+        같은 아카이브(파일·락 공유)에 기록하는 다른 클라이언트의 래퍼를 만듭니다 (멀티 리전용).
+        Wraps another client that records into the same archive (shared file and lock; for multi-region).
+        """
+        other = RecordingClient.__new__(RecordingClient)
+        other.client = client
+        other.path = self.path
+        other.region = region
+        other._lock = self._lock
+        other._file = self._file
+        return other
+
+    def _write(self, record: Dict):
+        if self.region:
+            record['region'] = self.region
+        member = gzip.compress((json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8'))
+        with self._lock:
+            self._file.write(member)
+            self._file.flush()
+
+    @staticmethod
+    def _error_fields(e: Exception) -> Dict:
+        fields = {'error': str(e), 'error_type': type(e).__name__}
+        if isinstance(e, ClientError):
+            fields['error_code'] = e.response.get('Error', {}).get('Code')
+            fields['operation'] = e.operation_name
+        return fields
+
+    def invoke_model(self, **kwargs):
+        record = {
+            'op': 'invoke_model',
+            'model_id': kwargs['modelId'],
+            'request': kwargs['body'] if isinstance(kwargs['body'], str) else kwargs['body'].decode('utf-8'),
+            'recorded_at': time.time()
+        }
+        start = time.perf_counter()
+        try:
+            response = self.client.invoke_model(**kwargs)
+            record['latency'] = time.perf_counter() - start
+            raw = response['body'].read()
+            record['read_time'] = time.perf_counter() - start - record['latency']
+            record['response'] = base64.b64encode(raw).decode('ascii')
+        except Exception as e:
+            record['latency'] = time.perf_counter() - start
+            record.update(self._error_fields(e))
+            self._write(record)
+            raise
+        self._write(record)
+        response['body'] = io.BytesIO(raw)
+        return response
+
+    def invoke_model_with_response_stream(self, **kwargs):
+        record = {
+            'op': 'invoke_model_with_response_stream',
+            'model_id': kwargs['modelId'],
+            'request': kwargs['body'] if isinstance(kwargs['body'], str) else kwargs['body'].decode('utf-8'),
+            'recorded_at': time.time()
+        }
+        start = time.perf_counter()
+        try:
+            response = self.client.invoke_model_with_response_stream(**kwargs)
+        except Exception as e:
+            record['latency'] = time.perf_counter() - start
+            record.update(self._error_fields(e))
+            self._write(record)
+            raise
+        record['latency'] = time.perf_counter() - start
+        response['body'] = self._record_stream(response['body'], record, start)
+        return response
+
+    @staticmethod
+    def _converse_request(kwargs: Dict) -> str:
+        # modelId를 뺀 요청 인자를 정렬된 JSON으로 (재생 시 본문 해시 키) / Sorted JSON of the request minus modelId
+        return json.dumps({k: v for k, v in kwargs.items() if k != 'modelId'}, ensure_ascii=False, sort_keys=True)
+
+    def converse(self, **kwargs):
+        record = {
+            'op': 'converse',
+            'model_id': kwargs['modelId'],
+            'request': self._converse_request(kwargs),
+            'recorded_at': time.time()
+        }
+        start = time.perf_counter()
+        try:
+            response = self.client.converse(**kwargs)
+        except Exception as e:
+            record['latency'] = time.perf_counter() - start
+            record.update(self._error_fields(e))
+            self._write(record)
+            raise
+        record['latency'] = time.perf_counter() - start
+        record['response'] = {k: v for k, v in response.items() if k != 'ResponseMetadata'}
+        self._write(record)
+        return response
+
+    def converse_stream(self, **kwargs):
+        record = {
+            'op': 'converse_stream',
+            'model_id': kwargs['modelId'],
+            'request': self._converse_request(kwargs),
+            'recorded_at': time.time()
+        }
+        start = time.perf_counter()
+        try:
+            response = self.client.converse_stream(**kwargs)
+        except Exception as e:
+            record['latency'] = time.perf_counter() - start
+            record.update(self._error_fields(e))
+            self._write(record)
+            raise
+        record['latency'] = time.perf_counter() - start
+        response['stream'] = self._record_events(response['stream'], record, start)
+        return response
+
+    def _record_events(self, events, record: Dict, start: float) -> Iterator[Dict]:
+        recorded = []
+        try:
+            for event in events:
+                recorded.append([time.perf_counter() - start, event])
+                yield event
+        except Exception as e:
+            record.update(self._error_fields(e))
+            raise
+        finally:
+            record['events'] = recorded
+            record['stream_time'] = time.perf_counter() - start
+            self._write(record)
+
+    def _record_stream(self, events, record: Dict, start: float) -> Iterator[Dict]:
+        chunks = []
+        try:
+            for event in events:
+                if 'chunk' in event:
+                    chunks.append([time.perf_counter() - start,
+                                   base64.b64encode(event['chunk']['bytes']).decode('ascii')])
+                yield event
+        except Exception as e:
+            record.update(self._error_fields(e))
+            raise
+        finally:
+            record['chunks'] = chunks
+            record['stream_time'] = time.perf_counter() - start
+            self._write(record)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class _ReplayBody(io.BytesIO):
+    """
+    첫 read()에서 기록된 본문 읽기 시간만큼 대기하는 응답 본문 (send와 body_read 단계를 기록대로 나눔)
+    Response body that waits out the recorded body read time on the first read() (so the send and
+    body_read phases split as recorded)
+    """
+
+    def __init__(self, data: bytes, wait):
+        super().__init__(data)
+        self._wait = wait
+
+    def read(self, *args):
+        if self._wait:
+            self._wait()
+            self._wait = None
+        return super().read(*args)
+
+
+class ReplayClient:
+    """
+    기록된 아카이브 기반 bedrock-runtime 대체 클라이언트
+    Drop-in bedrock-runtime replacement backed by a recorded archive
+
+    (리전, 연산, 모델 ID, 요청 본문 해시)가 일치하는 기록을 순서대로 재생하며, 기록을 모두 소진하면 처음부터
+    반복합니다. strict=False이면 본문이 다른 요청에도 같은 모델의 기록을 사용합니다. 리전이 기록되지 않은
+    (단일 리전) 아카이브의 기록은 모든 리전에서 사용됩니다.
+    Replays records matching (region, operation, model ID, request body hash) in order and cycles once they
+    are exhausted. With strict=False, requests with unseen bodies fall back to any record of the same model.
+    Records without a region (single-region archives) serve every region.
+
+    Args:
+        path: RecordingClient가 작성한 아카이브 경로 / Archive written by RecordingClient
+        latency_scale: 기록된 지연 시간 배율 (0이면 대기 없음) / Multiplier on recorded latencies (0 = no wait)
+        strict: 요청 본문까지 정확히 일치해야 하는지 여부 / Require an exact request body match
+        region: 이 클라이언트가 재생할 리전 (None이면 리전 없는 기록만) / Region this client replays
+                (None = records without a region only)
+    """
+
+    def __init__(self, path: str, latency_scale: float = 1.0, strict: bool = False,
+                 region: Optional[str] = None):
+        self.latency_scale = latency_scale
+        self.strict = strict
+        self.region = region
+        self._lock = threading.Lock()
+        self._exact = defaultdict(list)
+        self._by_model = defaultdict(list)
+        self._cursors = defaultdict(int)
+        for record in read_archive(path):
+            region = record.get('region')
+            key = (region, record['op'], record['model_id'], _body_digest(record['request']))
+            self._exact[key].append(record)
+            self._by_model[(region, record['op'], record['model_id'])].append(record)
+
+    def sibling(self, region: Optional[str]) -> 'ReplayClient':
+        """
+        같은 아카이브(기록·재생 위치 공유)를 다른 리전으로 재생하는 클라이언트를 만듭니다 (멀티 리전용).
+        Creates a client replaying the same archive (shared records and cursors) for another region
+        (for multi-region).
+        """
+        other = ReplayClient.__new__(ReplayClient)
+        other.__dict__.update(self.__dict__)
+        other.region = region
+        return other
+
+    def _lookup(self, region: Optional[str], op: str, model_id: str, digest: str):
+        key = (region, op, model_id, digest)
+        records: List[Dict] = self._exact.get(key)
+        if not records and not self.strict:
+            key = (region, op, model_id)
+            records = self._by_model.get(key)
+        return key, records
+
+    def _next_record(self, op: str, model_id: str, body) -> Dict:
+        digest = _body_digest(body)
+        key, records = self._lookup(self.region, op, model_id, digest)
+        if not records and self.region is not None:
+            # 리전 없는 (단일 리전) 기록으로 대체 / Fall back to region-less (single-region) records
+            key, records = self._lookup(None, op, model_id, digest)
+        if not records:
+            raise ClientError({'Error': {'Code': 'ReplayMiss',
+                                         'Message': f'No recorded {op} response for {model_id}'}}, op)
+        with self._lock:
+            index = self._cursors[key] % len(records)
+            self._cursors[key] += 1
+        return records[index]
+
+    def _sleep(self, seconds: float):
+        if self.latency_scale > 0 and seconds > 0:
+            time.sleep(seconds * self.latency_scale)
+
+    @staticmethod
+    def _raise_recorded(record: Dict):
+        if record.get('error_code'):
+            raise ClientError({'Error': {'Code': record['error_code'], 'Message': record['error']}},
+                              record.get('operation', record['op']))
+        raise RuntimeError(record['error'])
+
+    def invoke_model(self, modelId: str, body, **kwargs):
+        record = self._next_record('invoke_model', modelId, body)
+        self._sleep(record['latency'])
+        if 'response' not in record:
+            self._raise_recorded(record)
+        return {'body': _ReplayBody(base64.b64decode(record['response']),
+                                    lambda: self._sleep(record.get('read_time', 0)))}
+
+    def invoke_model_with_response_stream(self, modelId: str, body, **kwargs):
+        record = self._next_record('invoke_model_with_response_stream', modelId, body)
+        self._sleep(record['latency'])
+        if 'chunks' not in record and 'error' in record:
+            self._raise_recorded(record)
+        return {'body': self._replay_stream(record)}
+
+    def converse(self, modelId: str, **kwargs):
+        record = self._next_record('converse', modelId, RecordingClient._converse_request(kwargs))
+        self._sleep(record['latency'])
+        if 'response' not in record:
+            self._raise_recorded(record)
+        return dict(record['response'])
+
+    def converse_stream(self, modelId: str, **kwargs):
+        record = self._next_record('converse_stream', modelId, RecordingClient._converse_request(kwargs))
+        self._sleep(record['latency'])
+        if 'events' not in record and 'error' in record:
+            self._raise_recorded(record)
+        return {'stream': self._replay_events(record)}
+
+    def _replay_events(self, record: Dict) -> Iterator[Dict]:
+        start = time.perf_counter()
+        base = record['latency']
+        for offset, event in record.get('events', []):
+            self._sleep(offset - base - (time.perf_counter() - start) / (self.latency_scale or 1))
+            yield event
+        if 'error' in record:
+            self._raise_recorded(record)
+
+    def _replay_stream(self, record: Dict) -> Iterator[Dict]:
+        start = time.perf_counter()
+        base = record['latency']
+        for offset, data in record.get('chunks', []):
+            # 청크 도착 간격을 기록된 시각(배율 적용)에 맞춤 / Pace chunks to their recorded (scaled) offsets
+            self._sleep(offset - base - (time.perf_counter() - start) / (self.latency_scale or 1))
+            yield {'chunk': {'bytes': base64.b64decode(data)}}
+        if 'error' in record:
+            self._raise_recorded(record)
@@ -0,0 +1,526 @@
+#!/usr/bin/env python3
+"""
+로컬 Bedrock 대체 서버
+Local Bedrock stand-in server
+
+bedrock-runtime의 InvokeModel / InvokeModelWithResponseStream 프로토콜 중 invoke_model이 생성하는
+5가지 페이로드 형식(claude, nova, llama, mistral, qwen)을 처리하는 로컬 HTTP 스텁입니다.
+모델별 지연 분포(TTFT, 토큰/초), 에러율, ThrottlingException 주입을 설정할 수 있어
+동시성·재시도·부하 테스트 기능을 실제 Bedrock 없이 재현 가능하게 벤치마크할 수 있습니다.
+
+Local HTTP stub speaking the subset of the bedrock-runtime InvokeModel /
+InvokeModelWithResponseStream protocol needed for the five payload formats built by invoke_model
+(claude, nova, llama, mistral, qwen). Per-model latency distributions (TTFT, tokens/sec), error
+rates and ThrottlingException injection are configurable, so concurrency, retry and load-test
+features can be benchmarked deterministically without the real Bedrock.
+
+프롬프트 캐싱(claude cache_control, nova cachePoint)도 흉내 냅니다. 캐시 지점 앞부분이 최소 캐시 길이
+이상이면 처음에는 캐시 쓰기, TTL 안의 같은 앞부분은 캐시 읽기로 usage에 보고하고, 캐시 읽기 토큰은
+prefill 시간이 cache_read_speedup배 짧습니다.
+Prompt caching (claude cache_control, nova cachePoint) is emulated as well: a prefix before the cache
+point of at least the minimum cacheable length is reported as a cache write the first time and as a
+cache read within the TTL, and cache-read tokens prefill cache_read_speedup times faster.
+
+Converse / ConverseStream 요청도 처리합니다. 응답의 metrics.latencyMs는 스텁이 요청을 받은 뒤 응답을
+끝낼 때까지 걸린 시간이므로, 클라이언트 latency와의 차이가 로컬 네트워크·파싱 오버헤드입니다.
+Converse / ConverseStream requests are handled too. metrics.latencyMs in the response is the time the
+stub spent between receiving the request and finishing the response, so the gap to the client-side
+latency is the local network and parsing overhead.
+
+사용법 / Usage:
+    python3 bedrock_stub_server.py --port 8080 [--profile profiles.json] [--seed 0]
+    AWS_ACCESS_KEY_ID=dummy AWS_SECRET_ACCESS_KEY=dummy \\
+        python3 bedrock_model_comparison.py --endpoint-url http://localhost:8080
+"""
+
+import argparse
+import base64
+import json
+import random
+import re
+import struct
+import threading
+import time
+import zlib
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import unquote
+
+# 모델별 기본 프로필 (모델 ID 부분 문자열로 매칭)
+# Default per-model profiles (matched by model ID substring)
+#   ttft_ms: 첫 토큰까지 평균 지연 / Mean time to first token
+#   ttft_sigma: TTFT 로그정규 분포 표준편차 / Lognormal sigma of TTFT
+#   tokens_per_s: 디코드 속도 / Decode speed
+#   output_tokens: 평균 출력 토큰 수 (max_tokens로 제한) / Mean output tokens (capped by max_tokens)
+#   error_rate: 내부 에러(500) 주입 비율 / Injected internal error (500) rate
+#   throttle_rate: ThrottlingException(429) 무작위 주입 비율 / Random ThrottlingException (429) rate
+#   max_concurrency: 초과 시 스로틀되는 동시 요청 수 / In-flight requests beyond which calls are throttled
+#   requests_per_min: 초과 시 스로틀되는 분당 요청 수 (0 = 무제한) / Requests/min quota (0 = unlimited)
+#   prefill_tokens_per_s: 캐시되지 않은 입력 토큰 처리 속도 (TTFT에 추가) / Uncached input tokens/sec (added to TTFT)
+#   cache_read_speedup: 캐시 읽기 토큰의 prefill 속도 배율 / Prefill speedup for cache-read tokens
+#   min_cache_tokens: 캐시되는 최소 앞부분 토큰 수 / Minimum prefix tokens that get cached
+#   cache_ttl_s: 캐시 항목 유지 시간 (접근 시 갱신) / Cache entry lifetime (refreshed on access)
+DEFAULT_PROFILES = {
+    'default': {'ttft_ms': 500, 'ttft_sigma': 0.2, 'tokens_per_s': 100, 'output_tokens': 800,
+                'error_rate': 0.0, 'throttle_rate': 0.0, 'max_concurrency': 50, 'requests_per_min': 0,
+                'prefill_tokens_per_s': 5000, 'cache_read_speedup': 10, 'min_cache_tokens': 1024,
+                'cache_ttl_s': 300},
+    'claude-haiku': {'ttft_ms': 600, 'tokens_per_s': 175, 'output_tokens': 2800, 'min_cache_tokens': 4096},
+    'qwen': {'ttft_ms': 400, 'tokens_per_s': 102, 'output_tokens': 1500},
+    'nova': {'ttft_ms': 350, 'tokens_per_s': 160, 'output_tokens': 2100},
+    'llama': {'ttft_ms': 450, 'tokens_per_s': 175, 'output_tokens': 4000},
+    'ministral': {'ttft_ms': 300, 'tokens_per_s': 207, 'output_tokens': 2200},
+    'opus': {'ttft_ms': 1500, 'tokens_per_s': 60, 'output_tokens': 80},
+}
+
+WORDS = ('latency throughput region model token cache stream request response quota batch '
+         'partition replica consistency availability metric trace log index shard queue').split()
+
+# 에러 코드 → HTTP 상태 / Error code → HTTP status
+ERROR_STATUS = {'ThrottlingException': 429, 'InternalServerException': 500,
+                'ValidationException': 400, 'ResourceNotFoundException': 404}
+
+
+def encode_event(payload: bytes, headers: Dict[str, str]) -> bytes:
+    """
+    AWS event stream 메시지 하나를 인코딩합니다 (prelude + 헤더 + 페이로드 + CRC32).
+    Encodes a single AWS event stream message (prelude + headers + payload + CRC32).
+    """
+    header_bytes = b''
+    for name, value in headers.items():
+        name_raw = name.encode('utf-8')
+        value_raw = value.encode('utf-8')
+        # 헤더 값 타입 7 = string / Header value type 7 = string
+        header_bytes += struct.pack('>B', len(name_raw)) + name_raw + struct.pack('>BH', 7, len(value_raw)) + value_raw
+    total_length = 12 + len(header_bytes) + len(payload) + 4
+    prelude = struct.pack('>II', total_length, len(header_bytes))
+    prelude += struct.pack('>I', zlib.crc32(prelude) & 0xffffffff)
+    message = prelude + header_bytes + payload
+    return message + struct.pack('>I', zlib.crc32(message) & 0xffffffff)
+
+
+def detect_format(payload: Dict) -> str:
+    """
+    요청 페이로드 구조로 provider 형식을 판별합니다.
+    Detects the provider format from the request payload shape.
+    """
+    if 'anthropic_version' in payload:
+        return 'claude'
+    if 'inferenceConfig' in payload:
+        return 'nova'
+    if 'prompt' in payload:
+        return 'llama'
+    return 'chat'  # mistral / qwen
+
+
+def prompt_text(payload: Dict) -> str:
+    if 'prompt' in payload:
+        return payload['prompt']
+    parts = []
+    for message in payload.get('messages', []):
+        content = message.get('content')
+        if isinstance(content, str):
+            parts.append(content)
+        else:
+            parts.extend(block.get('text', '') for block in content or [])
+    return ''.join(parts)
+
+
+def cached_prefix(payload: Dict) -> Optional[str]:
+    """
+    마지막 캐시 지점(claude cache_control, nova cachePoint) 앞의 텍스트를 반환합니다 (없으면 None).
+    Returns the text before the last cache point (claude cache_control, nova cachePoint), or None.
+    """
+    parts = []
+    prefix = None
+    for message in payload.get('messages', []):
+        content = message.get('content')
+        if isinstance(content, str):
+            parts.append(content)
+            continue
+        for block in content or []:
+            if 'cachePoint' in block:
+                prefix = ''.join(parts)
+            parts.append(block.get('text', ''))
+            if 'cache_control' in block:
+                prefix = ''.join(parts)
+    return prefix
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    토큰 수를 추정합니다. ASCII는 4자당 1토큰, 한국어 등 그 밖의 문자는 1자당 1토큰으로 셉니다.
+    Estimates the token count: 4 ASCII characters per token, one token per other (e.g. Korean) character.
+    """
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return (len(text) - non_ascii) // 4 + non_ascii
+
+
+def max_tokens_of(payload: Dict) -> int:
+    inference = payload.get('inferenceConfig', {})
+    return (payload.get('max_tokens') or payload.get('max_gen_len')
+            or inference.get('max_new_tokens') or inference.get('maxTokens') or 4096)
+
+
+class StubState:
+    """
+    프로필, 난수 생성기, 모델별 동시 요청·요청 시각 추적 상태
+    Profiles, RNG, and per-model in-flight / request-time tracking
+    """
+
+    def __init__(self, profiles: Dict, seed: int = 0):
+        self.profiles = profiles
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.in_flight = defaultdict(int)
+        self.request_times = defaultdict(deque)
+        self.prompt_cache = {}  # (모델 ID, 앞부분) → 만료 시각 / (model ID, prefix) → expiry time
+
+    def profile_for(self, model_id: str) -> Dict:
+        profile = dict(self.profiles['default'])
+        for key, overrides in self.profiles.items():
+            if key != 'default' and key in model_id:
+                profile.update(overrides)
+                break
+        return profile
+
+    def admit(self, model_id: str, profile: Dict) -> Optional[str]:
+        """
+        요청을 받아들이면 None, 거부하면 에러 코드를 반환합니다.
+        Returns None if the request is admitted, otherwise an error code.
+        """
+        with self.lock:
+            now = time.time()
+            window = self.request_times[model_id]
+            while window and window[0] < now - 60:
+                window.popleft()
+            if profile['requests_per_min'] and len(window) >= profile['requests_per_min']:
+                return 'ThrottlingException'
+            if self.in_flight[model_id] >= profile['max_concurrency']:
+                return 'ThrottlingException'
+            roll = self.rng.random()
+            if roll < profile['throttle_rate']:
+                return 'ThrottlingException'
+            if roll < profile['throttle_rate'] + profile['error_rate']:
+                return 'InternalServerException'
+            window.append(now)
+            self.in_flight[model_id] += 1
+        return None
+
+    def release(self, model_id: str):
+        with self.lock:
+            self.in_flight[model_id] -= 1
+
+    def cache_lookup(self, model_id: str, prefix: str, ttl: float) -> bool:
+        """
+        앞부분이 캐시에 있으면 True (적중 시 TTL 갱신), 없으면 캐시에 넣고 False를 반환합니다.
+        Returns True if the prefix is cached (refreshing its TTL), otherwise caches it and returns False.
+        """
+        with self.lock:
+            now = time.time()
+            key = (model_id, prefix)
+            hit = self.prompt_cache.get(key, 0) > now
+            self.prompt_cache[key] = now + ttl
+        return hit
+
+    def sample(self, profile: Dict, max_tokens: int) -> Tuple[float, int]:
+        """
+        (TTFT 초, 출력 토큰 수)를 샘플링합니다.
+        Samples (TTFT seconds, output token count).
+        """
+        with self.lock:
+            ttft = profile['ttft_ms'] / 1000 * self.rng.lognormvariate(0, profile['ttft_sigma'])
+            tokens = int(self.rng.gauss(profile['output_tokens'], profile['output_tokens'] * 0.1))
+        return ttft, max(1, min(tokens, max_tokens))
+
+
+def synthetic_text(payload: Dict, output_tokens: int) -> str:
+    """
+    합성 응답 텍스트를 생성합니다. 품질 평가 요청에는 채점 JSON을 반환합니다.
+    Builds synthetic response text; quality judge requests get a scoring JSON.
+    """
+    text = prompt_text(payload)
+    if '"accuracy"' in text:
+        score = {"accuracy": 7, "specificity": 7, "structure": 7, "practicality": 7, "comment": "stub evaluation"}
+        keys = re.findall(r'## 모델 응답: (\S+) \(', text)
+        return json.dumps({key: score for key in keys} if keys else score, ensure_ascii=False)
+    return ' '.join(WORDS[i % len(WORDS)] for i in range(output_tokens))
+
+
+def claude_usage(input_tokens: int, output_tokens: int, cache: Optional[Dict]) -> Dict:
+    usage = {'input_tokens': input_tokens, 'output_tokens': output_tokens}
+    if cache is not None:
+        usage['cache_read_input_tokens'] = cache['read']
+        usage['cache_creation_input_tokens'] = cache['write']
+    return usage
+
+
+def nova_usage(input_tokens: int, output_tokens: int, cache: Optional[Dict]) -> Dict:
+    usage = {'inputTokens': input_tokens, 'outputTokens': output_tokens}
+    if cache is not None:
+        usage['cacheReadInputTokenCount'] = cache['read']
+        usage['cacheWriteInputTokenCount'] = cache['write']
+    return usage
+
+
+def response_body(fmt: str, text: str, input_tokens: int, output_tokens: int, cache: Optional[Dict] = None) -> Dict:
+    """
+    형식별 응답 본문 (cache는 캐시 지점이 있는 요청의 {'read', 'write'} 토큰 수)
+    Per-format response body (cache holds {'read', 'write'} token counts for requests with a cache point)
+    """
+    if fmt == 'claude':
+        return {'content': [{'type': 'text', 'text': text}], 'stop_reason': 'end_turn',
+                'usage': claude_usage(input_tokens, output_tokens, cache)}
+    if fmt == 'nova':
+        return {'output': {'message': {'role': 'assistant', 'content': [{'text': text}]}},
+                'stopReason': 'end_turn', 'usage': nova_usage(input_tokens, output_tokens, cache)}
+    if fmt == 'llama':
+        return {'generation': text, 'prompt_token_count': input_tokens,
+                'generation_token_count': output_tokens, 'stop_reason': 'stop'}
+    return {'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': input_tokens, 'completion_tokens': output_tokens}}
+
+
+def converse_usage(input_tokens: int, output_tokens: int, cache: Optional[Dict]) -> Dict:
+    usage = {'inputTokens': input_tokens, 'outputTokens': output_tokens,
+             'totalTokens': input_tokens + output_tokens}
+    if cache is not None:
+        usage['cacheReadInputTokens'] = cache['read']
+        usage['cacheWriteInputTokens'] = cache['write']
+        usage['totalTokens'] += cache['read'] + cache['write']
+    return usage
+
+
+def stream_chunks(fmt: str, pieces, input_tokens: int, output_tokens: int, cache: Optional[Dict] = None):
+    """
+    형식별 스트리밍 청크 JSON을 순서대로 생성합니다 (마지막 청크에 invocationMetrics 포함).
+    Yields per-format streaming chunk JSON (the last chunk carries invocationMetrics).
+    """
+    if fmt == 'claude':
+        yield {'type': 'message_start', 'message': {'usage': claude_usage(input_tokens, 0, cache)}}
+        for piece in pieces:
+            yield {'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': piece}}
+        yield {'type': 'message_delta', 'delta': {'stop_reason': 'end_turn'}, 'usage': {'output_tokens': output_tokens}}
+        last = {'type': 'message_stop'}
+    elif fmt == 'nova':
+        yield {'messageStart': {'role': 'assistant'}}
+        for piece in pieces:
+            yield {'contentBlockDelta': {'delta': {'text': piece}, 'contentBlockIndex': 0}}
+        yield {'messageStop': {'stopReason': 'end_turn'}}
+        last = {'metadata': {'usage': nova_usage(input_tokens, output_tokens, cache)}}
+    elif fmt == 'llama':
+        for i, piece in enumerate(pieces):
+            yield {'generation': piece, 'prompt_token_count': input_tokens if i == 0 else None,
+                   'generation_token_count': i + 1, 'stop_reason': None}
+        last = {'generation': '', 'prompt_token_count': None, 'generation_token_count': output_tokens,
+                'stop_reason': 'stop'}
+    else:
+        for piece in pieces:
+            yield {'choices': [{'index': 0, 'delta': {'content': piece}, 'finish_reason': None}]}
+        last = {'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]}
+    last['amazon-bedrock-invocationMetrics'] = {'inputTokenCount': input_tokens, 'outputTokenCount': output_tokens}
+    if cache is not None:
+        last['amazon-bedrock-invocationMetrics'].update(cacheReadInputTokenCount=cache['read'],
+                                                        cacheWriteInputTokenCount=cache['write'])
+    yield last
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    /model/{modelId}/invoke, invoke-with-response-stream, converse, converse-stream 처리기
+    Handler for /model/{modelId}/invoke, invoke-with-response-stream, converse and converse-stream
+    """
+
+    protocol_version = 'HTTP/1.1'
+    state: StubState = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: Dict, headers: Optional[Dict] = None):
+        raw = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(raw)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _send_error(self, code: str, message: str):
+        self._send_json(ERROR_STATUS.get(code, 500), {'message': message}, {'x-amzn-ErrorType': code})
+
+    def do_POST(self):
+        received = time.time()
+        match = re.match(r'^/model/(.+)/(invoke|invoke-with-response-stream|converse|converse-stream)$', self.path)
+        raw = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if not match:
+            self._send_error('ResourceNotFoundException', f'Unknown path {self.path}')
+            return
+        model_id, operation = unquote(match.group(1)), match.group(2)
+        try:
+            payload = json.loads(raw)
+        except ValueError:
+            self._send_error('ValidationException', 'Malformed input request')
+            return
+
+        profile = self.state.profile_for(model_id)
+        error = self.state.admit(model_id, profile)
+        if error:
+            self._send_error(error, f'Stub {error} for {model_id}')
+            return
+
+        try:
+            fmt = detect_format(payload)
+            ttft, output_tokens = self.state.sample(profile, max_tokens_of(payload))
+            text = synthetic_text(payload, output_tokens)
+            input_tokens = max(1, estimate_tokens(prompt_text(payload)))
+            cache = self._prompt_cache(model_id, profile, payload)
+            if cache is not None:
+                input_tokens = max(1, input_tokens - cache['read'] - cache['write'])
+            # prefill: 캐시 읽기 토큰은 cache_read_speedup배 빠름 / Cache-read tokens prefill cache_read_speedup x faster
+            cached_read = cache['read'] if cache else 0
+            ttft += ((input_tokens + (cache['write'] if cache else 0)
+                      + cached_read / profile['cache_read_speedup']) / profile['prefill_tokens_per_s'])
+            decode_time = output_tokens / profile['tokens_per_s']
+            if operation == 'converse':
+                time.sleep(ttft + decode_time)
+                self._send_json(200, {
+                    'output': {'message': {'role': 'assistant', 'content': [{'text': text}]}},
+                    'stopReason': 'end_turn',
+                    'usage': converse_usage(input_tokens, output_tokens, cache),
+                    'metrics': {'latencyMs': round((time.time() - received) * 1000)}
+                })
+            elif operation == 'converse-stream':
+                self._converse_stream(text, ttft, decode_time, input_tokens, output_tokens, cache, received)
+            elif operation == 'invoke':
+                time.sleep(ttft + decode_time)
+                self._send_json(200, response_body(fmt, text, input_tokens, output_tokens, cache),
+                                {'x-amzn-bedrock-input-token-count': str(input_tokens),
+                                 'x-amzn-bedrock-output-token-count': str(output_tokens)})
+            else:
+                self._stream(fmt, text, ttft, decode_time, input_tokens, output_tokens, cache)
+        finally:
+            self.state.release(model_id)
+
+    def _prompt_cache(self, model_id: str, profile: Dict, payload: Dict) -> Optional[Dict]:
+        """
+        캐시 지점이 있는 요청의 캐시 읽기/쓰기 토큰 수 {'read', 'write'} (캐시 지점이 없으면 None)
+        Cache read/write token counts {'read', 'write'} for a request with a cache point (None without one)
+        """
+        prefix = cached_prefix(payload)
+        if prefix is None:
+            return None
+        prefix_tokens = estimate_tokens(prefix)
+        if prefix_tokens < profile['min_cache_tokens']:
+            return {'read': 0, 'write': 0}
+        if self.state.cache_lookup(model_id, prefix, profile['cache_ttl_s']):
+            return {'read': prefix_tokens, 'write': 0}
+        return {'read': 0, 'write': prefix_tokens}
+
+    def _start_event_stream(self, text: str, decode_time: float):
+        """
+        이벤트 스트림 응답 헤더를 보내고 (청크 조각 목록, 조각 간격)을 반환합니다.
+        Sends the event stream response headers and returns (pieces, interval between pieces).
+        """
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/vnd.amazon.eventstream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        # 단어 4개씩 청크로 나누어 디코드 속도에 맞춰 전송 / Send 4-word pieces paced to the decode speed
+        words = text.split(' ')
+        pieces = [' '.join(words[i:i + 4]) + ' ' for i in range(0, len(words), 4)]
+        return pieces, decode_time / max(1, len(pieces))
+
+    def _write_event(self, payload: Dict, event_type: str):
+        event = encode_event(json.dumps(payload).encode('utf-8'),
+                             {':event-type': event_type, ':content-type': 'application/json',
+                              ':message-type': 'event'})
+        self.wfile.write(f'{len(event):X}\r\n'.encode('ascii') + event + b'\r\n')
+        self.wfile.flush()
+
+    def _converse_stream(self, text: str, ttft: float, decode_time: float, input_tokens: int,
+                         output_tokens: int, cache: Optional[Dict], received: float):
+        pieces, interval = self._start_event_stream(text, decode_time)
+        start = time.time()
+        time.sleep(ttft)
+        self._write_event({'role': 'assistant'}, 'messageStart')
+        for sent, piece in enumerate(pieces):
+            delay = start + ttft + sent * interval - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            self._write_event({'contentBlockIndex': 0, 'delta': {'text': piece}}, 'contentBlockDelta')
+        self._write_event({'contentBlockIndex': 0}, 'contentBlockStop')
+        self._write_event({'stopReason': 'end_turn'}, 'messageStop')
+        self._write_event({'usage': converse_usage(input_tokens, output_tokens, cache),
+                           'metrics': {'latencyMs': round((time.time() - received) * 1000)}}, 'metadata')
+        self.wfile.write(b'0\r\n\r\n')
+        self.wfile.flush()
+
+    def _stream(self, fmt: str, text: str, ttft: float, decode_time: float,
+                input_tokens: int, output_tokens: int, cache: Optional[Dict] = None):
+        pieces, interval = self._start_event_stream(text, decode_time)
+        start = time.time()
+        time.sleep(ttft)
+        sent = 0
+        for chunk in stream_chunks(fmt, pieces, input_tokens, output_tokens, cache):
+            if chunk.get('type') == 'content_block_delta' or 'contentBlockDelta' in chunk \
+                    or chunk.get('generation') or chunk.get('choices', [{}])[0].get('delta', {}).get('content'):
+                delay = start + ttft + sent * interval - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                sent += 1
+            self._write_event({'bytes': base64.b64encode(json.dumps(chunk).encode('utf-8')).decode('ascii')},
+                              'chunk')
+        self.wfile.write(b'0\r\n\r\n')
+        self.wfile.flush()
+
+
+def load_profiles(path: Optional[str] = None) -> Dict:
+    """
+    기본 프로필에 JSON 파일의 프로필을 덮어써 반환합니다.
+    Returns the default profiles overridden by those in a JSON file.
+    """
+    profiles = {key: dict(value) for key, value in DEFAULT_PROFILES.items()}
+    if path:
+        with open(path, encoding='utf-8') as f:
+            for key, overrides in json.load(f).items():
+                profiles.setdefault(key, {}).update(overrides)
+    return profiles
+
+
+def start_stub_server(port: int = 8080, profiles: Optional[Dict] = None, seed: int = 0,
+                      host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """
+    백그라운드 스레드에서 스텁 서버를 시작하고 서버 객체를 반환합니다 (shutdown()으로 종료).
+    Starts the stub server on a background thread and returns it (stop with shutdown()).
+    """
+    handler = type('BoundStubHandler', (StubHandler,), {'state': StubState(profiles or load_profiles(), seed)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Bedrock stand-in server')
+    parser.add_argument('--host', default='127.0.0.1', help='바인드 주소 / Bind address')
+    parser.add_argument('--port', type=int, default=8080, help='포트 / Port')
+    parser.add_argument('--profile', default=None,
+                        help='모델별 프로필 JSON (기본값 덮어쓰기) / Per-model profile JSON overriding defaults')
+    parser.add_argument('--seed', type=int, default=0, help='난수 시드 / Random seed')
+    args = parser.parse_args()
+
+    server = start_stub_server(args.port, load_profiles(args.profile), args.seed, args.host)
+    print(f"Bedrock stub listening on http://{args.host}:{args.port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
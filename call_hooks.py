@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+호출 단계별 고해상도 타이밍과 훅 인터페이스
+High-resolution per-phase call timing and hook interface
+
+PhaseTimer는 단조 증가하는 나노초 시계(time.perf_counter_ns)로 호출 하나를 단계별로 나눠 측정합니다:
+  - serialize: 요청 본문 직렬화 / Request body serialization
+  - send: 요청 전송부터 응답 헤더(첫 바이트)까지 / Sending the request until the response headers (first byte)
+  - body_read: 응답 본문(또는 스트림 이벤트) 수신 / Reading the response body (or stream events)
+  - parse: JSON 디코딩과 provider별 응답 파싱 / JSON decoding and provider response parsing
+  - cost: 비용 계산 / Cost computation
+같은 단계를 여러 번 표시하면 누적되므로 스트리밍 루프의 수신/파싱 시간도 단계별로 합산됩니다.
+
+CallHooks를 상속해 필요한 메서드만 구현하면 추적·지표 수집을 호출 경로에 연결할 수 있습니다.
+훅에서 발생한 예외는 경고만 출력하고 호출 결과에는 영향을 주지 않습니다.
+
+PhaseTimer splits one call into phases using the monotonic nanosecond clock (time.perf_counter_ns).
+Marking the same phase repeatedly accumulates, so receive/parse time inside a streaming loop is summed
+per phase. Subclass CallHooks and implement only the methods you need to attach tracing or metrics to
+the call path. Exceptions raised by hooks are reported as warnings and never affect the call result.
+"""
+
+import time
+from typing import Dict, List, Optional
+
+# 결과에 기록하는 단계 순서 / Phase order as recorded in results
+PHASES = ('serialize', 'send', 'body_read', 'parse', 'cost')
+
+
+class PhaseTimer:
+    """
+    나노초 단위 단계별 누적 타이머
+    Nanosecond per-phase accumulating timer
+    """
+
+    __slots__ = ('start_ns', '_last_ns', '_phases')
+
+    def __init__(self):
+        self.start_ns = self._last_ns = time.perf_counter_ns()
+        self._phases: Dict[str, int] = {}
+
+    def mark(self, phase: str) -> int:
+        """
+        직전 표시 이후 경과 시간을 phase에 더하고 현재 시각(ns)을 반환합니다.
+        Adds the time since the previous mark to `phase` and returns the current time (ns).
+        """
+        now = time.perf_counter_ns()
+        self._phases[phase] = self._phases.get(phase, 0) + now - self._last_ns
+        self._last_ns = now
+        return now
+
+    def ns(self, *phases: str) -> int:
+        """
+        주어진 단계들의 합 (ns) / Sum of the given phases (ns)
+        """
+        return sum(self._phases.get(p, 0) for p in phases)
+
+    def seconds(self, *phases: str) -> float:
+        """
+        주어진 단계들의 합 (초) / Sum of the given phases (seconds)
+        """
+        return self.ns(*phases) / 1e9
+
+    def since_start(self, now_ns: int) -> float:
+        """
+        타이머 시작부터 now_ns까지 (초) / Seconds from the timer start to now_ns
+        """
+        return (now_ns - self.start_ns) / 1e9
+
+    def as_ms(self) -> Dict[str, float]:
+        """
+        측정된 단계별 시간 (ms, PHASES 순서) / Measured phase times (ms, in PHASES order)
+        """
+        return {p: round(self._phases[p] / 1e6, 3) for p in PHASES if p in self._phases}
+
+
+class CallHooks:
+    """
+    모델 호출 훅 기본 클래스 (모든 메서드는 기본적으로 아무것도 하지 않음)
+    Base class for model call hooks (every method is a no-op by default)
+
+    context는 호출마다 새로 만들어지는 dict로 model_key, model_id, region, stream, api, max_tokens, prompt_chars,
+    warm을 담으며, 훅이 같은 호출의 pre/post 사이에 값을 저장하는 데 써도 됩니다.
+    context is a fresh dict per call carrying model_key, model_id, region, stream, api, max_tokens, prompt_chars
+    and warm; hooks may store their own values in it between pre and post callbacks of one call.
+    """
+
+    def pre_request(self, context: Dict):
+        """
+        요청 직렬화 전에 호출됩니다. / Called before the request is serialized.
+        """
+
+    def post_response(self, context: Dict, result: Dict):
+        """
+        성공한 호출의 결과(phases 포함)가 완성된 뒤 호출됩니다.
+        Called once the result of a successful call (including phases) is complete.
+        """
+
+    def on_error(self, context: Dict, error: Exception, result: Dict):
+        """
+        호출이 실패했을 때 실패 결과와 함께 호출됩니다 (스로틀링되어 재시도될 시도 포함).
+        Called with the failure result when a call fails (including throttled attempts that will be retried).
+        """
+
+
+def dispatch(hooks: Optional[List[CallHooks]], event: str, *args):
+    """
+    등록된 모든 훅의 event 메서드를 호출합니다. 훅 예외는 경고로만 출력합니다.
+    Calls the `event` method of every registered hook; hook exceptions are only printed as warnings.
+    """
+    for hook in hooks or ():
+        try:
+            getattr(hook, event)(*args)
+        except Exception as e:
+            print(f"  Warning: {type(hook).__name__}.{event} failed: {e}")
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+메모리 사용량이 일정한 호출 결과 보관
+Bounded-memory storage of call results
+
+호출 결과 Dict는 모델당 최대 수천 토큰의 output_text와 청크 도착 시각 목록을 담고 있어, 실행 내내
+보관하면 프롬프트 수에 비례해 메모리가 늘어납니다. CallRecord는 지표를 __slots__ 객체와 array 하나씩에
+압축해 보관하고, 응답 텍스트는 BlobStore(SHA-256 콘텐츠 주소 기반 디스크 저장소)에 내려 쓴 뒤 해시만
+남깁니다. 텍스트는 품질 평가나 상세 결과 저장처럼 실제로 필요할 때만 mmap으로 읽으며 캐시하지 않습니다.
+
+CallRecord는 Mapping이므로(r['latency'], r.get('ttft'), 'retries' in r) 기존 결과 Dict를
+쓰던 코드를 그대로 사용할 수 있습니다.
+
+A call result Dict carries output_text (up to thousands of tokens per model) and the list of chunk
+arrival times, so keeping every result for the whole run grows memory with the number of prompts.
+CallRecord packs the metrics into a __slots__ object plus one array per numeric type, and spills the
+response text to a BlobStore (an on-disk store content-addressed by SHA-256), keeping only the hash.
+The text is read back through mmap only when it is actually needed (quality evaluation, detail files)
+and is never cached.
+
+CallRecord is a Mapping (r['latency'], r.get('ttft'), 'retries' in r), so code written
+against the result Dicts works unchanged.
+"""
+
+import hashlib
+import math
+import mmap
+import os
+import sys
+import threading
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Optional
+
+from call_hooks import PHASES
+
+# array('d')에 담는 실수 지표 (None은 NaN) / Float metrics packed into array('d') (None is NaN)
+FLOAT_FIELDS = ('latency', 'input_cost', 'output_cost', 'total_cost', 'retry_wait', 'rate_limit_wait',
+                'ttft', 'itl_p50', 'itl_p90', 'itl_p99', 'decode_tps', 'server_latency', 'overhead')
+# array('q')에 담는 정수 지표 (None은 -1) / Integer metrics packed into array('q') (None is -1)
+INT_FIELDS = ('input_tokens', 'output_tokens', 'total_tokens', 'retries', 'cache_read_tokens', 'cache_write_tokens')
+# 비트 플래그 / Bit flags
+FLAG_FIELDS = ('success', 'warm', 'streaming', 'throttled')
+# 문자열 필드 (None이면 없음) / String fields (None means absent)
+STR_FIELDS = ('model', 'model_key', 'region', 'timestamp', 'error')
+
+_PACKED = FLOAT_FIELDS + INT_FIELDS + FLAG_FIELDS
+_BIT = {name: 1 << i for i, name in enumerate(_PACKED)}
+_FLOAT_INDEX = {name: i for i, name in enumerate(FLOAT_FIELDS)}
+_INT_INDEX = {name: i for i, name in enumerate(INT_FIELDS)}
+
+
+class BlobStore:
+    """
+    SHA-256 콘텐츠 주소 기반 응답 텍스트 저장소 (파일 하나당 blob 하나)
+    Response text store content-addressed by SHA-256 (one file per blob)
+
+    blob은 directory/<해시 앞 2자리>/<해시> 경로에 임시 파일 + 원자적 이름 변경으로 기록되므로 같은 텍스트는
+    한 번만 저장되고, 여러 스레드·프로세스가 같은 디렉터리를 함께 써도 안전합니다.
+    Blobs are written to directory/<first 2 hex chars>/<hash> via a temporary file and an atomic rename,
+    so identical texts are stored once and several threads or processes can share one directory.
+
+    Args:
+        directory: blob 디렉터리 (없으면 생성) / Blob directory (created if missing)
+    """
+
+    def __init__(self, directory: str = 'response_blobs'):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, sha: str) -> str:
+        return os.path.join(self.directory, sha[:2], sha)
+
+    def put(self, text: str) -> str:
+        """
+        텍스트를 저장하고 SHA-256 해시를 반환합니다 (이미 있으면 쓰지 않음).
+        Stores the text and returns its SHA-256 hash (nothing is written if it already exists).
+        """
+        data = text.encode('utf-8')
+        sha = hashlib.sha256(data).hexdigest()
+        path = self._path(sha)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return sha
+
+    def get(self, sha: str) -> str:
+        """
+        해시에 해당하는 텍스트를 mmap으로 읽어 반환합니다.
+        Reads the text for a hash through mmap.
+        """
+        with open(self._path(sha), 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return ''
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                return m[:].decode('utf-8')
+
+    def __contains__(self, sha: str) -> bool:
+        return os.path.exists(self._path(sha))
+
+
+class CallRecord(Mapping):
+    """
+    호출 결과 하나의 압축 표현 (Mapping)
+    Compact representation of one call result (Mapping)
+
+    실수·정수 지표는 array 하나씩에, 불리언은 비트 플래그에 담고, 어떤 키가 원래 결과에 있었는지는
+    _present 비트로 구분합니다 (예: 실패 결과에는 'latency'가 없음). phases와 chunk_times도 array로
+    보관하며, 알 수 없는 추가 키는 _extra Dict에 둡니다.
+    Float and integer metrics live in one array each and booleans in bit flags; _present bits record
+    which keys the original result had (a failure has no 'latency', for example). phases and
+    chunk_times are kept as arrays as well, and unknown extra keys go into the _extra Dict.
+    """
+
+    __slots__ = ('_floats', '_ints', '_flags', '_present', '_phases', '_chunk_times', '_text', '_blobs',
+                 '_extra', 'response_sha256', 'response_chars') + STR_FIELDS
+
+    def __init__(self, result: Dict, blobs: Optional[BlobStore] = None):
+        self._floats = array('d', [math.nan] * len(FLOAT_FIELDS))
+        self._ints = array('q', [-1] * len(INT_FIELDS))
+        self._flags = 0
+        self._present = 0
+        self._phases = None
+        self._chunk_times = None
+        self._text = None
+        self._blobs = None
+        self._extra = None
+        self.response_sha256 = None
+        self.response_chars = None
+        for name in STR_FIELDS:
+            setattr(self, name, None)
+        for key, value in result.items():
+            self[key] = value
+        if self._text is not None and blobs is not None:
+            self.response_sha256 = blobs.put(self._text)
+            self._blobs = blobs
+            self._text = None
+
+    def __setitem__(self, key: str, value):
+        if key in _FLOAT_INDEX:
+            self._floats[_FLOAT_INDEX[key]] = math.nan if value is None else value
+            self._present |= _BIT[key]
+        elif key in _INT_INDEX:
+            self._ints[_INT_INDEX[key]] = -1 if value is None else value
+            self._present |= _BIT[key]
+        elif key in _BIT:
+            self._flags = self._flags | _BIT[key] if value else self._flags & ~_BIT[key]
+            self._present |= _BIT[key]
+        elif key in STR_FIELDS:
+            setattr(self, key, sys.intern(value) if key in ('model', 'model_key', 'region') else value)
+        elif key == 'output_text':
+            self._text = value
+            self.response_chars = len(value)
+        elif key == 'phases':
+            self._phases = array('d', (value.get(p, math.nan) for p in PHASES))
+        elif key == 'chunk_times':
+            self._chunk_times = array('d', value)
+        elif key in ('response_chars', 'response_sha256'):
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __getitem__(self, key: str):
+        if key in _FLOAT_INDEX:
+            if self._present & _BIT[key]:
+                value = self._floats[_FLOAT_INDEX[key]]
+                return None if math.isnan(value) else value
+        elif key in _INT_INDEX:
+            if self._present & _BIT[key]:
+                value = self._ints[_INT_INDEX[key]]
+                return None if value < 0 else value
+        elif key in _BIT:
+            if self._present & _BIT[key]:
+                return bool(self._flags & _BIT[key])
+        elif key in STR_FIELDS or key in ('response_chars', 'response_sha256'):
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        elif key == 'output_text':
+            if self.response_chars is not None:
+                return self.output_text
+        elif key == 'phases':
+            if self._phases is not None:
+                return {p: v for p, v in zip(PHASES, self._phases) if not math.isnan(v)}
+        elif key == 'chunk_times':
+            if self._chunk_times is not None:
+                return list(self._chunk_times)
+        elif self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        # output_text 존재 여부는 텍스트를 읽지 않고 판단 / Check output_text without reading the text
+        if key == 'output_text':
+            return self.response_chars is not None
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        for name in _PACKED:
+            if self._present & _BIT[name]:
+                yield name
+        for name in STR_FIELDS + ('response_chars', 'response_sha256'):
+            if getattr(self, name) is not None:
+                yield name
+        if self.response_chars is not None:
+            yield 'output_text'
+        if self._phases is not None:
+            yield 'phases'
+        if self._chunk_times is not None:
+            yield 'chunk_times'
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    @property
+    def output_text(self) -> str:
+        """
+        응답 텍스트 (blob 저장소에 있으면 매번 디스크에서 읽음)
+        Response text (read from disk on every access when spilled to the blob store)
+        """
+        if self._text is not None:
+            return self._text
+        return self._blobs.get(self.response_sha256)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+품질 평가 결과 영구 캐시
+Persistent cache for quality evaluations
+
+(judge 모델, 채점 기준, 원본 프롬프트, 응답 텍스트)의 해시를 키로 Opus 평가 결과를 SQLite에 저장합니다.
+동일한 입력이 다시 평가될 때 judge 호출을 생략하여 평가 시간과 Opus 비용을 줄입니다.
+
+Stores Opus evaluation results in SQLite, keyed by a hash of (judge model, rubric, original prompt,
+response text). Repeated inputs skip the judge call, cutting evaluation time and Opus spend.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+
+class EvaluationCache:
+    """
+    콘텐츠 주소 기반 품질 평가 캐시 (SQLite)
+    Content-addressed quality evaluation cache (SQLite)
+
+    항목 수(max_entries) 초과 시 가장 오래 사용되지 않은 항목부터, 보관 기간(max_age_days) 초과 시
+    생성 시각 기준으로 제거합니다.
+    Evicts least recently used entries beyond max_entries, and entries older than max_age_days.
+    """
+
+    def __init__(self, path: str = 'eval_cache.db', max_entries: int = 10000, max_age_days: float = 30):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS evaluations ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON evaluations (accessed_at)")
+        self._conn.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """
+        입력 구성 요소들의 SHA-256 해시를 캐시 키로 반환합니다.
+        Returns the SHA-256 hash of the given parts as a cache key.
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        캐시된 평가 결과를 반환합니다 (없으면 None). 적중/미스 카운터를 갱신합니다.
+        Returns the cached evaluation or None, updating the hit/miss counters.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM evaluations WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE evaluations SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Dict):
+        """
+        평가 결과를 저장합니다.
+        Stores an evaluation result.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO evaluations (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now)
+            )
+            self._conn.commit()
+
+    def evict(self):
+        """
+        보관 기간이 지난 항목과 항목 수 한도를 넘는 오래된 항목을 제거합니다.
+        Removes expired entries and the least recently used entries beyond max_entries.
+        """
+        with self._lock:
+            cutoff = time.time() - self.max_age_days * 86400
+            self._conn.execute("DELETE FROM evaluations WHERE created_at < ?", (cutoff,))
+            self._conn.execute(
+                "DELETE FROM evaluations WHERE key IN ("
+                " SELECT key FROM evaluations ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict:
+        """
+        적중/미스 횟수와 저장 항목 수를 반환합니다.
+        Returns hit/miss counts and the number of stored entries.
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0,
+            "entries": entries
+        }
+
+    def close(self):
+        """
+        종료 전 한도를 적용하고 연결을 닫습니다.
+        Applies eviction limits and closes the connection.
+        """
+        self.evict()
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+AWS Bedrock 경량 모델 부하 테스트 도구
+AWS Bedrock Lightweight Model Load Test Tool
+
+목표 도착률(고정 간격 또는 포아송)로 요청을 발생시키는 open-loop 부하 생성기입니다.
+요청은 이전 요청의 완료 여부와 관계없이 예정된 시각에 발행되며, 모델별로 지정된 시간 동안
+실행한 뒤 달성 처리량, 에러/스로틀 비율, latency 백분위수를 보고합니다.
+
+Open-loop load generator that issues requests at a target arrival rate (constant or Poisson).
+Requests are sent at their scheduled time regardless of whether earlier requests have completed.
+Each model runs for a fixed duration, then achieved throughput, error/throttle rate and latency
+percentiles are reported.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List
+
+from bedrock_model_comparison import BedrockModelComparison, TEST_CASES, latency_summary
+from metrics_exporter import attach_exporter
+from rate_limit import THROTTLE_ERROR_CODES
+
+
+def is_throttle_error(error: str) -> bool:
+    """
+    에러 메시지가 스로틀링/쿼터 초과인지 판별합니다.
+    Returns True if the error message indicates throttling or quota exhaustion.
+    """
+    return any(code in error for code in THROTTLE_ERROR_CODES)
+
+
+def arrival_offsets(rate: float, duration: float, arrival: str = 'constant', seed: int = 0) -> List[float]:
+    """
+    부하 구간 내 요청 발행 시각(시작 기준, 초) 목록을 생성합니다.
+    Generates request send offsets (seconds from start) within the load window.
+
+    Args:
+        rate: 목표 도착률 (요청/초) / Target arrival rate (requests/sec)
+        duration: 부하 구간 길이 (초) / Load window length (seconds)
+        arrival: 'constant' (고정 간격) 또는 'poisson' (지수 분포 간격)
+                 'constant' (fixed spacing) or 'poisson' (exponential inter-arrival)
+        seed: 포아송 난수 시드 / Random seed for Poisson arrivals
+    """
+    offsets = []
+    if arrival == 'poisson':
+        rng = random.Random(seed)
+        t = rng.expovariate(rate)
+        while t < duration:
+            offsets.append(t)
+            t += rng.expovariate(rate)
+    else:
+        n = int(duration * rate)
+        offsets = [i / rate for i in range(n)]
+    return offsets
+
+
+def run_open_loop(comparison: BedrockModelComparison, model_key: str, prompt: str,
+                  rate: float, duration: float, arrival: str = 'constant',
+                  max_tokens: int = 4096, max_in_flight: int = 256, seed: int = 0) -> Dict:
+    """
+    단일 모델에 대해 open-loop 부하를 발생시키고 결과를 집계합니다.
+    Drives open-loop load against a single model and aggregates the outcome.
+
+    latency는 invoke_model이 측정한 서비스 시간이고, response_time은 예정 발행 시각부터
+    완료까지의 시간입니다 (클라이언트 포화로 인한 대기 포함, coordinated omission 방지).
+    latency is the service time measured by invoke_model; response_time runs from the scheduled
+    send time to completion (includes client-side queueing, avoiding coordinated omission).
+
+    Args:
+        comparison: 호출에 사용할 BedrockModelComparison / Comparison instance used for calls
+        model_key: 대상 모델 키 / Target model key
+        prompt: 입력 프롬프트 / Input prompt
+        rate: 목표 도착률 (요청/초) / Target arrival rate (requests/sec)
+        duration: 부하 구간 길이 (초) / Load window length (seconds)
+        arrival: 'constant' 또는 'poisson' / 'constant' or 'poisson'
+        max_tokens: 최대 출력 토큰 수 / Maximum output tokens
+        max_in_flight: 동시 진행 요청 상한 (초과분은 대기) / Cap on in-flight requests (excess waits)
+        seed: 포아송 난수 시드 / Random seed for Poisson arrivals
+    """
+    invoke = comparison._invoker()
+    offsets = arrival_offsets(rate, duration, arrival, seed)
+    samples = []
+    lock = threading.Lock()
+    in_flight = 0
+    peak_in_flight = 0
+
+    def fire(scheduled: float):
+        nonlocal in_flight, peak_in_flight
+        with lock:
+            in_flight += 1
+            peak_in_flight = max(peak_in_flight, in_flight)
+        result = invoke(model_key, prompt, max_tokens)
+        done = time.time()
+        with lock:
+            in_flight -= 1
+            samples.append((scheduled, done, result))
+
+    print(f"\nLoad test: {comparison.models[model_key]['name']} "
+          f"({arrival}, {rate} req/s, {duration}s, {len(offsets)} requests)")
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        for offset in offsets:
+            # 예정 시각까지 대기 후 완료 여부와 관계없이 발행
+            # Wait until the scheduled time, then send regardless of completions
+            delay = start + offset - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(fire, start + offset)
+    elapsed = time.time() - start
+
+    successes = [r for _, _, r in samples if r['success']]
+    errors = [r for _, _, r in samples if not r['success']]
+    throttles = [r for r in errors if is_throttle_error(r['error'])]
+    latencies = [r['latency'] for r in successes]
+    response_times = [done - scheduled for scheduled, done, r in samples if r['success']]
+    output_tokens = sum(r['output_tokens'] for r in successes)
+
+    report = {
+        "model": comparison.models[model_key]['name'],
+        "arrival": arrival,
+        "target_rate_rps": rate,
+        "duration_s": duration,
+        "elapsed_s": round(elapsed, 2),
+        "requests_sent": len(samples),
+        "offered_rps": round(len(samples) / duration, 3) if duration > 0 else 0,
+        "successes": len(successes),
+        "errors": len(errors),
+        "throttles": len(throttles),
+        "error_rate": round(len(errors) / len(samples), 4) if samples else 0,
+        "throttle_rate": round(len(throttles) / len(samples), 4) if samples else 0,
+        "achieved_rps": round(len(successes) / elapsed, 3) if elapsed > 0 else 0,
+        "output_tokens_per_s": round(output_tokens / elapsed, 1) if elapsed > 0 else 0,
+        "peak_in_flight": peak_in_flight,
+        "latency": latency_summary(latencies),
+        "response_time": latency_summary(response_times),
+        "total_cost_usd": round(sum(r['total_cost'] for r in successes), 6)
+    }
+    if any(r.get('ttft') is not None for r in successes):
+        report["ttft"] = latency_summary([r['ttft'] for r in successes if r.get('ttft') is not None])
+    if any(r.get('server_latency') is not None for r in successes):
+        # 부하가 오를 때 늘어나는 쪽이 서버인지 네트워크·대기열인지 구분
+        # Shows whether growth under load comes from the server or from network and queueing
+        report["server_latency"] = latency_summary([r['server_latency'] for r in successes
+                                                    if r.get('server_latency') is not None])
+        report["overhead"] = latency_summary([r['overhead'] for r in successes if r.get('overhead') is not None])
+    if errors:
+        # 에러 메시지별 건수 (상위 5개) / Counts per error message (top 5)
+        counts = {}
+        for r in errors:
+            counts[r['error']] = counts.get(r['error'], 0) + 1
+        report["top_errors"] = dict(sorted(counts.items(), key=lambda x: -x[1])[:5])
+
+    lat = report['latency']
+    print(f"  {report['successes']}/{report['requests_sent']} ok, "
+          f"{report['achieved_rps']} req/s, throttled {report['throttle_rate']:.1%}, "
+          f"p50 {lat.get('p50_s', 0):.2f}s p95 {lat.get('p95_s', 0):.2f}s p99 {lat.get('p99_s', 0):.2f}s")
+    return report
+
+
+def main():
+    """
+    부하 테스트 실행 함수: 선택한 모델들을 차례로 open-loop 부하로 측정하고 JSON으로 저장합니다.
+    Load test entry point: measures each selected model under open-loop load and saves JSON.
+    """
+    test_names = [t['name'] for t in TEST_CASES]
+    parser = argparse.ArgumentParser(description='AWS Bedrock open-loop load test')
+    parser.add_argument('--rate', type=float, required=True,
+                        help='목표 도착률 (요청/초) / Target arrival rate (requests/sec)')
+    parser.add_argument('--duration', type=float, default=60,
+                        help='모델별 부하 구간 (초) / Load window per model (seconds)')
+    parser.add_argument('--arrival', choices=['constant', 'poisson'], default='constant',
+                        help='도착 분포 / Arrival process')
+    parser.add_argument('--models', nargs='+',
+                        help='대상 모델 키 (기본: 전체) / Model keys to test (default: all)')
+    parser.add_argument('--test', choices=test_names, default='Technical Translation',
+                        help='사용할 테스트 프롬프트 / Test prompt to use')
+    parser.add_argument('--max-tokens', type=int, default=4096,
+                        help='최대 출력 토큰 수 / Maximum output tokens')
+    parser.add_argument('--max-in-flight', type=int, default=256,
+                        help='동시 진행 요청 상한 / Cap on in-flight requests')
+    parser.add_argument('--connect-timeout', type=float, default=10,
+                        help='연결 타임아웃 (초) / Connect timeout (seconds)')
+    parser.add_argument('--read-timeout', type=float, default=300,
+                        help='응답 읽기 타임아웃 (초) / Read timeout (seconds)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='포아송 난수 시드 / Random seed for Poisson arrivals')
+    parser.add_argument('--stream', action='store_true',
+                        help='스트리밍 API로 호출하여 TTFT 측정 / Use streaming API to measure TTFT')
+    parser.add_argument('--converse', action='store_true',
+                        help='Converse API로 호출하여 서버 측 지연(metrics.latencyMs)과 오버헤드 분리 / Use the Converse API to separate server latency from overhead')
+    parser.add_argument('--endpoint-url', default=None,
+                        help='bedrock-runtime 엔드포인트 재정의 (예: http://localhost:8080) / Endpoint override')
+    parser.add_argument('--replay', metavar='PATH', default=None,
+                        help='기록된 아카이브로 오프라인 재생 / Replay a recorded archive offline')
+    parser.add_argument('--replay-latency-scale', type=float, default=1.0,
+                        help='재생 지연 시간 배율 (0 = 대기 없음) / Replay latency multiplier (0 = no wait)')
+    parser.add_argument('--output', default='load_test_results.json',
+                        help='결과 JSON 파일명 / Output JSON filename')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='실시간 지표 OpenMetrics 엔드포인트 포트 (예: 9464) / Port for the live OpenMetrics endpoint')
+    parser.add_argument('--metrics-file', metavar='PATH', default=None,
+                        help='실시간 지표를 주기적으로 기록할 파일 / File the live metrics are flushed to periodically')
+    parser.add_argument('--metrics-interval', type=float, default=10,
+                        help='지표 파일 기록 주기 (초) / Metrics file flush interval (seconds)')
+    args = parser.parse_args()
+
+    # 진행 중인 요청마다 연결을 재사용하도록 풀을 --max-in-flight에 맞춤 (풀을 넘는 요청은 매번 연결·TLS를
+    # 새로 맺어 p95/p99가 부풀려짐)
+    # Size the pool to --max-in-flight so every in-flight request reuses a connection (requests beyond the
+    # pool would pay a fresh connection and TLS handshake each time, inflating p95/p99)
+    comparison = BedrockModelComparison(region='us-east-1', stream=args.stream, converse=args.converse,
+                                        replay_path=args.replay,
+                                        replay_latency_scale=args.replay_latency_scale,
+                                        endpoint_url=args.endpoint_url,
+                                        max_pool_connections=args.max_in_flight,
+                                        connect_timeout=args.connect_timeout,
+                                        read_timeout=args.read_timeout)
+    # 실시간 지표 (요청 시) / Live metrics (if requested)
+    exporter = attach_exporter(comparison, args.metrics_port, args.metrics_file, args.metrics_interval)
+    prompt = next(t['prompt'] for t in TEST_CASES if t['name'] == args.test)
+
+    results = {}
+    for model_key in args.models or list(comparison.models):
+        results[model_key] = run_open_loop(
+            comparison, model_key, prompt, args.rate, args.duration, args.arrival,
+            max_tokens=args.max_tokens, max_in_flight=args.max_in_flight, seed=args.seed
+        )
+
+    output = {
+        "meta": {
+            "title": "AWS Bedrock 경량 모델 부하 테스트",
+            "date": datetime.now().strftime('%Y-%m-%d'),
+            "test_name": args.test,
+            "arrival": args.arrival,
+            "target_rate_rps": args.rate,
+            "duration_s": args.duration,
+            "max_tokens": args.max_tokens,
+            "streaming": args.stream,
+            "api": "converse" if args.converse else "invoke_model"
+        },
+        "results": results
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2, ensure_ascii=False)
+    print(f"\nLoad test results saved: {args.output}")
+    if exporter:
+        exporter.close()
+
+
+if __name__ == '__main__':
+    main()
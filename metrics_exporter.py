@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+실행 중 실시간 지표 내보내기 (OpenMetrics)
+Live metrics exporter for in-progress runs (OpenMetrics)
+
+MetricsExporter는 CallHooks로 모든 모델 호출에 연결되어 (모델, 리전)별 지표를 누적합니다:
+  - request_latency_seconds: latency 히스토그램 / Latency histogram
+  - ttft_seconds: 첫 토큰까지 시간 히스토그램 (스트리밍) / Time-to-first-token histogram (streaming)
+  - requests_total: 결과별 호출 수 (success / error / throttled) / Calls per outcome
+  - tokens_total: 입력·출력·캐시 읽기/쓰기 토큰 수 / Input, output and cache read/write tokens
+  - cost_usd_total: 누적 비용 / Accumulated cost
+  - in_flight: 진행 중인 호출 수 (게이지) / Calls in progress (gauge)
+스로틀되어 재시도되는 시도도 on_error로 들어오므로 throttled 카운터는 스로틀 응답 수 그대로입니다.
+
+지표는 로컬 HTTP 엔드포인트(/metrics)에서 OpenMetrics 텍스트 형식으로 제공되어 Prometheus가 그대로
+수집할 수 있고, 같은 내용을 파일에 주기적으로 기록할 수도 있습니다.
+
+MetricsExporter attaches to every model call as a CallHooks and accumulates the metrics above per
+(model, region). Throttled attempts that are retried also arrive through on_error, so the throttled
+counter is the raw number of throttle responses. Metrics are served in the OpenMetrics text format
+on a local HTTP endpoint (/metrics) that Prometheus can scrape directly, and the same text can be
+flushed to a file periodically.
+
+사용법 / Usage:
+    python3 bedrock_model_comparison.py --metrics-port 9464 --metrics-file metrics.prom
+    curl http://localhost:9464/metrics
+"""
+
+import bisect
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Sequence, Tuple
+
+from call_hooks import CallHooks
+
+# 히스토그램 버킷 상한 (초) / Histogram bucket upper bounds (seconds)
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 64, 128)
+TTFT_BUCKETS = (0.05, 0.1, 0.2, 0.4, 0.8, 1.6, 3.2, 6.4)
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+
+class Histogram:
+    """
+    누적 버킷 히스토그램 / Cumulative-bucket histogram
+    """
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.bounds, value)
+        if index < len(self.bounds):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """
+        (상한, 누적 개수) 목록 (+Inf 포함) / (upper bound, cumulative count) pairs including +Inf
+        """
+        total = 0
+        for bound, n in zip(self.bounds, self.counts):
+            total += n
+            yield repr(float(bound)), total
+        yield '+Inf', self.count
+
+
+def _labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    def escape(v):
+        return str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{escape(v)}"' for k, v in pairs) + '}'
+
+
+class MetricsExporter(CallHooks):
+    """
+    (모델, 리전)별 실시간 지표를 누적하는 호출 훅
+    Call hook accumulating live per-(model, region) metrics
+
+    Args:
+        prefix: 지표 이름 접두사 / Metric name prefix
+        latency_buckets: latency 히스토그램 버킷 (초) / Latency histogram buckets (seconds)
+        ttft_buckets: TTFT 히스토그램 버킷 (초) / TTFT histogram buckets (seconds)
+    """
+
+    def __init__(self, prefix: str = 'bedrock_bench', latency_buckets: Sequence[float] = LATENCY_BUCKETS,
+                 ttft_buckets: Sequence[float] = TTFT_BUCKETS):
+        self.prefix = prefix
+        self.latency_buckets = tuple(latency_buckets)
+        self.ttft_buckets = tuple(ttft_buckets)
+        self._lock = threading.Lock()
+        self._latency: Dict[Tuple[str, str], Histogram] = {}
+        self._ttft: Dict[Tuple[str, str], Histogram] = {}
+        self._requests: Dict[Tuple[str, str, str], int] = {}
+        self._tokens: Dict[Tuple[str, str, str], int] = {}
+        self._cost: Dict[Tuple[str, str], float] = {}
+        self._in_flight: Dict[Tuple[str, str], int] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._flush_stop: Optional[threading.Event] = None
+        self._flush_thread: Optional[threading.Thread] = None
+        self._flush_path: Optional[str] = None
+
+    # ---- CallHooks ----
+
+    def pre_request(self, context: Dict):
+        key = (context['model_key'], context['region'])
+        with self._lock:
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+
+    def post_response(self, context: Dict, result: Dict):
+        key = (context['model_key'], context['region'])
+        with self._lock:
+            self._in_flight[key] -= 1
+            self._count((*key, 'success'))
+            self._latency.setdefault(key, Histogram(self.latency_buckets)).observe(result['latency'])
+            if result.get('ttft') is not None:
+                self._ttft.setdefault(key, Histogram(self.ttft_buckets)).observe(result['ttft'])
+            for direction in ('input', 'output', 'cache_read', 'cache_write'):
+                if f'{direction}_tokens' not in result:
+                    continue
+                tokens_key = (*key, direction)
+                self._tokens[tokens_key] = self._tokens.get(tokens_key, 0) + (result[f'{direction}_tokens'] or 0)
+            self._cost[key] = self._cost.get(key, 0.0) + result['total_cost']
+
+    def on_error(self, context: Dict, error: Exception, result: Dict):
+        key = (context['model_key'], context['region'])
+        with self._lock:
+            self._in_flight[key] -= 1
+            self._count((*key, 'throttled' if result.get('throttled') else 'error'))
+
+    def _count(self, key: Tuple[str, str, str]):
+        self._requests[key] = self._requests.get(key, 0) + 1
+
+    # ---- OpenMetrics ----
+
+    def render(self) -> str:
+        """
+        현재 지표를 OpenMetrics 텍스트 형식으로 반환합니다.
+        Returns the current metrics in the OpenMetrics text format.
+        """
+        p = self.prefix
+        lines = []
+
+        def family(name, kind, unit, help_text):
+            lines.append(f"# TYPE {p}_{name} {kind}")
+            if unit:
+                lines.append(f"# UNIT {p}_{name} {unit}")
+            lines.append(f"# HELP {p}_{name} {help_text}")
+
+        def histogram(name, data):
+            for (model, region), hist in sorted(data.items()):
+                base = (('model', model), ('region', region))
+                for le, n in hist.cumulative():
+                    lines.append(f"{p}_{name}_bucket{_labels(base + (('le', le),))} {n}")
+                lines.append(f"{p}_{name}_count{_labels(base)} {hist.count}")
+                lines.append(f"{p}_{name}_sum{_labels(base)} {hist.sum!r}")
+
+        with self._lock:
+            family('request_latency_seconds', 'histogram', 'seconds', 'Latency of successful model calls')
+            histogram('request_latency_seconds', self._latency)
+            family('ttft_seconds', 'histogram', 'seconds', 'Time to first token (streaming calls)')
+            histogram('ttft_seconds', self._ttft)
+            family('requests', 'counter', None, 'Model calls by outcome (success, error, throttled)')
+            for (model, region, outcome), n in sorted(self._requests.items()):
+                lines.append(f"{p}_requests_total"
+                             f"{_labels((('model', model), ('region', region), ('outcome', outcome)))} {n}")
+            family('tokens', 'counter', None, 'Input, output and cache read/write tokens of successful calls')
+            for (model, region, direction), n in sorted(self._tokens.items()):
+                lines.append(f"{p}_tokens_total"
+                             f"{_labels((('model', model), ('region', region), ('direction', direction)))} {n}")
+            family('cost_usd', 'counter', None, 'Accumulated model call cost in USD')
+            for (model, region), cost in sorted(self._cost.items()):
+                lines.append(f"{p}_cost_usd_total{_labels((('model', model), ('region', region)))} {cost!r}")
+            family('in_flight', 'gauge', None, 'Model calls currently in progress')
+            for (model, region), n in sorted(self._in_flight.items()):
+                lines.append(f"{p}_in_flight{_labels((('model', model), ('region', region)))} {n}")
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port: int = 9464, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """
+        백그라운드 스레드에서 /metrics 엔드포인트를 시작합니다.
+        Starts the /metrics endpoint on a background thread.
+        """
+        exporter = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        print(f"Metrics: http://{host}:{port}/metrics")
+        return self._server
+
+    def flush(self, path: str):
+        """
+        현재 지표를 파일에 원자적으로 기록합니다 (임시 파일 + 이름 변경).
+        Writes the current metrics to a file atomically (temporary file + rename).
+        """
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+    def start_flush(self, path: str, interval: float = 10):
+        """
+        interval초마다 지표를 파일에 기록하는 백그라운드 스레드를 시작합니다.
+        Starts a background thread that writes the metrics to a file every `interval` seconds.
+        """
+        self._flush_path = path
+        self._flush_stop = threading.Event()
+
+        def loop():
+            while not self._flush_stop.wait(interval):
+                try:
+                    self.flush(path)
+                except OSError as e:
+                    print(f"  Warning: metrics flush to {path} failed: {e}")
+
+        self._flush_thread = threading.Thread(target=loop, daemon=True)
+        self._flush_thread.start()
+
+    def close(self):
+        """
+        주기적 기록을 멈추고 마지막으로 한 번 기록한 뒤 엔드포인트를 종료합니다.
+        Stops the periodic flush, writes a final snapshot and shuts down the endpoint.
+        """
+        if self._flush_thread:
+            self._flush_stop.set()
+            self._flush_thread.join()
+            self.flush(self._flush_path)
+            self._flush_thread = None
+        if self._server:
+            self._server.shutdown()
+            self._server = None
+
+
+def attach_exporter(comparison, port: Optional[int] = None, path: Optional[str] = None,
+                    interval: float = 10) -> Optional[MetricsExporter]:
+    """
+    port나 path가 주어지면 MetricsExporter를 만들어 comparison에 훅으로 등록하고 엔드포인트·파일 기록을
+    시작합니다 (둘 다 없으면 None).
+    When a port or path is given, creates a MetricsExporter, registers it as a hook on comparison and
+    starts the endpoint and/or file flush (None when neither is given).
+    """
+    if not port and not path:
+        return None
+    exporter = MetricsExporter()
+    comparison.add_hook(exporter)
+    if port:
+        exporter.serve(port)
+    if path:
+        exporter.start_flush(path, interval)
+    return exporter
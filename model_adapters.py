@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+모델 provider 어댑터 레지스트리
+Model provider adapter registry
+
+provider 형식(claude, nova, llama, mistral, qwen)마다 하나의 어댑터가 요청 페이로드 구성, 응답 파싱,
+토큰 사용량 추출, 스트리밍 청크 파싱을 담당합니다. 요청 본문은 (형식, 프롬프트, max_tokens)별로 한 번만
+bytes로 직렬화되어 반복 실행과 부하 테스트에서 재사용됩니다.
+새 형식은 ModelAdapter를 상속해 register_adapter()로 등록하면 invoke_model 수정 없이 추가할 수 있습니다.
+프롬프트 캐싱을 지원하는 형식(claude: cache_control, nova: cachePoint)은 공통 앞부분과 달라지는 뒷부분으로
+나뉜 요청을 구성하고 응답에서 캐시 읽기/쓰기 토큰 수를 추출합니다.
+Converse / ConverseStream API는 모든 형식이 같은 요청·응답 구조를 쓰므로 converse_request()와
+converse_usage()가 형식과 무관하게 처리합니다 (형식별 차이는 temperature뿐).
+
+One adapter per provider format (claude, nova, llama, mistral, qwen) owns request payload building,
+response parsing, usage extraction and streaming chunk parsing. Request bodies are serialized to
+bytes once per (format, prompt, max_tokens) and reused across repetitions and load-test iterations.
+New formats subclass ModelAdapter and call register_adapter(), without touching invoke_model.
+Formats supporting prompt caching (claude: cache_control, nova: cachePoint) also build requests
+split into a shared prefix and a varying suffix, and extract cache read/write token counts.
+The Converse / ConverseStream APIs share one request and response shape across formats, so
+converse_request() and converse_usage() handle them format-independently (only temperature differs).
+"""
+
+import json
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+# 어댑터별 직렬화된 요청 본문 캐시 크기 / Per-adapter serialized request body cache size
+BODY_CACHE_SIZE = 1024
+
+
+class ModelAdapter:
+    """
+    provider 형식 어댑터 기본 클래스
+    Base class for provider format adapters
+
+    하위 클래스는 build_payload, parse_response, parse_stream_chunk를 구현합니다. 프롬프트 캐싱을 지원하는
+    형식은 supports_prompt_cache를 켜고 build_cached_payload와 cache_usage도 구현합니다.
+    Subclasses implement build_payload, parse_response and parse_stream_chunk. Formats supporting
+    prompt caching set supports_prompt_cache and also implement build_cached_payload and cache_usage.
+    """
+
+    format = None
+    supports_prompt_cache = False
+    temperature = None  # None이면 모델 기본값 / None uses the model default
+
+    def __init__(self):
+        self.request_body = lru_cache(maxsize=BODY_CACHE_SIZE)(self._serialize)
+        self.cached_request_body = lru_cache(maxsize=BODY_CACHE_SIZE)(self._serialize_cached)
+
+    def _serialize(self, prompt: str, max_tokens: int) -> bytes:
+        return json.dumps(self.build_payload(prompt, max_tokens)).encode('utf-8')
+
+    def _serialize_cached(self, prefix: str, suffix: str, max_tokens: int, cache: bool) -> bytes:
+        return json.dumps(self.build_cached_payload(prefix, suffix, max_tokens, cache)).encode('utf-8')
+
+    def build_payload(self, prompt: str, max_tokens: int) -> Dict:
+        """
+        요청 페이로드를 구성합니다.
+        Builds the request payload.
+        """
+        raise NotImplementedError
+
+    def build_cached_payload(self, prefix: str, suffix: str, max_tokens: int, cache: bool) -> Dict:
+        """
+        공통 앞부분(prefix)과 달라지는 뒷부분(suffix)으로 나뉜 요청 페이로드를 구성합니다. cache가 True이면
+        앞부분 끝에 캐시 지점을 표시하고, False이면 같은 내용을 캐시 없이 보냅니다.
+        Builds a request payload split into a shared prefix and a varying suffix. When cache is True the
+        end of the prefix is marked as a cache point; when False the same content is sent uncached.
+        """
+        raise ValueError(f"Prompt caching is not supported for format '{self.format}'")
+
+    def parse_response(self, body: Dict, prompt: str) -> Tuple[str, int, int]:
+        """
+        응답 본문에서 (출력 텍스트, 입력 토큰, 출력 토큰)을 추출합니다.
+        Extracts (output text, input tokens, output tokens) from the response body.
+        """
+        raise NotImplementedError
+
+    def cache_usage(self, body: Dict) -> Dict:
+        """
+        응답 본문에서 캐시 토큰 수 {'cache_read_tokens', 'cache_write_tokens'}를 추출합니다. 입력 토큰
+        (parse_response)에는 캐시 토큰이 포함되지 않습니다.
+        Extracts cache token counts {'cache_read_tokens', 'cache_write_tokens'} from the response body.
+        The input tokens from parse_response exclude cached tokens.
+        """
+        return {}
+
+    def parse_stream_chunk(self, chunk: Dict) -> Tuple[str, Dict]:
+        """
+        스트리밍 청크에서 (텍스트 조각, usage dict)를 추출합니다. usage에는 청크에서 확인된 토큰 수만 담습니다.
+        Extracts (text delta, usage dict) from a streaming chunk; usage only carries token counts seen in it.
+        """
+        raise NotImplementedError
+
+    def converse_request(self, prompt: str, max_tokens: int, prefix: Optional[str] = None,
+                         cache: bool = True) -> Dict:
+        """
+        Converse / ConverseStream 요청 인자를 구성합니다 (modelId 제외). prefix가 있으면 cachePoint로 캐시
+        지점을 표시합니다 (프롬프트 캐싱 지원 형식만).
+        Builds the Converse / ConverseStream request arguments (without modelId). With a prefix the cache
+        point is marked with cachePoint (formats supporting prompt caching only).
+        """
+        if prefix is None:
+            content = [{"text": prompt}]
+        elif not self.supports_prompt_cache:
+            raise ValueError(f"Prompt caching is not supported for format '{self.format}'")
+        else:
+            content = [{"text": prefix}] + ([{"cachePoint": {"type": "default"}}] if cache else []) + [{"text": prompt}]
+        inference_config = {"maxTokens": max_tokens}
+        if self.temperature is not None:
+            inference_config["temperature"] = self.temperature
+        return {
+            "messages": [
+                {"role": "user", "content": content}
+            ],
+            "inferenceConfig": inference_config
+        }
+
+    @staticmethod
+    def converse_usage(usage: Dict) -> Dict:
+        """
+        Converse 응답의 usage를 {'input_tokens', 'output_tokens', 'cache_read_tokens', 'cache_write_tokens'}로
+        바꿉니다 (모든 형식 공통, 캐시 토큰은 input_tokens에 포함되지 않음).
+        Maps a Converse usage block to {'input_tokens', 'output_tokens', 'cache_read_tokens',
+        'cache_write_tokens'} (same for every format; cache tokens are not part of input_tokens).
+        """
+        return {
+            'input_tokens': usage.get('inputTokens', 0),
+            'output_tokens': usage.get('outputTokens', 0),
+            'cache_read_tokens': usage.get('cacheReadInputTokens') or 0,
+            'cache_write_tokens': usage.get('cacheWriteInputTokens') or 0
+        }
+
+    @staticmethod
+    def invocation_metrics_usage(chunk: Dict) -> Dict:
+        """
+        마지막 청크의 amazon-bedrock-invocationMetrics에서 토큰 수를 추출합니다.
+        Extracts token counts from amazon-bedrock-invocationMetrics on the final chunk.
+        """
+        metrics = chunk.get('amazon-bedrock-invocationMetrics')
+        if not metrics:
+            return {}
+        usage = {
+            'input_tokens': metrics.get('inputTokenCount'),
+            'output_tokens': metrics.get('outputTokenCount')
+        }
+        # 캐시 토큰은 프롬프트 캐싱 요청에서만 포함됨 / Cache tokens are only present for prompt-cached requests
+        if 'cacheReadInputTokenCount' in metrics:
+            usage['cache_read_tokens'] = metrics['cacheReadInputTokenCount']
+        if 'cacheWriteInputTokenCount' in metrics:
+            usage['cache_write_tokens'] = metrics['cacheWriteInputTokenCount']
+        return usage
+
+
+class ClaudeAdapter(ModelAdapter):
+    """Anthropic Messages API (`anthropic_version`)"""
+
+    format = 'claude'
+    supports_prompt_cache = True
+
+    def build_payload(self, prompt: str, max_tokens: int) -> Dict:
+        return {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": max_tokens,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ]
+        }
+
+    def build_cached_payload(self, prefix: str, suffix: str, max_tokens: int, cache: bool) -> Dict:
+        prefix_block = {"type": "text", "text": prefix}
+        if cache:
+            prefix_block["cache_control"] = {"type": "ephemeral"}
+        return {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": max_tokens,
+            "messages": [
+                {"role": "user", "content": [prefix_block, {"type": "text", "text": suffix}]}
+            ]
+        }
+
+    def parse_response(self, body: Dict, prompt: str) -> Tuple[str, int, int]:
+        return body['content'][0]['text'], body['usage']['input_tokens'], body['usage']['output_tokens']
+
+    @staticmethod
+    def _cache_fields(usage: Dict) -> Dict:
+        return {'cache_read_tokens': usage.get('cache_read_input_tokens') or 0,
+                'cache_write_tokens': usage.get('cache_creation_input_tokens') or 0}
+
+    def cache_usage(self, body: Dict) -> Dict:
+        return self._cache_fields(body.get('usage', {}))
+
+    def parse_stream_chunk(self, chunk: Dict) -> Tuple[str, Dict]:
+        usage = self.invocation_metrics_usage(chunk)
+        if chunk.get('type') == 'message_start':
+            start_usage = chunk['message'].get('usage', {})
+            usage.setdefault('input_tokens', start_usage.get('input_tokens'))
+            for key, value in self._cache_fields(start_usage).items():
+                usage.setdefault(key, value)
+        elif chunk.get('type') == 'message_delta':
+            usage.setdefault('output_tokens', chunk.get('usage', {}).get('output_tokens'))
+        elif chunk.get('type') == 'content_block_delta':
+            return chunk['delta'].get('text', ''), usage
+        return '', usage
+
+
+class NovaAdapter(ModelAdapter):
+    """Amazon Nova (Messages + `inferenceConfig`)"""
+
+    format = 'nova'
+    supports_prompt_cache = True
+
+    def build_payload(self, prompt: str, max_tokens: int) -> Dict:
+        return {
+            "messages": [
+                {"role": "user", "content": [{"text": prompt}]}
+            ],
+            "inferenceConfig": {
+                "max_new_tokens": max_tokens
+            }
+        }
+
+    def build_cached_payload(self, prefix: str, suffix: str, max_tokens: int, cache: bool) -> Dict:
+        content = [{"text": prefix}]
+        if cache:
+            content.append({"cachePoint": {"type": "default"}})
+        content.append({"text": suffix})
+        return {
+            "messages": [
+                {"role": "user", "content": content}
+            ],
+            "inferenceConfig": {
+                "max_new_tokens": max_tokens
+            }
+        }
+
+    def parse_response(self, body: Dict, prompt: str) -> Tuple[str, int, int]:
+        return (body['output']['message']['content'][0]['text'],
+                body['usage']['inputTokens'], body['usage']['outputTokens'])
+
+    @staticmethod
+    def _cache_fields(usage: Dict) -> Dict:
+        return {'cache_read_tokens': usage.get('cacheReadInputTokenCount') or 0,
+                'cache_write_tokens': usage.get('cacheWriteInputTokenCount') or 0}
+
+    def cache_usage(self, body: Dict) -> Dict:
+        return self._cache_fields(body.get('usage', {}))
+
+    def parse_stream_chunk(self, chunk: Dict) -> Tuple[str, Dict]:
+        usage = self.invocation_metrics_usage(chunk)
+        if 'metadata' in chunk:
+            meta_usage = chunk['metadata'].get('usage', {})
+            usage.setdefault('input_tokens', meta_usage.get('inputTokens'))
+            usage.setdefault('output_tokens', meta_usage.get('outputTokens'))
+            for key, value in self._cache_fields(meta_usage).items():
+                usage.setdefault(key, value)
+        if 'contentBlockDelta' in chunk:
+            return chunk['contentBlockDelta']['delta'].get('text', ''), usage
+        return '', usage
+
+
+class LlamaAdapter(ModelAdapter):
+    """Meta Llama (`prompt` + `max_gen_len`)"""
+
+    format = 'llama'
+    temperature = 0.7
+
+    def build_payload(self, prompt: str, max_tokens: int) -> Dict:
+        return {
+            "prompt": prompt,
+            "max_gen_len": max_tokens,
+            "temperature": self.temperature
+        }
+
+    def parse_response(self, body: Dict, prompt: str) -> Tuple[str, int, int]:
+        output_text = body['generation']
+        input_tokens = body.get('prompt_token_count', len(prompt) // 4)
+        output_tokens = body.get('generation_token_count', len(output_text) // 4)
+        return output_text, input_tokens, output_tokens
+
+    def parse_stream_chunk(self, chunk: Dict) -> Tuple[str, Dict]:
+        usage = self.invocation_metrics_usage(chunk)
+        if chunk.get('prompt_token_count') is not None:
+            usage.setdefault('input_tokens', chunk['prompt_token_count'])
+        return chunk.get('generation') or '', usage
+
+
+class ChatCompletionAdapter(ModelAdapter):
+    """OpenAI 호환 Chat Completion (Qwen) / OpenAI-compatible chat completion (Qwen)"""
+
+    format = 'qwen'
+
+    def build_payload(self, prompt: str, max_tokens: int) -> Dict:
+        return {
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": max_tokens
+        }
+
+    def parse_response(self, body: Dict, prompt: str) -> Tuple[str, int, int]:
+        return (body['choices'][0]['message']['content'],
+                body['usage']['prompt_tokens'], body['usage']['completion_tokens'])
+
+    def parse_stream_chunk(self, chunk: Dict) -> Tuple[str, Dict]:
+        # 청크는 delta 또는 message 형식 / Chunks carry either delta or message
+        usage = self.invocation_metrics_usage(chunk)
+        if chunk.get('usage'):
+            usage.setdefault('input_tokens', chunk['usage'].get('prompt_tokens'))
+            usage.setdefault('output_tokens', chunk['usage'].get('completion_tokens'))
+        text = ''
+        for choice in chunk.get('choices', []):
+            part = choice.get('delta') or choice.get('message') or {}
+            text += part.get('content') or ''
+        return text, usage
+
+
+class MistralAdapter(ChatCompletionAdapter):
+    """Mistral (Chat Completion + `temperature`)"""
+
+    format = 'mistral'
+    temperature = 0.7
+
+    def build_payload(self, prompt: str, max_tokens: int) -> Dict:
+        return {
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": max_tokens,
+            "temperature": self.temperature
+        }
+
+
+ADAPTERS: Dict[str, ModelAdapter] = {}
+
+
+def register_adapter(adapter: ModelAdapter):
+    """
+    어댑터를 형식 이름으로 등록합니다 (같은 형식이 있으면 교체).
+    Registers an adapter under its format name (replacing any existing one).
+    """
+    ADAPTERS[adapter.format] = adapter
+
+
+def get_adapter(fmt: str) -> ModelAdapter:
+    """
+    형식 이름에 해당하는 어댑터를 반환합니다.
+    Returns the adapter registered for a format name.
+    """
+    if fmt not in ADAPTERS:
+        raise KeyError(f"No adapter registered for format '{fmt}' (registered: {', '.join(ADAPTERS)})")
+    return ADAPTERS[fmt]
+
+
+for _adapter in (ClaudeAdapter(), NovaAdapter(), LlamaAdapter(), MistralAdapter(), ChatCompletionAdapter()):
+    register_adapter(_adapter)
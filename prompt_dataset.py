@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+JSONL 프롬프트 데이터셋 스트리밍 로더와 파이프라인
+Streaming JSONL prompt dataset loader and pipeline
+
+대규모 프롬프트 세트(실제 트래픽에서 추출한 수천 건 등)를 파일 전체를 읽지 않고 한 줄씩 처리합니다.
+각 행은 제너레이터 단계(읽기 → 샤드 선택 → 모델 호출 → 품질 평가 → 결과 기록)를 차례로 통과하며,
+결과는 기록 즉시 버려지므로 메모리 사용량은 데이터셋 크기와 무관하게 일정합니다 (평가 중인 행은
+judge_window 개까지만 보관). 여러 프로세스가 --shards/--shard-index로 한 데이터셋을 결정적으로 나눠
+실행할 수 있습니다 (행 번호 % shards == shard_index).
+
+Processes large prompt suites (e.g. thousands of prompts taken from production traffic) one line at a
+time without reading the whole file. Each row flows through generator stages (read -> shard filter ->
+model calls -> quality evaluation -> result writing), and results are dropped as soon as they are written,
+so memory stays flat regardless of dataset size (at most judge_window rows are held while being judged).
+Several processes can split one dataset deterministically with --shards/--shard-index
+(row number % shards == shard_index).
+
+JSONL 행 형식 / Row format:
+    {"id": "q-0001", "name": "...", "prompt": "...", "category": "...", "max_tokens": 1024}
+    prompt만 필수이며 id 기본값은 행 번호, name 기본값은 id입니다.
+    Only prompt is required; id defaults to the row number and name to the id.
+"""
+
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from aggregate_results import QUALITY_CRITERIA, Accumulator
+
+
+def iter_jsonl(path: str) -> Iterator[Dict]:
+    """
+    JSONL 파일을 한 줄씩 읽어 테스트 케이스 Dict를 생성합니다 (빈 줄은 건너뜀).
+    Lazily yields test case Dicts from a JSONL file, one line at a time (blank lines are skipped).
+
+    각 Dict에는 행 번호 'row'(0부터)가 추가됩니다.
+    Each Dict gets its 0-based row number as 'row'.
+    """
+    with open(path, encoding='utf-8') as f:
+        row = 0
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if not record.get('prompt'):
+                raise ValueError(f"{path}:{line_no}: missing 'prompt'")
+            record_id = str(record.get('id', row))
+            yield {
+                'row': row,
+                'id': record_id,
+                'name': record.get('name') or record_id,
+                'prompt': record['prompt'],
+                'category': record.get('category'),
+                'max_tokens': record.get('max_tokens')
+            }
+            row += 1
+
+
+def shard(rows: Iterable[Dict], shards: int = 1, shard_index: int = 0, limit: Optional[int] = None) -> Iterator[Dict]:
+    """
+    행 번호 기준으로 이 샤드에 속한 행만 통과시킵니다 (limit은 샤드 내 최대 행 수).
+    Passes only the rows that belong to this shard by row number (limit caps rows within the shard).
+    """
+    if not 0 <= shard_index < shards:
+        raise ValueError(f"shard_index must be in [0, {shards}), got {shard_index}")
+    taken = 0
+    for record in rows:
+        if limit is not None and taken >= limit:
+            return
+        if record['row'] % shards == shard_index:
+            taken += 1
+            yield record
+
+
+def invoke_stage(comparison, rows: Iterable[Dict], default_max_tokens: int = 4096) -> Iterator[Tuple[Dict, Dict]]:
+    """
+    행마다 모든 모델을 호출합니다. 결과는 comparison.results에 보관하지 않으며, 저널에는 행 id로 기록합니다.
+    Calls every model for each row; results are not kept in comparison.results and are journaled by row id.
+    """
+    for record in rows:
+        test_result = comparison.run_test(record['prompt'], record['name'],
+                                          max_tokens=record['max_tokens'] or default_max_tokens, keep=False,
+                                          run='dataset', test_id=record['id'])
+        test_result['id'] = record['id']
+        test_result['category'] = record['category']
+        yield record, test_result
+
+
+def judge_stage(comparison, items: Iterable[Tuple[Dict, Dict]], batched: bool = False,
+                judge_window: int = 4, enabled: bool = True) -> Iterator[Tuple[Dict, Dict, Dict]]:
+    """
+    품질 평가를 스레드 풀에서 진행하며, 최대 judge_window 개 행의 평가가 다음 행 호출과 겹쳐 진행됩니다.
+    결과는 입력 순서대로 내보냅니다.
+    Runs quality evaluation on a thread pool so that up to judge_window rows are judged while the next
+    rows are being invoked. Results are yielded in input order.
+    """
+    if not enabled:
+        for record, test_result in items:
+            yield record, test_result, {}
+        return
+    window = max(1, judge_window)
+    with ThreadPoolExecutor(max_workers=window) as executor:
+        pending = deque()
+        for record, test_result in items:
+            pending.append((record, test_result, executor.submit(comparison.evaluate_test, test_result, batched)))
+            if len(pending) >= window:
+                record, test_result, future = pending.popleft()
+                yield record, test_result, future.result()
+        while pending:
+            record, test_result, future = pending.popleft()
+            yield record, test_result, future.result()
+
+
+class DatasetWriter:
+    """
+    행별 결과를 JSONL로 기록하고 모델별 요약 통계만 누적합니다.
+    Writes per-row results as JSONL and accumulates only per-model summary statistics.
+
+    Args:
+        comparison: 모델 정보와 지표 포맷에 사용할 BedrockModelComparison
+                    BedrockModelComparison used for model info and metric formatting
+        path: 결과 JSONL 경로 / Output JSONL path
+        store: 행마다 추가할 ResultsStore (선택) / Optional ResultsStore appended per row
+        run_id: 저장소 실행 ID / Run ID in the store
+    """
+
+    def __init__(self, comparison, path: str, store=None, run_id: Optional[str] = None):
+        self.comparison = comparison
+        self.path = path
+        self.store = store
+        self.run_id = run_id
+        self.rows = 0
+        self._file = open(path, 'w', encoding='utf-8')
+        self._stats = {key: {'latency': Accumulator(), 'calls': 0, 'failures': 0, 'cost': 0.0,
+                             'output_tokens': 0, 'quality': Accumulator()}
+                       for key in comparison.models}
+        self._by_category: Dict[Tuple[str, str], Accumulator] = {}
+
+    def write(self, record: Dict, test_result: Dict, evaluations: Dict):
+        """
+        한 행의 결과를 기록합니다. / Writes the result of one row.
+        """
+        line = {
+            "id": record['id'],
+            "name": record['name'],
+            "category": record['category'],
+            "wall_time_s": round(test_result['wall_time'], 3),
+            "models": {},
+            "timestamp": test_result['timestamp']
+        }
+        for model_key, r in test_result['results'].items():
+            stats = self._stats[model_key]
+            stats['calls'] += 1
+            if r.get('success'):
+                entry = {
+                    "latency_s": round(r['latency'], 3),
+                    "input_tokens": r['input_tokens'],
+                    "output_tokens": r['output_tokens'],
+                    "cost_usd": round(r['total_cost'], 6),
+                    "warm": r.get('warm', True),
+                    **self.comparison._streaming_metrics(r),
+                    **self.comparison._server_metrics(r),
+                    **self.comparison._retry_metrics(r),
+                    "response": r['output_text']
+                }
+                stats['latency'].add(r['latency'])
+                stats['cost'] += r['total_cost']
+                stats['output_tokens'] += r['output_tokens']
+                if record['category']:
+                    key = (record['category'], model_key)
+                    self._by_category.setdefault(key, Accumulator()).add(r['latency'])
+            else:
+                stats['failures'] += 1
+                entry = {"error": r.get('error', 'Unknown error')}
+            qe = evaluations.get(model_key)
+            if qe:
+                entry["quality_evaluation"] = qe
+                if all(c in qe for c in QUALITY_CRITERIA):
+                    stats['quality'].add(sum(qe[c] for c in QUALITY_CRITERIA) / len(QUALITY_CRITERIA))
+            line["models"][model_key] = entry
+
+        self._file.write(json.dumps(line, ensure_ascii=False) + '\n')
+        self._file.flush()
+        # 저널에서 모두 재개한 행은 중단 전 실행에서 이미 저장소에 추가됨
+        # Rows replayed entirely from the journal were already appended by the interrupted run
+        if self.store and not test_result.get('resumed'):
+            self.store.append_test(self.run_id, test_result, evaluations)
+        self.rows += 1
+
+    def summary(self) -> Dict:
+        """
+        모델별·카테고리별 요약 통계 / Per-model and per-category summary statistics
+        """
+        models = {}
+        for key, stats in self._stats.items():
+            lat = stats['latency']
+            entry = {
+                "model_name": self.comparison.models[key]['name'],
+                "calls": stats['calls'],
+                "failures": stats['failures'],
+                "total_cost_usd": round(stats['cost'], 6),
+                "output_tokens": stats['output_tokens']
+            }
+            if lat.count:
+                entry.update({
+                    "avg_latency_s": round(lat.mean, 3),
+                    "stdev_latency_s": round(lat.stdev, 3),
+                    "min_latency_s": round(lat.minimum, 3),
+                    "max_latency_s": round(lat.maximum, 3),
+                    "output_tokens_per_s": round(stats['output_tokens'] / lat.total, 1) if lat.total else 0
+                })
+            if stats['quality'].count:
+                entry["avg_quality"] = round(stats['quality'].mean, 2)
+            models[key] = entry
+
+        by_category = {}
+        for (category, key), lat in sorted(self._by_category.items()):
+            by_category.setdefault(category, {})[key] = round(lat.mean, 3)
+        return {
+            "rows": self.rows,
+            "models": models,
+            "by_latency": sorted((k for k in models if 'avg_latency_s' in models[k]),
+                                 key=lambda k: models[k]['avg_latency_s']),
+            "avg_latency_by_category": by_category
+        }
+
+    def close(self):
+        self._file.close()
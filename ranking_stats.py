@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+모델 순위용 통계: 백분위수, 부트스트랩 신뢰구간, 쌍별 우위 확률
+Ranking statistics: percentiles, bootstrap confidence intervals and pairwise win probabilities
+
+반복 횟수가 적으면 평균만으로는 "가장 빠른 모델"이 자주 뒤바뀌므로, 평균의 부트스트랩 분포로 신뢰구간과
+"A가 B보다 빠를 확률"을 함께 보고합니다. 재표본 추출은 (반복 횟수 × 표본 수) 인덱스 행렬 한 번으로
+NumPy 벡터 연산으로 수행합니다. 기본(paired=True)으로는 표본 수가 같은 모델들이 같은 인덱스 행렬을 공유하므로
+실행 단위로 짝지어진(paired) 부트스트랩이 됩니다. 표본이 실행 단위로 대응하지 않으면 paired=False로 표본마다
+독립적으로 재추출합니다.
+
+With few repetitions the plain mean often picks the wrong "fastest" model, so the bootstrap
+distribution of the mean is used for confidence intervals and "A faster than B" probabilities.
+Resampling is a single (iterations x samples) index matrix evaluated with NumPy vector ops. By default
+(paired=True) models with the same sample count share the index matrix, which makes it a bootstrap paired
+by run. When samples do not correspond run by run, paired=False resamples each sample independently.
+"""
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+BOOTSTRAP_ITERATIONS = 5000
+CONFIDENCE = 0.95
+PERCENTILES = (50, 90, 95, 99)
+
+
+def latency_percentiles(samples: Sequence[float]) -> Dict[str, float]:
+    """
+    p50/p90/p95/p99를 반환합니다 (선형 보간).
+    Returns p50/p90/p95/p99 (linear interpolation).
+    """
+    values = np.percentile(np.asarray(samples, dtype=float), PERCENTILES)
+    return {f'p{p}': round(float(v), 3) for p, v in zip(PERCENTILES, values)}
+
+
+class Bootstrap:
+    """
+    표본 수별 재표본 인덱스 행렬을 공유하는 부트스트랩 계산기
+    Bootstrap calculator that shares resampling index matrices per sample count
+
+    Args:
+        iterations: 재표본 반복 횟수 / Number of resamples
+        confidence: 신뢰수준 / Confidence level
+        seed: 난수 시드 (결과 재현용) / RNG seed for reproducible results
+        paired: True이면 같은 표본 수에 같은 인덱스 행렬을 재사용 (실행 단위로 짝지어진 표본용), False이면
+                표본마다 새 인덱스 행렬을 추출 (서로 독립인 표본용)
+                Reuse one index matrix per sample count when True (samples paired by run); draw a fresh
+                index matrix per sample when False (independent samples)
+    """
+
+    def __init__(self, iterations: int = BOOTSTRAP_ITERATIONS, confidence: float = CONFIDENCE, seed: int = 0,
+                 paired: bool = True):
+        self.iterations = iterations
+        self.confidence = confidence
+        self.paired = paired
+        self._rng = np.random.default_rng(seed)
+        self._indices: Dict[int, np.ndarray] = {}
+
+    def _index_matrix(self, n: int) -> np.ndarray:
+        if not self.paired:
+            return self._rng.integers(0, n, size=(self.iterations, n))
+        if n not in self._indices:
+            self._indices[n] = self._rng.integers(0, n, size=(self.iterations, n))
+        return self._indices[n]
+
+    def means(self, samples: Sequence[float]) -> np.ndarray:
+        """
+        평균의 부트스트랩 분포 (길이 iterations)
+        Bootstrap distribution of the mean (length iterations)
+        """
+        values = np.asarray(samples, dtype=float)
+        return values[self._index_matrix(len(values))].mean(axis=1)
+
+    def mean_ci(self, samples: Sequence[float], digits: int = 3) -> List[float]:
+        """
+        평균의 백분위수 부트스트랩 신뢰구간 [하한, 상한]
+        Percentile bootstrap confidence interval of the mean [low, high]
+        """
+        if len(samples) < 2:
+            value = round(float(np.mean(samples)), digits)
+            return [value, value]
+        alpha = (1 - self.confidence) / 2
+        low, high = np.quantile(self.means(samples), [alpha, 1 - alpha])
+        return [round(float(low), digits), round(float(high), digits)]
+
+    def pairwise_lower(self, samples_by_key: Dict[str, Sequence[float]]) -> Dict[str, Dict[str, float]]:
+        """
+        모든 (A, B) 쌍에 대해 P(mean_A < mean_B)를 반환합니다 (지연 시간이면 "A가 B보다 빠를 확률").
+        Returns P(mean_A < mean_B) for every (A, B) pair ("A faster than B" for latencies).
+        """
+        keys = list(samples_by_key)
+        boot = np.stack([self.means(samples_by_key[k]) for k in keys])
+        # (모델, 모델, 반복) 비교 후 반복 축 평균, 동률은 절반 / Compare on a (model, model, iter) grid, ties count half
+        lower = (boot[:, None, :] < boot[None, :, :]).mean(axis=2)
+        ties = (boot[:, None, :] == boot[None, :, :]).mean(axis=2)
+        prob = lower + ties / 2
+        return {a: {b: round(float(prob[i, j]), 3) for j, b in enumerate(keys) if j != i}
+                for i, a in enumerate(keys)}
+
+
+def ranking_statistics(samples: Dict[str, Dict[str, Sequence[float]]], seed: int = 0):
+    """
+    모델별 표본으로 순위 통계를 계산합니다.
+    Computes ranking statistics from per-model samples.
+
+    Args:
+        samples: {model_key: {'latency': 호출별 지연, 'run_latency': 실행별 평균 지연,
+                              'run_cost': 실행별 총 비용, 'throughput': 호출별 출력 토큰/초}}
+
+    Returns:
+        (모델별 통계 dict, 쌍별 "A가 B보다 빠를 확률" dict)
+        (per-model stats dict, pairwise "A faster than B" probability dict)
+    """
+    bootstrap = Bootstrap(seed=seed)
+    per_model = {}
+    for mk, s in samples.items():
+        per_model[mk] = {
+            'latency_percentiles': latency_percentiles(s['latency']),
+            'latency_ci95': bootstrap.mean_ci(s['run_latency'], 3),
+            'total_cost_ci95': bootstrap.mean_ci(s['run_cost'], 6),
+        }
+        # latency가 0인 호출만 있으면 처리량 표본이 없음 / No throughput samples when every latency was 0
+        if len(s['throughput']):
+            per_model[mk]['avg_throughput'] = round(float(np.mean(s['throughput'])), 1)
+            per_model[mk]['throughput_ci95'] = bootstrap.mean_ci(s['throughput'], 1)
+    pairwise = bootstrap.pairwise_lower({mk: s['run_latency'] for mk, s in samples.items()})
+    return per_model, pairwise
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+모델별 요청/토큰 속도 제한과 스로틀링 재시도
+Per-model request/token rate limiting and throttle retries
+
+Bedrock 쿼터는 모델별 분당 요청 수(RPM)와 분당 토큰 수(TPM)로 적용됩니다. TokenBucket은 분당 보충 속도와
+버스트 용량을 가진 스레드 안전 버킷이며, ModelRateLimiter는 모델 하나의 RPM/TPM 버킷을 묶습니다.
+출력 토큰 수는 응답을 받은 뒤에야 알 수 있으므로 호출 전에는 입력 토큰 추정치만 차감하고, 응답 후 실제
+출력 토큰을 추가로 차감합니다 (잔량이 음수가 되면 다음 요청이 그만큼 대기).
+스로틀링 응답은 지터가 적용된 지수 백오프로 재시도합니다 (full jitter).
+
+Bedrock quotas apply per model as requests per minute (RPM) and tokens per minute (TPM). TokenBucket is
+a thread-safe bucket with a per-minute refill rate and burst capacity; ModelRateLimiter pairs the RPM and
+TPM buckets of one model. Output tokens are only known after the response, so an input-token estimate
+is taken before the call and the actual output tokens are debited afterwards (a negative balance makes
+the next request wait accordingly). Throttled responses are retried with jittered exponential backoff
+(full jitter).
+"""
+
+import random
+import threading
+import time
+from typing import Optional
+
+from botocore.exceptions import ClientError
+
+# 재시도 대상 스로틀링/쿼터 에러 코드 / Throttling and quota error codes that are retried
+THROTTLE_ERROR_CODES = ('ThrottlingException', 'TooManyRequestsException', 'ServiceQuotaExceededException')
+
+
+def is_throttle_exception(e: Exception) -> bool:
+    """
+    예외가 스로틀링/쿼터 초과인지 판별합니다.
+    Returns True if the exception indicates throttling or quota exhaustion.
+    """
+    if isinstance(e, ClientError):
+        return e.response.get('Error', {}).get('Code') in THROTTLE_ERROR_CODES
+    return any(code in str(e) for code in THROTTLE_ERROR_CODES)
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 20.0, rng: Optional[random.Random] = None) -> float:
+    """
+    attempt번째 재시도 전 대기 시간 (full jitter: 0 ~ min(cap, base * 2^attempt) 균등 분포)
+    Delay before retry number `attempt` (full jitter: uniform in 0 .. min(cap, base * 2^attempt))
+    """
+    return (rng or random).uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class TokenBucket:
+    """
+    분당 보충 속도를 가진 스레드 안전 토큰 버킷
+    Thread-safe token bucket refilled at a per-minute rate
+
+    Args:
+        per_minute: 분당 보충량 / Refill per minute
+        capacity: 버스트 용량 (기본: 분당 보충량의 1/6, 즉 10초 분량)
+                  Burst capacity (default: 1/6 of the per-minute rate, i.e. 10 seconds' worth)
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else max(1.0, per_minute / 6)
+        self._level = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1) -> float:
+        """
+        amount만큼 확보될 때까지 대기 후 차감합니다. 대기한 시간(초)을 반환합니다.
+        Waits until `amount` is available and takes it. Returns the time waited (seconds).
+
+        용량보다 큰 요청은 버킷이 가득 찼을 때 통과시킵니다 (잔량은 음수).
+        Requests larger than the capacity pass once the bucket is full (leaving a negative balance).
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                needed = min(amount, self.capacity)
+                if self._level >= needed:
+                    self._level -= amount
+                    return waited
+                delay = (needed - self._level) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def debit(self, amount: float):
+        """
+        대기 없이 차감합니다 (사후 정산용, 잔량이 음수가 될 수 있음).
+        Takes `amount` without waiting (post-hoc accounting; the balance may go negative).
+        """
+        with self._lock:
+            self._refill()
+            self._level -= amount
+
+
+class ModelRateLimiter:
+    """
+    모델 하나의 RPM/TPM 제한기 (None이면 해당 제한 없음)
+    RPM/TPM limiter for one model (None disables that limit)
+    """
+
+    def __init__(self, requests_per_min: Optional[float] = None, tokens_per_min: Optional[float] = None):
+        self.requests = TokenBucket(requests_per_min) if requests_per_min else None
+        self.tokens = TokenBucket(tokens_per_min) if tokens_per_min else None
+
+    def acquire(self, estimated_tokens: int) -> float:
+        """
+        요청 1건과 추정 입력 토큰을 확보합니다. 대기한 시간(초)을 반환합니다.
+        Reserves one request and the estimated input tokens. Returns the time waited (seconds).
+        """
+        waited = 0.0
+        if self.requests:
+            waited += self.requests.acquire(1)
+        if self.tokens:
+            waited += self.tokens.acquire(estimated_tokens)
+        return waited
+
+    def settle(self, estimated_tokens: int, actual_tokens: int):
+        """
+        실제 사용 토큰과 추정치의 차이를 TPM 버킷에 반영합니다.
+        Charges the TPM bucket for the difference between actual and estimated tokens.
+        """
+        if self.tokens and actual_tokens > estimated_tokens:
+            self.tokens.debit(actual_tokens - estimated_tokens)
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+추가 전용(append-only) 컬럼형 결과 저장소
+Append-only columnar results store
+
+호출별 지표를 SQLite 테이블의 타입 지정 컬럼으로 추가하고, 응답 텍스트는 SHA-256 키의 별도 blob 테이블에
+중복 없이 저장합니다. 집계는 컬럼을 NumPy 배열로 읽어 그룹 코드 + bincount 기반 벡터 연산으로 수행하므로
+실행 횟수·프롬프트 수가 늘어도 딕셔너리 중첩 루프 없이 처리됩니다.
+
+Per-call metrics are appended as typed columns of a SQLite table; response texts go into a separate
+blob table keyed by SHA-256 (deduplicated). Aggregation reads columns into NumPy arrays and uses
+group codes + bincount vector operations, so it scales with runs and prompts without nested loops
+over dicts.
+"""
+
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ranking_stats import latency_percentiles, ranking_statistics
+
+# 출력 토큰 한도 도달 판정 기준 / Output-token limit used for hit_limit_count
+MAX_TOKENS_LIMIT = 4096
+
+QUALITY_CRITERIA = ('accuracy', 'specificity', 'structure', 'practicality')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    model_key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    model_id TEXT NOT NULL,
+    input_price REAL NOT NULL,
+    output_price REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id TEXT NOT NULL,
+    test_name TEXT NOT NULL,
+    model_key TEXT NOT NULL,
+    success INTEGER NOT NULL,
+    latency_s REAL,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    cost_usd REAL,
+    response_chars INTEGER,
+    ttft_s REAL,
+    itl_p50_ms REAL,
+    itl_p99_ms REAL,
+    decode_tps REAL,
+    response_sha256 TEXT,
+    error TEXT,
+    timestamp TEXT NOT NULL,
+    warm INTEGER
+);
+CREATE TABLE IF NOT EXISTS quality (
+    run_id TEXT NOT NULL,
+    test_name TEXT NOT NULL,
+    model_key TEXT NOT NULL,
+    accuracy REAL NOT NULL,
+    specificity REAL NOT NULL,
+    structure REAL NOT NULL,
+    practicality REAL NOT NULL,
+    comment TEXT
+);
+CREATE TABLE IF NOT EXISTS responses (
+    sha256 TEXT PRIMARY KEY,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_metrics_run ON metrics (run_id);
+"""
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return seconds * 1000 if seconds is not None else None
+
+
+class ResultsStore:
+    """
+    SQLite 기반 결과 저장소
+    SQLite-backed results store
+
+    Args:
+        path: 데이터베이스 파일 경로 / Database file path
+    """
+
+    def __init__(self, path: str = 'results.db'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        # 이전 버전 저장소에 추가된 컬럼 반영 / Add columns introduced after a store was created
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(metrics)")}
+        if 'warm' not in existing:
+            self._conn.execute("ALTER TABLE metrics ADD COLUMN warm INTEGER")
+        self._conn.commit()
+
+    def register_models(self, models: Dict):
+        """
+        모델 이름·ID·가격 정보를 저장합니다 (이미 있으면 갱신).
+        Stores model names, IDs and pricing (updating existing rows).
+        """
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO models VALUES (?, ?, ?, ?, ?)",
+                [(key, m['name'], m['id'], m['input_price'], m['output_price']) for key, m in models.items()]
+            )
+            self._conn.commit()
+
+    def append_test(self, run_id: str, test_result: Dict, evaluations: Optional[Dict] = None):
+        """
+        run_test() 결과 하나(및 품질 평가)를 한 트랜잭션으로 추가합니다.
+        Appends one run_test() result (and its quality evaluations) in a single transaction.
+        """
+        test_name = test_result['test_name']
+        metric_rows = []
+        response_rows = []
+        for model_key, r in test_result['results'].items():
+            if r.get('success'):
+                text = r['output_text']
+                sha = hashlib.sha256(text.encode('utf-8')).hexdigest()
+                response_rows.append((sha, text))
+                metric_rows.append((
+                    run_id, test_name, model_key, 1, r['latency'], r['input_tokens'], r['output_tokens'],
+                    r['total_cost'], len(text), r.get('ttft'), _ms(r.get('itl_p50')), _ms(r.get('itl_p99')),
+                    r.get('decode_tps'), sha, None, r['timestamp'], int(r.get('warm', True))
+                ))
+            else:
+                metric_rows.append((
+                    run_id, test_name, model_key, 0, None, None, None, None, None, None, None, None, None, None,
+                    r.get('error', 'Unknown error'), r['timestamp'], None
+                ))
+
+        quality_rows = []
+        for model_key, qe in (evaluations or {}).items():
+            if all(c in qe for c in QUALITY_CRITERIA):
+                quality_rows.append((run_id, test_name, model_key,
+                                     *(qe[c] for c in QUALITY_CRITERIA), qe.get('comment', '')))
+
+        with self._lock:
+            self._conn.executemany("INSERT OR IGNORE INTO responses VALUES (?, ?)", response_rows)
+            self._conn.executemany("INSERT INTO metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                   metric_rows)
+            self._conn.executemany("INSERT INTO quality VALUES (?, ?, ?, ?, ?, ?, ?, ?)", quality_rows)
+            self._conn.commit()
+
+    def response_text(self, sha256: str) -> Optional[str]:
+        """
+        해시로 응답 텍스트를 조회합니다.
+        Looks up a response text by hash.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT text FROM responses WHERE sha256 = ?", (sha256,)).fetchone()
+        return row[0] if row else None
+
+    def model_names(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT model_key, name FROM models"))
+
+    def columns(self, table: str, names: List[str], where: str = '1') -> Dict[str, np.ndarray]:
+        """
+        테이블의 컬럼들을 NumPy 배열로 읽습니다 (숫자 컬럼은 float, NULL은 NaN).
+        Reads table columns into NumPy arrays (numeric columns as float with NULL as NaN).
+        """
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {', '.join(names)} FROM {table} WHERE {where}").fetchall()
+        data = {}
+        for i, name in enumerate(names):
+            values = [row[i] for row in rows]
+            if name in ('run_id', 'test_name', 'model_key', 'comment', 'error', 'response_sha256', 'timestamp'):
+                data[name] = np.array(values, dtype=str) if values else np.array([], dtype=str)
+            else:
+                data[name] = np.array([np.nan if v is None else v for v in values], dtype=float)
+        return data
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _group(*key_columns: np.ndarray):
+    """
+    여러 키 컬럼을 하나의 그룹 코드로 결합합니다.
+    Combines several key columns into a single group code.
+
+    Returns:
+        (그룹별 키 튜플 목록, 행별 그룹 인덱스) / (per-group key tuples, per-row group index)
+    """
+    code = np.zeros(len(key_columns[0]), dtype=np.int64)
+    uniques = []
+    for column in key_columns:
+        uniq, inverse = np.unique(column, return_inverse=True)
+        code = code * len(uniq) + inverse
+        uniques.append(uniq)
+    group_codes, group_index = np.unique(code, return_inverse=True)
+    keys = []
+    for gc in group_codes:
+        parts = []
+        for uniq in reversed(uniques):
+            parts.append(str(uniq[gc % len(uniq)]))
+            gc //= len(uniq)
+        keys.append(tuple(reversed(parts)))
+    return keys, group_index
+
+
+def _group_rows(index: np.ndarray, n: int) -> List[np.ndarray]:
+    """
+    그룹별 행 인덱스 배열 목록 (원래 순서 유지)
+    Per-group arrays of row indices (original order preserved)
+    """
+    order = np.argsort(index, kind='stable')
+    bounds = np.searchsorted(index[order], np.arange(n + 1))
+    return [order[bounds[g]:bounds[g + 1]] for g in range(n)]
+
+
+def _group_stats(index: np.ndarray, n: int, values: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    그룹별 count/mean/sample stdev/min/max를 벡터 연산으로 계산합니다 (NaN 제외).
+    Computes per-group count/mean/sample stdev/min/max with vector ops (ignoring NaN).
+    """
+    valid = ~np.isnan(values)
+    idx, vals = index[valid], values[valid]
+    count = np.bincount(idx, minlength=n).astype(float)
+    total = np.bincount(idx, weights=vals, minlength=n)
+    sumsq = np.bincount(idx, weights=vals * vals, minlength=n)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+        var = np.where(count > 1, (sumsq - count * mean * mean) / (count - 1), 0.0)
+    minimum = np.full(n, np.inf)
+    maximum = np.full(n, -np.inf)
+    np.minimum.at(minimum, idx, vals)
+    np.maximum.at(maximum, idx, vals)
+    return {'count': count, 'sum': total, 'mean': mean, 'stdev': np.sqrt(np.maximum(var, 0.0)),
+            'min': minimum, 'max': maximum}
+
+
+def aggregate_store(store: ResultsStore) -> Dict:
+    """
+    저장소 전체를 aggregate_results.py와 같은 구조로 집계합니다.
+    Aggregates the whole store into the same structure as aggregate_results.py.
+
+    - per_test: (테스트, 모델)별 latency mean/min/max/stdev, 평균 토큰·비용·문자 수, 한도 도달 횟수
+    - overall: 실행별 평균 latency·총 비용을 구한 뒤 실행 간 평균/표준편차/최소/최대
+    - throughput: (테스트, 모델)별 출력 토큰/초 평균과 모델별 테스트 평균
+    - quality_per_test: (테스트, 모델)별 품질 점수 평균 및 실행별 점수
+    """
+    m = store.columns('metrics', ['run_id', 'test_name', 'model_key', 'latency_s', 'input_tokens',
+                                  'output_tokens', 'cost_usd', 'response_chars', 'ttft_s', 'itl_p50_ms',
+                                  'itl_p99_ms', 'decode_tps', 'warm'],
+                      where='success = 1')
+    # warm 컬럼이 없던 행(NULL → NaN)은 warm으로 취급 / Rows predating the warm column (NULL → NaN) count as warm
+    warm = m['warm'] != 0
+    warm_latency = np.where(warm, m['latency_s'], np.nan)
+    num_runs = len(np.unique(m['run_id']))
+
+    # (테스트, 모델)별 집계 / Per (test, model) aggregation
+    per_test = {}
+    throughput = {}
+    if len(m['run_id']):
+        keys, index = _group(m['test_name'], m['model_key'])
+        n = len(keys)
+        latency = _group_stats(index, n, m['latency_s'])
+        in_tok = _group_stats(index, n, m['input_tokens'])
+        out_tok = _group_stats(index, n, m['output_tokens'])
+        cost = _group_stats(index, n, m['cost_usd'])
+        chars = _group_stats(index, n, m['response_chars'])
+        ttft = _group_stats(index, n, m['ttft_s'])
+        itl_p50 = _group_stats(index, n, m['itl_p50_ms'])
+        itl_p99 = _group_stats(index, n, m['itl_p99_ms'])
+        decode = _group_stats(index, n, m['decode_tps'])
+        hit_limit = np.bincount(index, weights=(m['output_tokens'] >= MAX_TOKENS_LIMIT).astype(float), minlength=n)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            tps = _group_stats(index, n, m['output_tokens'] / m['latency_s'])
+        rows = _group_rows(index, n)
+
+        for g, (test_name, mk) in enumerate(keys):
+            entry = {
+                'avg_latency': round(float(latency['mean'][g]), 2),
+                'min_latency': round(float(latency['min'][g]), 2),
+                'max_latency': round(float(latency['max'][g]), 2),
+                'stdev_latency': round(float(latency['stdev'][g]), 2),
+                'avg_input_tokens': round(float(in_tok['mean'][g])),
+                'avg_output_tokens': round(float(out_tok['mean'][g])),
+                'avg_cost': round(float(cost['mean'][g]), 6),
+                'avg_chars': round(float(chars['mean'][g])),
+                'hit_limit_count': int(hit_limit[g]),
+                'latency_percentiles': latency_percentiles(m['latency_s'][rows[g]]),
+            }
+            if ttft['count'][g]:
+                entry.update({
+                    'avg_ttft': round(float(ttft['mean'][g]), 3),
+                    'stdev_ttft': round(float(ttft['stdev'][g]), 3),
+                    'avg_itl_p50_ms': round(float(itl_p50['mean'][g]), 1) if itl_p50['count'][g] else None,
+                    'avg_itl_p99_ms': round(float(itl_p99['mean'][g]), 1) if itl_p99['count'][g] else None,
+                    'avg_decode_tps': round(float(decode['mean'][g]), 1) if decode['count'][g] else None,
+                })
+            per_test.setdefault(test_name, {})[mk] = entry
+            throughput.setdefault(mk, {})[test_name] = round(float(tps['mean'][g]), 1)
+
+        for mk, tests in throughput.items():
+            tests['average'] = round(float(np.mean(list(tests.values()))), 1)
+
+    # 실행별 → 모델별 2단계 집계 / Two-stage aggregation: per run, then per model
+    overall = {}
+    speed_pairwise = {}
+    if len(m['run_id']):
+        run_keys, run_index = _group(m['model_key'], m['run_id'])
+        rn = len(run_keys)
+        run_latency = _group_stats(run_index, rn, m['latency_s'])['mean']
+        run_warm_latency = _group_stats(run_index, rn, warm_latency)['mean']
+        run_cost = _group_stats(run_index, rn, m['cost_usd'])['sum']
+        run_tokens = _group_stats(run_index, rn, m['input_tokens'] + m['output_tokens'])['mean']
+        run_models = np.array([k[0] for k in run_keys], dtype=str)
+
+        model_keys, model_index = _group(run_models)
+        mn = len(model_keys)
+        lat = _group_stats(model_index, mn, run_latency)
+        lat_warm = _group_stats(model_index, mn, run_warm_latency)
+        cst = _group_stats(model_index, mn, run_cost)
+        tok = _group_stats(model_index, mn, run_tokens)
+        ttft_all = _group(m['model_key'])
+        ttft_stats = _group_stats(ttft_all[1], len(ttft_all[0]), m['ttft_s'])
+        decode_stats = _group_stats(ttft_all[1], len(ttft_all[0]), m['decode_tps'])
+
+        # 호출별 표본과 실행별 값으로 순위 통계 계산 / Ranking statistics from per-call and per-run samples
+        call_rows = _group_rows(ttft_all[1], len(ttft_all[0]))
+        run_rows = _group_rows(model_index, mn)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            call_tps = m['output_tokens'] / m['latency_s']
+        cold = _group_stats(ttft_all[1], len(ttft_all[0]), np.where(warm, np.nan, m['latency_s']))
+
+        def steady(warm_values, all_values, rows):
+            # warm 표본이 있으면 warm만 사용 / Use warm samples only when there are any
+            selected = warm_values[rows]
+            selected = selected[~np.isnan(selected)]
+            return selected if len(selected) else all_values[rows]
+
+        ranking, speed_pairwise = ranking_statistics({
+            mk: {'latency': steady(warm_latency, m['latency_s'], call_rows[g]),
+                 'run_latency': steady(run_warm_latency, run_latency, run_rows[g]),
+                 'run_cost': run_cost[run_rows[g]], 'throughput': call_tps[call_rows[g]]}
+            for g, (mk,) in enumerate(model_keys)
+        })
+
+        for g, (mk,) in enumerate(model_keys):
+            overall[mk] = {
+                'avg_latency': round(float(lat['mean'][g]), 2),
+                'stdev_latency': round(float(lat['stdev'][g]), 2),
+                'avg_total_cost': round(float(cst['mean'][g]), 6),
+                'min_total_cost': round(float(cst['min'][g]), 6),
+                'max_total_cost': round(float(cst['max'][g]), 6),
+                'avg_tokens': round(float(tok['mean'][g])),
+                **ranking[mk],
+            }
+            # _group(model_key)와 _group(run_models)는 같은 정렬 순서 / Both groupings share sort order
+            if ttft_stats['count'][g]:
+                overall[mk]['avg_ttft'] = round(float(ttft_stats['mean'][g]), 3)
+                overall[mk]['stdev_ttft'] = round(float(ttft_stats['stdev'][g]), 3)
+            if decode_stats['count'][g]:
+                overall[mk]['avg_decode_tps'] = round(float(decode_stats['mean'][g]), 1)
+            if cold['count'][g]:
+                overall[mk]['cold_samples'] = int(cold['count'][g])
+                overall[mk]['avg_cold_latency'] = round(float(cold['mean'][g]), 2)
+                if lat_warm['count'][g]:
+                    overall[mk]['avg_latency_warm'] = round(float(lat_warm['mean'][g]), 2)
+                    overall[mk]['stdev_latency_warm'] = round(float(lat_warm['stdev'][g]), 2)
+
+    # 품질 평가 집계 / Quality aggregation
+    q = store.columns('quality', ['run_id', 'test_name', 'model_key', *QUALITY_CRITERIA, 'comment'])
+    quality_per_test = {}
+    if len(q['run_id']):
+        keys, index = _group(q['test_name'], q['model_key'])
+        n = len(keys)
+        scores = np.stack([q[c] for c in QUALITY_CRITERIA], axis=1)
+        row_avg = scores.mean(axis=1)
+        means = {c: _group_stats(index, n, q[c])['mean'] for c in QUALITY_CRITERIA}
+        total = _group_stats(index, n, row_avg)['mean']
+        group_rows = _group_rows(index, n)
+        for g, (test_name, mk) in enumerate(keys):
+            rows = group_rows[g]
+            quality_per_test.setdefault(test_name, {})[mk] = {
+                'avg_accuracy': round(float(means['accuracy'][g]), 1),
+                'avg_specificity': round(float(means['specificity'][g]), 1),
+                'avg_structure': round(float(means['structure'][g]), 1),
+                'avg_practicality': round(float(means['practicality'][g]), 1),
+                'avg_total': round(float(total[g]), 1),
+                'scores_per_run': [
+                    {**{c: float(q[c][i]) for c in QUALITY_CRITERIA}, 'avg': round(float(row_avg[i]), 1)}
+                    for i in rows
+                ],
+                'comments': [str(q['comment'][i]) for i in rows],
+            }
+
+    return {
+        'num_runs': num_runs,
+        'overall': overall,
+        'quality_per_test': quality_per_test,
+        'throughput': throughput,
+        'per_test': per_test,
+        'speed_pairwise': speed_pairwise,
+    }
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+추가 전용(append-only) 실행 저널과 재개
+Append-only run journal and resume
+
+완료된 (실행, 테스트, 모델[, 리전]) 호출과 테스트별 품질 평가 결과를 끝나는 즉시 JSONL 한 줄로 추가하고
+fsync합니다. 네트워크 장애나 Ctrl-C로 실행이 중단되어도 이미 비용을 낸 호출과 평가는 저널에 남으며,
+--resume으로 다시 실행하면 저널을 재생해 빠진 셀만 호출·평가합니다.
+
+  - 실패한 호출은 기록하지 않으므로 재개 시 다시 호출됩니다.
+  - 평가 결과는 judge 호출이 모두 성공한 경우에만 기록되며(호출 실패로 평가를 건너뛴 모델은 무관),
+    테스트에 새 호출이 추가되면 기존 평가는 무효가 되어 다시 평가합니다.
+  - 기록된 호출·평가는 재개 시 읽은 것만 메모리에 두고, 실행 중 새 기록은 파일에만 추가합니다.
+  - 중단 시점에 일부만 기록된 마지막 줄은 재개할 때 잘라냅니다.
+
+Each completed (run, test, model[, region]) invocation and each test's quality evaluation is appended
+as one JSONL line and fsynced as soon as it finishes. If a run dies on a network blip or Ctrl-C, the
+paid calls and evaluations survive in the journal; running again with --resume replays it and only
+invokes and judges the missing cells.
+
+  - Failed calls are not recorded, so they are retried on resume.
+  - Evaluations are recorded only when every judge call succeeded (models whose call failed, and were
+    skipped, do not count); a new call for a test invalidates its earlier evaluation so the test is
+    judged again.
+  - Only records replayed on resume are kept in memory; records made during the run are only appended
+    to the file, so memory stays flat however long the run is.
+  - A partially written last line left by a crash is truncated on resume.
+
+레코드 형식 / Record format:
+    {"type": "call", "run": "1", "test": "...", "started": <epoch>, "finished": <epoch>, "result": {...}}
+    {"type": "judge", "run": "1", "test": "...", "evaluations": {...}}
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class RunJournal:
+    """
+    fsync되는 JSONL 실행 저널
+    fsynced JSONL run journal
+
+    Args:
+        path: 저널 파일 경로 / Journal file path
+        resume: True이면 기존 저널을 재생하고 이어서 기록, False이면 새로 시작
+                Replay an existing journal and keep appending when True, start afresh when False
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self.resumed_calls = 0
+        self.resumed_evaluations = 0
+        self._lock = threading.Lock()
+        # (run, test) → {(model_key, region): (result, started, finished)}
+        self._calls: Dict[Tuple[str, str], Dict] = {}
+        # (run, test) → evaluations
+        self._evaluations: Dict[Tuple[str, str], Dict] = {}
+        if resume and os.path.exists(path):
+            self._load()
+            self.resumed_calls = sum(len(calls) for calls in self._calls.values())
+            self.resumed_evaluations = len(self._evaluations)
+            self._file = open(path, 'a', encoding='utf-8')
+        else:
+            self._file = open(path, 'w', encoding='utf-8')
+
+    def _load(self):
+        """
+        저널을 재생합니다. 마지막 줄이 잘려 있으면 마지막 완전한 줄까지 파일을 자릅니다.
+        Replays the journal, truncating the file after the last complete line if the tail is torn.
+        """
+        good_end = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b'\n'):
+                    break
+                good_end += len(line)
+                key = (record['run'], record['test'])
+                if record['type'] == 'call':
+                    r = record['result']
+                    self._calls.setdefault(key, {})[(r['model_key'], r['region'])] = (
+                        r, record['started'], record['finished'])
+                    self._evaluations.pop(key, None)
+                elif record['type'] == 'judge':
+                    self._evaluations[key] = record['evaluations']
+        if good_end < os.path.getsize(self.path):
+            print(f"Journal: dropping a partially written record at the end of {self.path}")
+            with open(self.path, 'r+b') as f:
+                f.truncate(good_end)
+
+    def _append(self, record: Dict):
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def record_call(self, run, test: str, result: Dict, started: float, finished: Optional[float] = None):
+        """
+        성공한 호출 결과 하나를 기록합니다 (실패는 기록하지 않음). 재개 시 읽은 해당 테스트의 평가는 무효가 됩니다.
+        Records one successful call result (failures are not recorded), invalidating the test's
+        evaluation replayed on resume.
+        """
+        if not result.get('success'):
+            return
+        finished = finished if finished is not None else time.time()
+        key = (str(run), test)
+        with self._lock:
+            self._evaluations.pop(key, None)
+        self._append({"type": "call", "run": key[0], "test": test, "started": started, "finished": finished,
+                      "result": dict(result)})
+
+    def record_evaluations(self, run, test: str, evaluations: Dict):
+        """
+        테스트의 품질 평가 결과를 기록합니다. judge 호출이 실패했거나 응답을 파싱하지 못한 평가는 재개 시 다시
+        평가하도록 기록하지 않으며, 모델 호출 실패로 건너뛴 항목(skipped)은 실패로 보지 않습니다.
+        Records a test's quality evaluations. Evaluations with a failed judge call or an unparsable judge
+        response are not recorded so they are redone on resume; entries skipped because the model call
+        failed do not count as failures.
+        """
+        if any('raw_response' in qe or ('error' in qe and not qe.get('skipped')) for qe in evaluations.values()):
+            return
+        self._append({"type": "judge", "run": str(run), "test": test, "evaluations": evaluations})
+
+    def calls(self, run, test: str) -> Dict[Tuple[str, str], Tuple[Dict, float, float]]:
+        """
+        재개 시 읽은 호출 {(model_key, region): (result, started, finished)} / Calls replayed on resume
+        """
+        with self._lock:
+            return dict(self._calls.get((str(run), test), {}))
+
+    def evaluations(self, run, test: str) -> Optional[Dict]:
+        """
+        재개 시 읽은 품질 평가 (없거나 무효화되었으면 None) / Evaluations replayed on resume (None if absent or
+        invalidated)
+        """
+        with self._lock:
+            return self._evaluations.get((str(run), test))
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+프로세스 내 다중 실행 스케줄러
+In-process multi-run scheduler
+
+(실행 × 테스트 × 모델) 격자의 모든 셀을 하나의 BedrockModelComparison(및 클라이언트)으로 실행합니다.
+모델마다(멀티 리전이면 리전마다) per_model_concurrency 개의 레인(lane)이 해당 모델의 셀을 순서대로
+처리하고, 전역 동시 호출 수 한도는 invoke_model_limited의 세마포어가 지킵니다. 한 모델의 느린 호출이 다른 모델의 셀을 막지 않으므로
+전체 소요 시간은 가장 느린 모델 하나의 호출 체인에 가까워집니다. 테스트의 모든 모델 호출이 끝나면 즉시
+품질 평가를 시작해 호출과 평가가 겹쳐 진행되며, 실행별 결과 파일(`*_run{N}.json`)을 바로 기록한 뒤
+aggregate_results.py로 집계합니다. 완료된 호출과 평가는 즉시 저널에 기록되므로, 중단된 격자는 --resume으로
+빠진 셀만 다시 실행할 수 있습니다.
+
+Runs every cell of a (runs x tests x models) grid with a single BedrockModelComparison (and client).
+Each model (per region, for multi-region runs) gets per_model_concurrency lanes that work through that
+model's cells in order, while the global in-flight limit is enforced by the semaphores in
+invoke_model_limited. A slow model never
+blocks another model's cells, so the total time approaches the slowest single model's call chain.
+Quality evaluation for a test starts as soon as all of its model calls finish, overlapping with the
+remaining calls; run-indexed result files (`*_run{N}.json`) are written directly and aggregated with
+aggregate_results.py at the end. Completed calls and evaluations are journaled immediately, so an
+interrupted grid can be finished with --resume, running only the missing cells.
+"""
+
+import argparse
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List
+
+from aggregate_results import aggregate, quality_prefix
+from bedrock_model_comparison import BedrockModelComparison, TEST_CASES
+from compact_results import BlobStore
+from eval_cache import EvaluationCache
+from metrics_exporter import attach_exporter
+from run_journal import RunJournal
+
+
+class RunScheduler:
+    """
+    (실행 × 테스트 × 모델) 격자 스케줄러
+    Scheduler for a (runs x tests x models) grid
+
+    Args:
+        comparison: 재사용할 BedrockModelComparison / Shared BedrockModelComparison
+        tests: 테스트 케이스 목록 ({'name', 'prompt'}) / Test cases ({'name', 'prompt'})
+        runs: 실행 횟수 / Number of runs
+        start_run: 첫 실행 번호 (기존 실행 파일 뒤에 이어 붙일 때) / First run index (to append to existing runs)
+        batch_judge: 테스트당 한 번의 judge 호출로 평가 / One judge call per test
+        judge_concurrency: 동시에 평가할 테스트 수 / Number of tests judged concurrently
+        max_tokens: 최대 출력 토큰 수 / Maximum output tokens
+    """
+
+    def __init__(self, comparison: BedrockModelComparison, tests: List[Dict] = TEST_CASES, runs: int = 5,
+                 start_run: int = 1, batch_judge: bool = False, judge_concurrency: int = 5,
+                 max_tokens: int = 4096):
+        self.comparison = comparison
+        self.tests = tests
+        self.run_ids = list(range(start_run, start_run + runs))
+        self.batch_judge = batch_judge
+        self.judge_concurrency = judge_concurrency
+        self.max_tokens = max_tokens
+        self._lock = threading.Lock()
+        # (run, test_index) → {'results': {(model_key, region): result}, 'start': t0, 'end': t1}
+        self._cells: Dict = {}
+        self._evaluations: Dict = {}
+        self._judge_futures = []
+
+    def _lane(self, model_key: str, region: str, queue: deque, judge_pool: ThreadPoolExecutor):
+        """
+        한 (모델, 리전)의 셀을 큐 순서대로 처리하는 레인
+        A lane that works through one (model, region)'s cells in queue order
+        """
+        comparison = self.comparison
+        name = comparison.models[model_key]['name']
+        if len(comparison.regions) > 1:
+            name += f" [{region}]"
+        calls_per_cell = len(comparison.models) * len(comparison.regions)
+        while True:
+            with self._lock:
+                if not queue:
+                    return
+                run_id, test_index = queue.popleft()
+                cell = self._cells.setdefault((run_id, test_index), {'results': {}, 'start': time.time()})
+
+            test = self.tests[test_index]
+            started = time.time()
+            result = comparison.invoke_model_limited(model_key, test['prompt'], self.max_tokens, region)
+            if comparison.journal:
+                comparison.journal.record_call(run_id, test['name'], result, started)
+
+            if result.get('success'):
+                status = f"{result['latency']:.2f}s, {result['output_tokens']} tok"
+            else:
+                status = f"FAILED: {result.get('error', 'Unknown error')}"
+            if result.get('retries'):
+                status += f" ({result['retries']} retries)"
+            print(f"  [run {run_id}] {test['name']} / {name}: {status}")
+
+            # 격자가 끝날 때까지 보관하므로 압축 / Compacted since it is kept until the grid finishes
+            record = comparison.compact(result)
+            with self._lock:
+                cell['results'][(model_key, region)] = record
+                complete = len(cell['results']) == calls_per_cell
+                if complete:
+                    cell['end'] = time.time()
+            if complete:
+                self._judge_futures.append(judge_pool.submit(self._judge, run_id, test_index))
+
+    def _test_result(self, run_id: int, test_index: int) -> Dict:
+        """
+        셀 결과를 run_test()와 같은 형태의 테스트 결과로 구성합니다.
+        Builds a run_test()-shaped test result from a cell.
+        """
+        comparison = self.comparison
+        cell = self._cells[(run_id, test_index)]
+        test = self.tests[test_index]
+        test_result = {
+            'test_name': test['name'],
+            'prompt': test['prompt'],
+            'results': {key: cell['results'][(key, comparison.region)] for key in comparison.models
+                        if (key, comparison.region) in cell['results']},
+            'wall_time': cell['end'] - cell['start'],
+            'timestamp': datetime.fromtimestamp(cell['end']).isoformat(),
+            'run': run_id,
+            'test_id': test['name']
+        }
+        if len(comparison.regions) > 1:
+            test_result['region_results'] = {region: {key: cell['results'][(key, region)] for key in comparison.models
+                                                      if (key, region) in cell['results']}
+                                             for region in comparison.regions}
+        return test_result
+
+    def _judge(self, run_id: int, test_index: int):
+        test_result = self._test_result(run_id, test_index)
+        evaluations = self.comparison.evaluate_test(test_result, self.batch_judge)
+        with self._lock:
+            self._evaluations[(run_id, test_index)] = evaluations
+
+    def run(self) -> Dict[int, List[Dict]]:
+        """
+        격자 전체를 실행하고 실행별 결과 파일을 기록합니다.
+        Executes the whole grid and writes the run-indexed result files.
+
+        Returns:
+            {run_id: [테스트 결과, ...]} / {run_id: [test result, ...]}
+        """
+        comparison = self.comparison
+        cells = [(run_id, i) for run_id in self.run_ids for i in range(len(self.tests))]
+        calls_per_cell = len(comparison.models) * len(comparison.regions)
+
+        # 저널에 기록된 호출로 셀을 미리 채움 (재개 시) / Prefill cells from journaled calls (on resume)
+        complete_cells = []
+        if comparison.journal:
+            for run_id, i in cells:
+                journaled = {call: v for call, v in comparison.journal.calls(run_id, self.tests[i]['name']).items()
+                             if call[0] in comparison.models and call[1] in comparison.regions}
+                if not journaled:
+                    continue
+                self._cells[(run_id, i)] = {
+                    'results': {call: comparison.compact(r) for call, (r, _, _) in journaled.items()},
+                    'start': min(started for _, started, _ in journaled.values())
+                }
+                if len(journaled) == calls_per_cell:
+                    self._cells[(run_id, i)]['end'] = max(finished for _, _, finished in journaled.values())
+                    complete_cells.append((run_id, i))
+            resumed = sum(len(cell['results']) for cell in self._cells.values())
+            if resumed:
+                print(f"Resumed {resumed} calls from journal ({len(complete_cells)} complete cells)")
+
+        # 모델별 빠진 셀 큐 (실행 → 테스트 순서) / Per-model queues of missing cells (run-major, then test order)
+        queues = {(key, region): deque(c for c in cells
+                                       if (key, region) not in self._cells.get(c, {}).get('results', {}))
+                  for key in comparison.models for region in comparison.regions}
+        lanes = [(key, region, queue) for (key, region), queue in queues.items()
+                 for _ in range(min(comparison.model_concurrency[key], len(queue)))]
+
+        regions_str = f" x {len(comparison.regions)} regions" if len(comparison.regions) > 1 else ""
+        print(f"Scheduling {len(self.run_ids)} runs x {len(self.tests)} tests x {len(comparison.models)} models"
+              f"{regions_str} ({len(lanes)} lanes, global limit {comparison.max_concurrency})")
+        wall_start = time.time()
+        with ThreadPoolExecutor(max_workers=max(1, self.judge_concurrency)) as judge_pool:
+            for run_id, i in complete_cells:
+                self._judge_futures.append(judge_pool.submit(self._judge, run_id, i))
+            with ThreadPoolExecutor(max_workers=max(1, len(lanes))) as lane_pool:
+                for future in [lane_pool.submit(self._lane, key, region, queue, judge_pool)
+                               for key, region, queue in lanes]:
+                    future.result()
+            print(f"\nAll model calls done in {time.time() - wall_start:.1f}s; waiting for quality evaluation...")
+            for future in self._judge_futures:
+                future.result()
+        print(f"Grid finished in {time.time() - wall_start:.1f}s")
+        comparison.print_judge_usage()
+
+        # 실행별 결과 파일 기록 / Write run-indexed result files
+        runs = {}
+        for run_id in self.run_ids:
+            test_results = [self._test_result(run_id, i) for i in range(len(self.tests))]
+            for i, test_result in enumerate(test_results):
+                filename = f"{quality_prefix(test_result['test_name'])}_results_run{run_id}.json"
+                comparison.save_test_detail(test_result, self._evaluations[(run_id, i)], filename)
+            comparison.save_results(f'comparison_results_run{run_id}.json', results=test_results)
+            runs[run_id] = test_results
+        return runs
+
+
+def main():
+    """
+    스케줄러 실행 함수: N회 반복 실행 후 집계합니다 (run_5_tests.sh 대체).
+    Scheduler entry point: runs N repetitions in-process and aggregates (replaces run_5_tests.sh).
+    """
+    parser = argparse.ArgumentParser(description='AWS Bedrock multi-run scheduler')
+    parser.add_argument('--runs', type=int, default=5,
+                        help='반복 실행 횟수 / Number of runs')
+    parser.add_argument('--start-run', type=int, default=1,
+                        help='첫 실행 번호 (기존 실행에 이어 붙이기) / First run index (append to existing runs)')
+    parser.add_argument('--region', default='us-east-1',
+                        help='AWS 리전 / AWS region')
+    parser.add_argument('--regions', default=None,
+                        help='동시에 비교할 리전 목록 (예: us-east-1,us-west-2,eu-central-1, 첫 리전이 기본) '
+                             '/ Comma-separated regions to compare concurrently (the first is primary)')
+    parser.add_argument('--concurrency', type=int, default=5,
+                        help='전체 동시 호출 수 / Global in-flight request limit')
+    parser.add_argument('--per-model-concurrency', type=int, default=1,
+                        help='모델별 동시 호출 수 (모델별 레인 수) / Per-model in-flight limit (lanes per model)')
+    parser.add_argument('--rpm', type=float, default=None,
+                        help='모델별 분당 요청 수 제한 / Per-model requests-per-minute limit')
+    parser.add_argument('--tpm', type=float, default=None,
+                        help='모델별 분당 토큰 수 제한 / Per-model tokens-per-minute limit')
+    parser.add_argument('--max-retries', type=int, default=4,
+                        help='스로틀링 시 최대 재시도 횟수 / Maximum retries on throttling')
+    parser.add_argument('--warm-up', action='store_true',
+                        help='실행 전 모델별 짧은 요청으로 연결 예열 / Pre-open connections with tiny requests per model')
+    parser.add_argument('--max-pool-connections', type=int, default=None,
+                        help='HTTP 연결 풀 크기 / HTTP connection pool size')
+    parser.add_argument('--stream', action='store_true',
+                        help='스트리밍 API로 호출하여 TTFT·ITL 측정 / Use streaming API to measure TTFT and ITL')
+    parser.add_argument('--converse', action='store_true',
+                        help='Converse API로 호출하여 서버 측 지연(metrics.latencyMs)과 오버헤드 분리 / Use the Converse API to separate server latency from overhead')
+    parser.add_argument('--batch-judge', action='store_true',
+                        help='테스트당 한 번의 Opus 호출로 전체 응답 평가 / Judge all responses of a test in one Opus call')
+    parser.add_argument('--judge-concurrency', type=int, default=5,
+                        help='동시에 평가할 테스트 수 / Number of tests judged in parallel')
+    parser.add_argument('--eval-cache', default='eval_cache.db',
+                        help='품질 평가 캐시 파일 (SQLite) / Quality evaluation cache file (SQLite)')
+    parser.add_argument('--no-eval-cache', action='store_true',
+                        help='품질 평가 캐시 사용 안 함 / Disable the quality evaluation cache')
+    parser.add_argument('--blob-dir', default='response_blobs',
+                        help='응답 텍스트를 내려 쓸 디렉터리 (SHA-256 콘텐츠 주소) / Directory response texts spill to (SHA-256 addressed)')
+    parser.add_argument('--no-blob-store', action='store_true',
+                        help='응답 텍스트를 메모리에 보관 / Keep response texts in memory')
+    parser.add_argument('--journal', metavar='PATH', default='scheduler_journal.jsonl',
+                        help='완료된 호출·평가 저널 / Journal of completed calls and evaluations')
+    parser.add_argument('--no-journal', action='store_true',
+                        help='저널 기록 안 함 / Disable the journal')
+    parser.add_argument('--resume', action='store_true',
+                        help='저널을 재생하고 빠진 셀만 실행 / Replay the journal and only run the missing cells')
+    parser.add_argument('--endpoint-url', default=None,
+                        help='bedrock-runtime 엔드포인트 재정의 (예: http://localhost:8080) / Endpoint override')
+    parser.add_argument('--replay', metavar='PATH', default=None,
+                        help='기록된 아카이브로 오프라인 재생 / Replay a recorded archive offline')
+    parser.add_argument('--replay-latency-scale', type=float, default=1.0,
+                        help='재생 지연 시간 배율 (0 = 대기 없음) / Replay latency multiplier (0 = no wait)')
+    parser.add_argument('--no-aggregate', action='store_true',
+                        help='실행 후 집계 생략 / Skip aggregation after the runs')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='실시간 지표 OpenMetrics 엔드포인트 포트 (예: 9464) / Port for the live OpenMetrics endpoint')
+    parser.add_argument('--metrics-file', metavar='PATH', default=None,
+                        help='실시간 지표를 주기적으로 기록할 파일 / File the live metrics are flushed to periodically')
+    parser.add_argument('--metrics-interval', type=float, default=10,
+                        help='지표 파일 기록 주기 (초) / Metrics file flush interval (seconds)')
+    args = parser.parse_args()
+
+    journal = None if args.no_journal else RunJournal(args.journal, resume=args.resume)
+    comparison = BedrockModelComparison(
+        region=args.region,
+        regions=args.regions.split(',') if args.regions else None,
+        max_concurrency=args.concurrency,
+        per_model_concurrency=args.per_model_concurrency,
+        stream=args.stream,
+        converse=args.converse,
+        eval_cache=None if args.no_eval_cache else EvaluationCache(args.eval_cache),
+        blob_store=None if args.no_blob_store else BlobStore(args.blob_dir),
+        journal=journal,
+        replay_path=args.replay,
+        replay_latency_scale=args.replay_latency_scale,
+        endpoint_url=args.endpoint_url,
+        requests_per_min=args.rpm,
+        tokens_per_min=args.tpm,
+        max_retries=args.max_retries,
+        max_pool_connections=args.max_pool_connections
+    )
+    # 실시간 지표 (요청 시) / Live metrics (if requested)
+    exporter = attach_exporter(comparison, args.metrics_port, args.metrics_file, args.metrics_interval)
+    if args.warm_up:
+        comparison.warm_up()
+
+    scheduler = RunScheduler(comparison, runs=args.runs, start_run=args.start_run,
+                             batch_judge=args.batch_judge, judge_concurrency=args.judge_concurrency)
+    scheduler.run()
+
+    comparison.close_eval_cache()
+    if journal:
+        journal.close()
+    if exporter:
+        exporter.close()
+
+    if not args.no_aggregate:
+        print(f"\n{'#'*40}\n# AGGREGATING RESULTS\n{'#'*40}\n")
+        aggregate()
+
+
+if __name__ == '__main__':
+    main()
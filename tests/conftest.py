@@ -0,0 +1,9 @@
+"""
+테스트에서 저장소 루트의 스크립트 모듈을 임포트할 수 있게 합니다.
+Makes the script modules at the repository root importable from the tests.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
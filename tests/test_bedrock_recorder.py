@@ -0,0 +1,187 @@
+"""
+RecordingClient → ReplayClient 왕복, 리전별 재생, 손상된 아카이브 처리 테스트
+Tests for the RecordingClient -> ReplayClient round trip, per-region replay and torn archives
+"""
+
+import io
+import json
+import os
+
+import pytest
+from botocore.exceptions import ClientError
+
+from bedrock_recorder import RecordingClient, ReplayClient, read_archive
+
+MODEL_ID = 'us.example.model-v1'
+
+
+class FakeRuntime:
+    """
+    고정 응답을 돌려주는 bedrock-runtime 대역 / bedrock-runtime stand-in returning canned responses
+    """
+
+    def __init__(self, text: str = 'hello', fail_with: str = None):
+        self.text = text
+        self.fail_with = fail_with
+
+    def invoke_model(self, modelId, body, **kwargs):
+        if self.fail_with:
+            raise ClientError({'Error': {'Code': self.fail_with, 'Message': 'slow down'}}, 'InvokeModel')
+        return {'body': io.BytesIO(json.dumps({'text': self.text, 'request': json.loads(body)}).encode())}
+
+    def invoke_model_with_response_stream(self, modelId, body, **kwargs):
+        return {'body': iter([{'chunk': {'bytes': part.encode()}} for part in (self.text, ' world')])}
+
+    def converse(self, modelId, **kwargs):
+        return {'output': {'message': {'content': [{'text': self.text}]}},
+                'usage': {'inputTokens': 3, 'outputTokens': 1}, 'metrics': {'latencyMs': 5},
+                'ResponseMetadata': {'RequestId': 'x'}}
+
+    def converse_stream(self, modelId, **kwargs):
+        return {'stream': iter([{'contentBlockDelta': {'delta': {'text': self.text}}},
+                                {'metadata': {'usage': {'inputTokens': 3, 'outputTokens': 1}}}])}
+
+
+def invoke(client, prompt: str = 'hi') -> dict:
+    response = client.invoke_model(modelId=MODEL_ID, body=json.dumps({'prompt': prompt}))
+    return json.loads(response['body'].read())
+
+
+def test_invoke_round_trip(tmp_path):
+    path = str(tmp_path / 'calls.jsonl.gz')
+    recorder = RecordingClient(FakeRuntime('recorded'), path)
+    assert invoke(recorder, 'a')['text'] == 'recorded'
+    assert invoke(recorder, 'b')['request'] == {'prompt': 'b'}
+    recorder.close()
+
+    replay = ReplayClient(path, latency_scale=0)
+    assert invoke(replay, 'b')['request'] == {'prompt': 'b'}
+    assert invoke(replay, 'a')['request'] == {'prompt': 'a'}
+
+
+def test_stream_and_converse_round_trip(tmp_path):
+    path = str(tmp_path / 'calls.jsonl.gz')
+    recorder = RecordingClient(FakeRuntime('hello'), path)
+    list(recorder.invoke_model_with_response_stream(modelId=MODEL_ID, body='{}')['body'])
+    recorder.converse(modelId=MODEL_ID, messages=[{'role': 'user', 'content': [{'text': 'q'}]}])
+    list(recorder.converse_stream(modelId=MODEL_ID, messages=[])['stream'])
+    recorder.close()
+
+    replay = ReplayClient(path, latency_scale=0)
+    stream = replay.invoke_model_with_response_stream(modelId=MODEL_ID, body='{}')['body']
+    chunks = [event['chunk']['bytes'] for event in stream]
+    assert chunks == [b'hello', b' world']
+    response = replay.converse(modelId=MODEL_ID, messages=[{'role': 'user', 'content': [{'text': 'q'}]}])
+    assert response['output']['message']['content'][0]['text'] == 'hello'
+    assert 'ResponseMetadata' not in response
+    events = list(replay.converse_stream(modelId=MODEL_ID, messages=[])['stream'])
+    assert events[-1] == {'metadata': {'usage': {'inputTokens': 3, 'outputTokens': 1}}}
+
+
+def test_replay_cycles_and_strict_miss(tmp_path):
+    path = str(tmp_path / 'calls.jsonl.gz')
+    recorder = RecordingClient(FakeRuntime(), path)
+    invoke(recorder, 'a')
+    recorder.close()
+
+    loose = ReplayClient(path, latency_scale=0)
+    assert invoke(loose, 'unseen')['request'] == {'prompt': 'a'}
+    assert invoke(loose, 'unseen')['request'] == {'prompt': 'a'}
+
+    strict = ReplayClient(path, latency_scale=0, strict=True)
+    with pytest.raises(ClientError) as excinfo:
+        invoke(strict, 'unseen')
+    assert excinfo.value.response['Error']['Code'] == 'ReplayMiss'
+
+
+def test_recorded_error_is_replayed(tmp_path):
+    path = str(tmp_path / 'calls.jsonl.gz')
+    recorder = RecordingClient(FakeRuntime(fail_with='ThrottlingException'), path)
+    with pytest.raises(ClientError):
+        invoke(recorder)
+    recorder.close()
+
+    with pytest.raises(ClientError) as excinfo:
+        invoke(ReplayClient(path, latency_scale=0))
+    assert excinfo.value.response['Error']['Code'] == 'ThrottlingException'
+
+
+def test_regions_replay_their_own_records(tmp_path):
+    path = str(tmp_path / 'calls.jsonl.gz')
+    east = RecordingClient(FakeRuntime('east'), path, region='us-east-1')
+    west = east.sibling(FakeRuntime('west'), region='us-west-2')
+    invoke(east)
+    invoke(west)
+    east.close()
+    assert [r['region'] for r in read_archive(path)] == ['us-east-1', 'us-west-2']
+
+    replay_east = ReplayClient(path, latency_scale=0, region='us-east-1')
+    replay_west = replay_east.sibling('us-west-2')
+    for _ in range(2):
+        assert invoke(replay_east)['text'] == 'east'
+        assert invoke(replay_west)['text'] == 'west'
+    with pytest.raises(ClientError):
+        invoke(replay_east.sibling('eu-west-1'))
+
+
+def test_region_less_records_serve_every_region(tmp_path):
+    path = str(tmp_path / 'calls.jsonl.gz')
+    recorder = RecordingClient(FakeRuntime('single'), path)
+    invoke(recorder)
+    recorder.close()
+
+    replay = ReplayClient(path, latency_scale=0, region='us-east-1')
+    assert invoke(replay)['text'] == 'single'
+    assert invoke(replay.sibling('ap-northeast-2'))['text'] == 'single'
+
+
+def test_archive_readable_without_close(tmp_path):
+    path = str(tmp_path / 'calls.jsonl.gz')
+    recorder = RecordingClient(FakeRuntime(), path)
+    invoke(recorder, 'a')
+    invoke(recorder, 'b')
+    assert [json.loads(r['request'])['prompt'] for r in read_archive(path)] == ['a', 'b']
+    recorder.close()
+
+
+def test_torn_archive_is_skipped_then_truncated(tmp_path, capsys):
+    path = str(tmp_path / 'calls.jsonl.gz')
+    recorder = RecordingClient(FakeRuntime(), path)
+    invoke(recorder, 'a')
+    invoke(recorder, 'b')
+    complete_end = os.path.getsize(path)
+    invoke(recorder, 'c')
+    recorder.close()
+
+    # 마지막 기록을 절반만 남김 (기록 중 중단) / Keep half of the last record (interrupted write)
+    with open(path, 'r+b') as f:
+        f.truncate((complete_end + os.path.getsize(path)) // 2)
+
+    assert [json.loads(r['request'])['prompt'] for r in read_archive(path)] == ['a', 'b']
+    strict = ReplayClient(path, latency_scale=0, strict=True)
+    assert invoke(strict, 'b')['request'] == {'prompt': 'b'}
+    with pytest.raises(ClientError):
+        invoke(strict, 'c')
+
+    recorder = RecordingClient(FakeRuntime(), path)
+    assert 'partially written record' in capsys.readouterr().out
+    assert os.path.getsize(path) == complete_end
+    invoke(recorder, 'd')
+    recorder.close()
+    assert [json.loads(r['request'])['prompt'] for r in read_archive(path)] == ['a', 'b', 'd']
+
+
+def test_replay_waits_for_latency_then_body_read(tmp_path, monkeypatch):
+    path = str(tmp_path / 'calls.jsonl.gz')
+    recorder = RecordingClient(FakeRuntime(), path)
+    invoke(recorder)
+    recorder.close()
+    record = read_archive(path)[0]
+
+    sleeps = []
+    monkeypatch.setattr(ReplayClient, '_sleep', lambda self, seconds: sleeps.append(seconds))
+    response = ReplayClient(path).invoke_model(modelId=MODEL_ID, body=record['request'])
+    assert sleeps == [record['latency']]
+    response['body'].read()
+    response['body'].read()
+    assert sleeps == [record['latency'], record['read_time']]
@@ -0,0 +1,102 @@
+"""
+EvaluationCache 적중/미스 집계와 제거 정책 테스트
+Tests for EvaluationCache hit/miss counting and eviction
+"""
+
+import pytest
+
+import eval_cache
+from eval_cache import EvaluationCache
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(eval_cache.time, 'time', fake)
+    return fake
+
+
+def test_make_key_separates_parts():
+    assert EvaluationCache.make_key('ab', 'c') != EvaluationCache.make_key('a', 'bc')
+    assert EvaluationCache.make_key('a', 'b') == EvaluationCache.make_key('a', 'b')
+
+
+def test_hit_and_miss_counts(tmp_path, clock):
+    cache = EvaluationCache(str(tmp_path / 'cache.db'))
+    key = EvaluationCache.make_key('judge', 'prompt', 'response')
+    assert cache.get(key) is None
+    cache.put(key, {'overall_score': 8})
+    assert cache.get(key) == {'overall_score': 8}
+    assert cache.get(key) == {'overall_score': 8}
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'hit_rate': 0.667, 'entries': 1}
+    cache.close()
+
+
+def test_empty_stats(tmp_path, clock):
+    cache = EvaluationCache(str(tmp_path / 'cache.db'))
+    assert cache.stats() == {'hits': 0, 'misses': 0, 'hit_rate': 0, 'entries': 0}
+    cache.close()
+
+
+def test_entries_persist_across_reopen(tmp_path, clock):
+    path = str(tmp_path / 'cache.db')
+    cache = EvaluationCache(path)
+    cache.put('k', {'score': 1})
+    cache.close()
+    cache = EvaluationCache(path)
+    assert cache.get('k') == {'score': 1}
+    assert cache.stats()['hits'] == 1
+    cache.close()
+
+
+def test_evicts_least_recently_used_beyond_max_entries(tmp_path, clock):
+    cache = EvaluationCache(str(tmp_path / 'cache.db'), max_entries=2)
+    cache.put('a', {'v': 'a'})
+    clock.now += 1
+    cache.put('b', {'v': 'b'})
+    clock.now += 1
+    # 'a'를 읽어 가장 최근 사용으로 만듦 / Reading 'a' makes it the most recently used
+    assert cache.get('a') == {'v': 'a'}
+    clock.now += 1
+    cache.put('c', {'v': 'c'})
+    cache.evict()
+    assert cache.stats()['entries'] == 2
+    assert cache.get('b') is None
+    assert cache.get('a') == {'v': 'a'}
+    assert cache.get('c') == {'v': 'c'}
+    cache.close()
+
+
+def test_evicts_entries_older_than_max_age(tmp_path, clock):
+    cache = EvaluationCache(str(tmp_path / 'cache.db'), max_age_days=1)
+    cache.put('old', {'v': 1})
+    clock.now += 12 * 3600
+    cache.put('new', {'v': 2})
+    clock.now += 13 * 3600
+    # 접근해도 생성 시각 기준으로 만료 / Expiry is by creation time even when recently read
+    assert cache.get('old') == {'v': 1}
+    cache.evict()
+    assert cache.get('old') is None
+    assert cache.get('new') == {'v': 2}
+    cache.close()
+
+
+def test_close_applies_limits(tmp_path, clock):
+    path = str(tmp_path / 'cache.db')
+    cache = EvaluationCache(path, max_entries=1)
+    cache.put('a', {})
+    clock.now += 1
+    cache.put('b', {})
+    cache.close()
+    cache = EvaluationCache(path, max_entries=10)
+    assert cache.stats()['entries'] == 1
+    assert cache.get('b') == {}
+    cache.close()
@@ -0,0 +1,94 @@
+"""
+judge 프롬프트 캐싱 테스트: 캐시 지점 표시, 내장 테스트 앞부분의 최소 캐시 길이, 캐시되지 않은 호출 집계
+Tests for judge prompt caching: cache point marking, the built-in tests' prefix length against the minimum
+cacheable length, and counting uncached calls
+"""
+
+import io
+import json
+
+import pytest
+
+import bedrock_model_comparison
+from bedrock_model_comparison import JUDGE_MIN_CACHE_TOKENS, TEST_CASES, BedrockModelComparison
+
+
+class FakeJudge:
+    """
+    요청 본문을 모아 두고 고정 평가와 usage를 돌려주는 judge 대역
+    Judge stand-in that collects request bodies and returns a canned evaluation and usage
+    """
+
+    def __init__(self, usage=None):
+        self.usage = usage or {}
+        self.bodies = []
+
+    def invoke_model(self, modelId, body):
+        self.bodies.append(json.loads(body))
+        evaluation = {'accuracy': 8, 'specificity': 7, 'structure': 8, 'practicality': 7, 'comment': 'ok'}
+        return {'body': io.BytesIO(json.dumps({'content': [{'text': json.dumps(evaluation)}],
+                                               'usage': self.usage}).encode())}
+
+
+@pytest.fixture
+def comparison(monkeypatch):
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'test')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'test')
+    return BedrockModelComparison(endpoint_url='http://127.0.0.1:9')
+
+
+def single_result(prompt: str, model_key: str) -> dict:
+    return {'prompt': prompt, 'results': {model_key: {'success': True, 'model': 'Model', 'output_text': 'answer'}}}
+
+
+def lower_bound_tokens(text: str) -> int:
+    # 문자 수 / 4는 한국어를 과소 추정하므로 한국어 2자당 1토큰을 하한으로 사용
+    # chars / 4 undercounts Korean, so one token per two non-ASCII characters serves as a lower bound
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return (len(text) - non_ascii) // 4 + non_ascii // 2
+
+
+@pytest.mark.parametrize('batched', [False, True])
+def test_builtin_prefixes_are_marked_and_long_enough_to_cache(comparison, batched):
+    judge = FakeJudge()
+    comparison.client = judge
+    model_key = next(iter(comparison.models))
+    evaluate = comparison.evaluate_quality_batched if batched else comparison.evaluate_quality
+    for case in TEST_CASES:
+        evaluate(single_result(case['prompt'], model_key))
+
+    assert len(judge.bodies) == len(TEST_CASES)
+    for body in judge.bodies:
+        prefix_block, suffix_block = body['messages'][0]['content']
+        assert prefix_block['cache_control'] == {'type': 'ephemeral'}
+        assert 'cache_control' not in suffix_block
+        assert lower_bound_tokens(prefix_block['text']) >= JUDGE_MIN_CACHE_TOKENS
+
+
+def test_short_prefix_still_carries_cache_control(comparison):
+    judge = FakeJudge()
+    comparison.client = judge
+    comparison._invoke_judge('short prefix', 'suffix')
+    assert judge.bodies[0]['messages'][0]['content'][0]['cache_control'] == {'type': 'ephemeral'}
+
+
+def test_uncached_calls_counted_from_usage(comparison):
+    comparison.client = FakeJudge({'input_tokens': 100, 'output_tokens': 20})
+    comparison._invoke_judge('prefix', 'suffix')
+    comparison.client = FakeJudge({'input_tokens': 10, 'output_tokens': 20, 'cache_creation_input_tokens': 1500})
+    comparison._invoke_judge('prefix', 'suffix')
+    comparison.client = FakeJudge({'input_tokens': 10, 'output_tokens': 20, 'cache_read_input_tokens': 1500})
+    comparison._invoke_judge('prefix', 'suffix')
+
+    summary = comparison.judge_summary()
+    assert summary['calls'] == 3
+    assert summary['uncached_calls'] == 1
+    assert summary['cache_read_input_tokens'] == 1500
+    assert summary['cache_creation_input_tokens'] == 1500
+
+
+def test_stub_caches_the_builtin_judge_prefix():
+    from bedrock_stub_server import estimate_tokens
+    prefix = f"{TEST_CASES[0]['prompt']}\n\n{bedrock_model_comparison.JUDGE_RUBRIC}"
+    assert estimate_tokens(prefix) >= JUDGE_MIN_CACHE_TOKENS
+    assert estimate_tokens('abcd' * 10) == 10
@@ -0,0 +1,32 @@
+"""
+부트스트랩 짝지음(paired) 여부에 따른 쌍별 우위 확률 테스트
+Tests for pairwise win probabilities with paired and independent bootstrap resampling
+"""
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from ranking_stats import Bootstrap  # noqa: E402
+
+FAST = [1.0, 1.4, 0.8, 1.9, 1.1, 1.6]
+# 각 값이 FAST보다 조금씩 느림 (실행 단위로는 항상 느리지만 분포는 크게 겹침)
+# Each value slightly slower than FAST (always slower run by run, but the distributions overlap heavily)
+SLOW = [x + 0.05 for x in FAST]
+
+
+def test_paired_bootstrap_keeps_run_order():
+    prob = Bootstrap(iterations=2000, seed=1).pairwise_lower({'fast': FAST, 'slow': SLOW})
+    assert prob['fast']['slow'] == 1.0
+
+
+def test_independent_bootstrap_reflects_overlap():
+    prob = Bootstrap(iterations=2000, seed=1, paired=False).pairwise_lower({'fast': FAST, 'slow': SLOW})
+    assert 0.5 < prob['fast']['slow'] < 0.8
+    assert prob['slow']['fast'] == pytest.approx(1 - prob['fast']['slow'], abs=1e-3)
+
+
+def test_mean_ci_contains_mean():
+    for paired in (True, False):
+        low, high = Bootstrap(iterations=2000, seed=1, paired=paired).mean_ci(FAST)
+        assert low <= np.mean(FAST) <= high
@@ -0,0 +1,117 @@
+"""
+토큰 버킷 보충·대기, 백오프 범위, 스로틀링 판별 테스트
+Tests for token bucket refill and waiting, backoff bounds and throttle detection
+"""
+
+import random
+
+import pytest
+from botocore.exceptions import ClientError
+
+import rate_limit
+from rate_limit import ModelRateLimiter, TokenBucket, backoff_delay, is_throttle_exception
+
+
+class FakeClock:
+    """
+    time.monotonic / time.sleep 대역 (sleep은 시계만 진행) / Stand-in for time.monotonic and time.sleep
+    (sleep only advances the clock)
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limit.time, 'monotonic', fake.monotonic)
+    monkeypatch.setattr(rate_limit.time, 'sleep', fake.sleep)
+    return fake
+
+
+def test_default_capacity_is_ten_seconds_of_refill(clock):
+    assert TokenBucket(600).capacity == 100
+    assert TokenBucket(3).capacity == 1.0
+
+
+def test_burst_then_wait_for_refill(clock):
+    bucket = TokenBucket(60, capacity=2)
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == pytest.approx(1.0)
+    assert clock.now == pytest.approx(1.0)
+
+
+def test_refill_is_capped_at_capacity(clock):
+    bucket = TokenBucket(60, capacity=2)
+    bucket.acquire(2)
+    clock.now += 3600
+    assert bucket.acquire(2) == 0
+    assert bucket.acquire(1) == pytest.approx(1.0)
+
+
+def test_oversized_request_passes_when_full_and_goes_negative(clock):
+    bucket = TokenBucket(60, capacity=10)
+    assert bucket.acquire(25) == 0
+    # 잔량 -15에서 1개를 쓰려면 16초 보충 필요 / From a balance of -15, one token needs 16 seconds
+    assert bucket.acquire(1) == pytest.approx(16.0)
+
+
+def test_debit_delays_the_next_acquire(clock):
+    bucket = TokenBucket(60, capacity=5)
+    bucket.debit(10)
+    assert bucket.acquire(1) == pytest.approx(6.0)
+
+
+def test_model_limiter_settles_only_the_excess(clock):
+    limiter = ModelRateLimiter(requests_per_min=60, tokens_per_min=600)
+    assert limiter.acquire(100) == 0
+    limiter.settle(100, 50)
+    assert limiter.tokens._level == pytest.approx(0)
+    limiter.settle(0, 60)
+    assert limiter.acquire(1) == pytest.approx(61 / 10)
+
+
+def test_model_limiter_without_limits_never_waits(clock):
+    limiter = ModelRateLimiter()
+    assert limiter.acquire(10 ** 9) == 0
+    limiter.settle(0, 10 ** 9)
+    assert clock.sleeps == []
+
+
+@pytest.mark.parametrize('attempt', range(8))
+def test_backoff_delay_bounds(attempt):
+    rng = random.Random(attempt)
+    bound = min(20.0, 1.0 * 2 ** attempt)
+    delays = [backoff_delay(attempt, rng=rng) for _ in range(200)]
+    assert all(0 <= d <= bound for d in delays)
+    assert max(delays) > bound / 2
+
+
+def test_backoff_delay_respects_cap_and_base():
+    class Upper:
+        @staticmethod
+        def uniform(low, high):
+            return high
+
+    assert backoff_delay(0, base=0.5, rng=Upper) == 0.5
+    assert backoff_delay(3, base=0.5, rng=Upper) == 4.0
+    assert backoff_delay(30, base=0.5, cap=7, rng=Upper) == 7
+
+
+def test_is_throttle_exception():
+    throttled = ClientError({'Error': {'Code': 'ThrottlingException', 'Message': 'x'}}, 'InvokeModel')
+    denied = ClientError({'Error': {'Code': 'AccessDeniedException', 'Message': 'x'}}, 'InvokeModel')
+    assert is_throttle_exception(throttled)
+    assert not is_throttle_exception(denied)
+    assert is_throttle_exception(RuntimeError('TooManyRequestsException: slow down'))
+    assert not is_throttle_exception(RuntimeError('timeout'))
@@ -0,0 +1,122 @@
+"""
+실행 저널 기록·재개, 평가 무효화, 잘린 마지막 줄 처리 테스트
+Tests for run journal recording and resume, evaluation invalidation and torn-tail truncation
+"""
+
+import json
+import os
+
+from run_journal import RunJournal
+
+
+def call_result(model_key: str, region: str = 'us-east-1', success: bool = True) -> dict:
+    return {'success': success, 'model_key': model_key, 'region': region, 'latency': 1.0}
+
+
+def test_resume_replays_successful_calls(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = RunJournal(path)
+    journal.record_call(1, 'Test', call_result('haiku'), started=10.0, finished=11.0)
+    journal.record_call(1, 'Test', call_result('nova', region='us-west-2'), started=10.0, finished=12.0)
+    journal.record_call(1, 'Test', call_result('llama', success=False), started=10.0)
+    journal.record_call(2, 'Test', call_result('haiku'), started=20.0, finished=21.0)
+    # 실행 중 기록은 메모리에 두지 않음 / Records made during the run are not kept in memory
+    assert journal.calls(1, 'Test') == {}
+    journal.close()
+
+    resumed = RunJournal(path, resume=True)
+    assert resumed.resumed_calls == 3
+    calls = resumed.calls('1', 'Test')
+    assert set(calls) == {('haiku', 'us-east-1'), ('nova', 'us-west-2')}
+    assert calls[('haiku', 'us-east-1')] == (call_result('haiku'), 10.0, 11.0)
+    assert set(resumed.calls(2, 'Test')) == {('haiku', 'us-east-1')}
+    assert resumed.calls(3, 'Test') == {}
+    resumed.close()
+
+
+def test_without_resume_starts_afresh(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = RunJournal(path)
+    journal.record_call(1, 'Test', call_result('haiku'), started=0.0)
+    journal.close()
+
+    journal = RunJournal(path)
+    journal.close()
+    assert os.path.getsize(path) == 0
+    resumed = RunJournal(path, resume=True)
+    assert resumed.resumed_calls == 0
+    resumed.close()
+
+
+def test_evaluations_resume_and_invalidate(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = RunJournal(path)
+    journal.record_call(1, 'A', call_result('haiku'), started=0.0)
+    journal.record_evaluations(1, 'A', {'haiku': {'overall_score': 8}})
+    journal.record_call(1, 'B', call_result('haiku'), started=0.0)
+    journal.record_evaluations(1, 'B', {'haiku': {'overall_score': 7}})
+    # B에 새 호출이 추가되어 B의 평가는 무효 / A new call for B invalidates B's evaluation
+    journal.record_call(1, 'B', call_result('nova'), started=0.0)
+    journal.close()
+
+    resumed = RunJournal(path, resume=True)
+    assert resumed.resumed_evaluations == 1
+    assert resumed.evaluations(1, 'A') == {'haiku': {'overall_score': 8}}
+    assert resumed.evaluations(1, 'B') is None
+    # 재개 후 새 호출도 읽어 온 평가를 무효화 / A call after resume also invalidates a replayed evaluation
+    resumed.record_call(1, 'A', call_result('nova'), started=0.0)
+    assert resumed.evaluations(1, 'A') is None
+    resumed.close()
+
+
+def test_judge_failures_are_not_recorded(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = RunJournal(path)
+    journal.record_evaluations(1, 'Failed', {'haiku': {'overall_score': 8}, 'nova': {'error': 'judge timeout'}})
+    journal.record_evaluations(1, 'Unparsed', {'haiku': {'raw_response': 'not json'}})
+    skipped = {'haiku': {'overall_score': 8},
+               'nova': {'error': 'Model invocation failed, skipping evaluation', 'skipped': True}}
+    journal.record_evaluations(1, 'Skipped', skipped)
+    journal.close()
+
+    resumed = RunJournal(path, resume=True)
+    assert resumed.evaluations(1, 'Failed') is None
+    assert resumed.evaluations(1, 'Unparsed') is None
+    assert resumed.evaluations(1, 'Skipped') == skipped
+    resumed.close()
+
+
+def test_torn_tail_is_truncated_on_resume(tmp_path, capsys):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = RunJournal(path)
+    journal.record_call(1, 'Test', call_result('haiku'), started=0.0)
+    journal.close()
+    complete_end = os.path.getsize(path)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"type": "call", "run": "1", "test": "Te')
+
+    resumed = RunJournal(path, resume=True)
+    assert 'partially written record' in capsys.readouterr().out
+    assert os.path.getsize(path) == complete_end
+    assert resumed.resumed_calls == 1
+    resumed.record_call(1, 'Test', call_result('nova'), started=0.0)
+    resumed.close()
+
+    with open(path, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert [r['result']['model_key'] for r in records] == ['haiku', 'nova']
+
+
+def test_complete_json_without_newline_is_treated_as_torn(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = RunJournal(path)
+    journal.record_call(1, 'Test', call_result('haiku'), started=0.0)
+    journal.close()
+    complete_end = os.path.getsize(path)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'type': 'judge', 'run': '1', 'test': 'Test', 'evaluations': {}}))
+
+    resumed = RunJournal(path, resume=True)
+    assert resumed.evaluations(1, 'Test') is None
+    assert os.path.getsize(path) == complete_end
+    resumed.close()